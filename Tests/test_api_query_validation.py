@@ -147,8 +147,8 @@ async def test_validation_integration():
         if validation_report.validation_results:
             print("\nValidation Rule Results:")
             for result in validation_report.validation_results:
-                status_icon = "✓" if result['status'].value == "pass" else "❌" if result['status'].value == "fail" else "⚠"
-                print(f"  {status_icon} {result['rule_name']}: {result['message']}")
+                status_icon = "✓" if result.status.value == "pass" else "❌" if result.status.value == "fail" else "⚠"
+                print(f"  {status_icon} {result.rule_name}: {result.message}")
         
         print("✓ Validation integration test completed successfully")
         
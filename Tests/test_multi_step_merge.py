@@ -0,0 +1,212 @@
+"""
+Behavioural tests for fusing sequential validation and formatting steps.
+Covers _merge_sequential_sql_steps and how merged steps execute, fail and recover.
+"""
+
+import asyncio
+import os
+import sys
+from contextlib import asynccontextmanager
+
+import pytest
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app.services.multi_step_query as multi_step_query
+from app.services.multi_step_query import (
+    MultiStepQueryProcessor,
+    QueryExecutionPlan,
+    QueryStep,
+    QueryStepType
+)
+
+
+VALIDATION_SQL = "SELECT COUNT(*) FROM products p WHERE p.name ILIKE '%onions%'"
+JOIN_SQL = "SELECT COUNT(*) FROM products p JOIN current_prices cp ON p.id = cp.product_id"
+FORMATTING_SQL = "SELECT p.id AS product_id, p.name AS product_name FROM products p"
+
+
+class FakeSession:
+    """Stands in for the plan's shared AsyncSession."""
+    
+    def __init__(self):
+        self.rollbacks = 0
+    
+    async def rollback(self):
+        self.rollbacks += 1
+
+
+@pytest.fixture
+def processor(monkeypatch):
+    """Processor without a semantic indexer, planner or database behind it."""
+    monkeypatch.setattr(multi_step_query, "get_semantic_indexer", lambda: None)
+    monkeypatch.setattr(multi_step_query, "QueryPlanner", lambda: None)
+    
+    @asynccontextmanager
+    async def session_factory():
+        yield FakeSession()
+    
+    monkeypatch.setattr(multi_step_query, "AsyncSessionLocal", session_factory)
+    return MultiStepQueryProcessor()
+
+
+def _step(idx, step_type, sql_fragment, validation_query=None, timeout_seconds=30):
+    return QueryStep(
+        step_id=f"step_{idx+1}_{step_type.value}",
+        idx=idx,
+        step_type=step_type,
+        description=f"{step_type.value} step",
+        sql_fragment=sql_fragment,
+        dependencies=(idx - 1,) if idx > 0 else (),
+        validation_query=validation_query,
+        timeout_seconds=timeout_seconds
+    )
+
+
+def _plan(steps):
+    return QueryExecutionPlan(
+        query_id="test_plan",
+        original_query="Which app has cheapest onions right now?",
+        steps=steps,
+        total_steps=len(steps),
+        estimated_execution_time=1.0,
+        complexity_score=1,
+        relevant_tables=["products", "current_prices"]
+    )
+
+
+def test_merge_fuses_validation_join_and_formatting(processor):
+    """Three consecutive SELECT steps become one CTE step typed by its strictest member."""
+    steps = [
+        _step(0, QueryStepType.TABLE_SELECTION, "-- Using tables: products, current_prices"),
+        _step(1, QueryStepType.DATA_VALIDATION, VALIDATION_SQL, validation_query="SELECT 1", timeout_seconds=30),
+        _step(2, QueryStepType.JOIN_VALIDATION, JOIN_SQL, timeout_seconds=45),
+        _step(3, QueryStepType.RESULT_FORMATTING, FORMATTING_SQL, timeout_seconds=40),
+    ]
+    
+    merged = processor._merge_sequential_sql_steps(steps)
+    
+    assert len(merged) == 2
+    merged_step = merged[1]
+    assert merged_step.step_type == QueryStepType.DATA_VALIDATION
+    assert merged_step.merged_step_types == (
+        QueryStepType.DATA_VALIDATION, QueryStepType.JOIN_VALIDATION, QueryStepType.RESULT_FORMATTING
+    )
+    assert merged_step.step_id == "step_2_data_validation"
+    assert merged_step.idx == 1
+    assert merged_step.dependencies == (0,)
+    assert merged_step.validation_query == "SELECT 1"
+    assert merged_step.timeout_seconds == 45
+    
+    sql = merged_step.sql_fragment
+    assert sql.startswith(f"WITH validation_count_check(validation_count) AS ({VALIDATION_SQL})")
+    assert f"join_count_check(join_count) AS ({JOIN_SQL})" in sql
+    assert f"formatted AS ({FORMATTING_SQL})" in sql
+    assert sql.endswith("LIMIT :row_limit")
+
+
+def test_merge_fuses_validation_and_formatting_pair(processor):
+    """A validation step directly followed by formatting is fused on its own."""
+    steps = [
+        _step(0, QueryStepType.DATA_VALIDATION, VALIDATION_SQL),
+        _step(1, QueryStepType.RESULT_FORMATTING, FORMATTING_SQL),
+    ]
+    
+    merged = processor._merge_sequential_sql_steps(steps)
+    
+    assert len(merged) == 1
+    assert merged[0].step_type == QueryStepType.DATA_VALIDATION
+    assert merged[0].merged_step_types == (QueryStepType.DATA_VALIDATION, QueryStepType.RESULT_FORMATTING)
+    assert merged[0].dependencies == ()
+
+
+def test_merge_leaves_non_select_steps_alone(processor):
+    """Placeholder fragments cannot run inside a CTE, so the plan is returned unchanged."""
+    steps = [
+        _step(0, QueryStepType.DATA_VALIDATION, VALIDATION_SQL),
+        _step(1, QueryStepType.RESULT_FORMATTING, "-- SQL fragment placeholder"),
+    ]
+    
+    merged = processor._merge_sequential_sql_steps(steps)
+    
+    assert merged is steps
+    assert [step.merged_step_types for step in merged] == [(), ()]
+
+
+def test_merged_step_splits_counts_from_formatted_rows(processor, monkeypatch):
+    """Count columns are lifted out of the rows and the all-NULL filler row is dropped."""
+    steps = processor._merge_sequential_sql_steps([
+        _step(0, QueryStepType.DATA_VALIDATION, VALIDATION_SQL),
+        _step(1, QueryStepType.JOIN_VALIDATION, JOIN_SQL),
+        _step(2, QueryStepType.RESULT_FORMATTING, FORMATTING_SQL),
+    ])
+    
+    async def fake_fetch_rows(sql, params=None, session=None):
+        return [
+            {"validation_count": 2, "join_count": 0, "product_id": 1, "product_name": "Red Onion"},
+            {"validation_count": 2, "join_count": 0, "product_id": None, "product_name": None},
+        ]
+    
+    monkeypatch.setattr(processor, "_fetch_rows", fake_fetch_rows)
+    
+    output = asyncio.run(processor._execute_step_logic(steps[0]))
+    
+    assert output == {
+        "formatted_results": [{"product_id": 1, "product_name": "Red Onion"}],
+        "count": 1,
+        "validation_count": 2,
+        "valid": True,
+        "join_valid": False,
+    }
+
+
+def test_failed_merged_step_is_recovered_as_validation(processor, monkeypatch):
+    """A failed merged step gets the broadened validation query rerun as recovery."""
+    steps = processor._merge_sequential_sql_steps([
+        _step(0, QueryStepType.DATA_VALIDATION, VALIDATION_SQL, validation_query="SELECT 1"),
+        _step(1, QueryStepType.RESULT_FORMATTING, FORMATTING_SQL),
+    ])
+    executed_sql = []
+    
+    async def failing_validation(validation_query, session=None):
+        return False
+    
+    async def fake_fetch_rows(sql, params=None, session=None):
+        executed_sql.append(sql)
+        return [{"validation_count": 3, "product_id": 1, "product_name": "Red Onion"}]
+    
+    monkeypatch.setattr(processor, "_run_validation_query", failing_validation)
+    monkeypatch.setattr(processor, "_fetch_rows", fake_fetch_rows)
+    
+    result = asyncio.run(processor.execute_plan(_plan(steps)))
+    
+    assert result.error_recovery_applied
+    assert result.step_results[0].result["recovery_applied"] == "Broaden search criteria"
+    assert result.final_result == [{"product_id": 1, "product_name": "Red Onion"}]
+    assert executed_sql and "ILIKE '%onion%'" in executed_sql[0]
+
+
+def test_failed_merged_step_stops_the_plan(processor, monkeypatch):
+    """An unrecoverable merged validation step is a critical failure, like its unmerged form."""
+    steps = processor._merge_sequential_sql_steps([
+        _step(0, QueryStepType.DATA_VALIDATION, VALIDATION_SQL, validation_query="SELECT 1"),
+        _step(1, QueryStepType.RESULT_FORMATTING, FORMATTING_SQL),
+    ])
+    steps.append(_step(1, QueryStepType.AGGREGATION, "-- Aggregation"))
+    steps[1].dependencies = ()
+    
+    async def failing_validation(validation_query, session=None):
+        return False
+    
+    async def fake_fetch_rows(sql, params=None, session=None):
+        return [{"validation_count": 0, "product_id": None, "product_name": None}]
+    
+    monkeypatch.setattr(processor, "_run_validation_query", failing_validation)
+    monkeypatch.setattr(processor, "_fetch_rows", fake_fetch_rows)
+    
+    result = asyncio.run(processor.execute_plan(_plan(steps)))
+    
+    assert not result.error_recovery_applied
+    assert result.steps_executed == 1
+    assert result.steps_failed == 1
@@ -0,0 +1,134 @@
+"""
+Behavioural tests for the multi-step processor's query result cache.
+Covers how _fetch_rows and _fetch_scalar reuse, isolate and expire cached results.
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app.services.multi_step_query as multi_step_query
+from app.services.multi_step_query import MultiStepQueryProcessor
+
+
+SQL = "SELECT p.id AS product_id, p.name AS product_name FROM products p"
+
+
+class FakeResult:
+    """Answers both the streamed-rows and the scalar access patterns."""
+    
+    def __init__(self, rows):
+        self.rows = rows
+    
+    async def _iterate(self):
+        for row in self.rows:
+            yield row
+    
+    def mappings(self):
+        return self._iterate()
+    
+    def scalar(self):
+        return self.rows[0]["product_id"] if self.rows else None
+
+
+class FakeSession:
+    """Counts round trips and returns fresh copies of a fixed row set."""
+    
+    def __init__(self, rows):
+        self.rows = rows
+        self.statements = []
+    
+    async def stream(self, statement, params=None):
+        self.statements.append(("stream", params))
+        return FakeResult([dict(row) for row in self.rows])
+    
+    async def execute(self, statement, params=None):
+        self.statements.append(("execute", params))
+        return FakeResult([dict(row) for row in self.rows])
+
+
+@pytest.fixture
+def processor(monkeypatch):
+    """Processor without a semantic indexer or planner behind it."""
+    monkeypatch.setattr(multi_step_query, "get_semantic_indexer", lambda: None)
+    monkeypatch.setattr(multi_step_query, "QueryPlanner", lambda: None)
+    return MultiStepQueryProcessor()
+
+
+@pytest.fixture
+def session():
+    return FakeSession([{"product_id": 1, "product_name": "Red Onion"}])
+
+
+def test_repeated_rows_are_served_from_the_cache(processor, session):
+    """The same SQL and parameters hit the database once; other parameters miss."""
+    first = asyncio.run(processor._fetch_rows(SQL, {"row_limit": 10}, session=session))
+    second = asyncio.run(processor._fetch_rows(SQL, {"row_limit": 10}, session=session))
+    asyncio.run(processor._fetch_rows(SQL, {"row_limit": 20}, session=session))
+    
+    assert first == second == [{"product_id": 1, "product_name": "Red Onion"}]
+    assert session.statements == [("stream", {"row_limit": 10}), ("stream", {"row_limit": 20})]
+
+
+def test_cached_rows_are_handed_out_as_copies(processor, session):
+    """Mutating returned rows does not change what the next caller sees."""
+    rows = asyncio.run(processor._fetch_rows(SQL, session=session))
+    rows[0]["product_name"] = "changed"
+    rows.append({"product_id": 2})
+    
+    assert asyncio.run(processor._fetch_rows(SQL, session=session)) == [
+        {"product_id": 1, "product_name": "Red Onion"}
+    ]
+    assert len(session.statements) == 1
+
+
+def test_rows_and_scalar_for_the_same_sql_are_cached_apart(processor, session):
+    """A scalar lookup never receives a cached row list, and vice versa."""
+    rows = asyncio.run(processor._fetch_rows(SQL, session=session))
+    value = asyncio.run(processor._fetch_scalar(SQL, session=session))
+    
+    assert rows == [{"product_id": 1, "product_name": "Red Onion"}]
+    assert value == 1
+    assert [kind for kind, _ in session.statements] == ["stream", "execute"]
+    
+    assert asyncio.run(processor._fetch_scalar(SQL, session=session)) == 1
+    assert asyncio.run(processor._fetch_rows(SQL, session=session)) == rows
+    assert len(session.statements) == 2
+
+
+def test_cached_none_scalar_is_a_hit(processor):
+    """A NULL scalar is cached too, rather than re-queried on every call."""
+    empty_session = FakeSession([])
+    
+    assert asyncio.run(processor._fetch_scalar(SQL, session=empty_session)) is None
+    assert asyncio.run(processor._fetch_scalar(SQL, session=empty_session)) is None
+    assert len(empty_session.statements) == 1
+
+
+def test_expired_results_are_fetched_again(processor, session, monkeypatch):
+    """Entries past their TTL are dropped and re-read from the database."""
+    monkeypatch.setattr(multi_step_query, "RESULT_CACHE_TTL_SECONDS", -1)
+    
+    asyncio.run(processor._fetch_rows(SQL, session=session))
+    asyncio.run(processor._fetch_rows(SQL, session=session))
+    
+    assert len(session.statements) == 2
+
+
+def test_result_cache_evicts_least_recently_used(processor, session, monkeypatch):
+    """A full cache drops the entry that was read longest ago, not the oldest insert."""
+    monkeypatch.setattr(multi_step_query, "RESULT_CACHE_MAXSIZE", 2)
+    
+    for sql in ("SELECT 1", "SELECT 2"):
+        asyncio.run(processor._fetch_rows(sql, session=session))
+    asyncio.run(processor._fetch_rows("SELECT 1", session=session))
+    asyncio.run(processor._fetch_rows("SELECT 3", session=session))
+    
+    assert processor._result_cache_key("rows", "SELECT 1") in processor._result_cache
+    assert processor._result_cache_key("rows", "SELECT 2") not in processor._result_cache
+    assert len(session.statements) == 3
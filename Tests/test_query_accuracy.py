@@ -144,7 +144,7 @@ class QueryAccuracyTestSuite:
         print("-" * 40)
         
         try:
-            regression_reports = await self.validator.run_regression_tests(db)
+            regression_reports = await self.validator.run_regression_tests_list(db)
             
             print(f"Executed {len(regression_reports)} regression test cases")
             
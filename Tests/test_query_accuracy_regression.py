@@ -0,0 +1,240 @@
+"""
+Behavioural tests for query accuracy regression runs.
+Covers the per-group report cache, per-case error isolation, and the ordering
+and cancellation of run_regression_tests.
+"""
+
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime
+
+import pytest
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app.services.query_accuracy_validator as query_accuracy_validator
+from app.schemas.query import QueryResult
+from app.services.query_accuracy_validator import (
+    QueryAccuracyValidator,
+    ValidationResult,
+    ValidationTestCase
+)
+
+
+@pytest.fixture
+def validator():
+    """Fresh validator whose active platforms are already loaded."""
+    validator = QueryAccuracyValidator()
+    validator._platform_cache = (time.monotonic(), frozenset({"blinkit"}))
+    return validator
+
+
+def _test_case(test_id, query, query_type="cheapest_product"):
+    return ValidationTestCase(
+        test_id=test_id,
+        query=query,
+        query_type=query_type,
+        expected_result_count_min=1,
+        expected_result_count_max=10,
+        expected_patterns=(),
+        validation_rules=()
+    )
+
+
+def _result(product_id, price, platform="Blinkit"):
+    return QueryResult(
+        product_id=product_id,
+        product_name=f"Red Onion {product_id}",
+        platform_name=platform,
+        current_price=price,
+        is_available=True,
+        last_updated=datetime.utcnow()
+    )
+
+
+class BulkHandler:
+    """Records each bulk call and answers every query from a fixed mapping."""
+    
+    def __init__(self, results_by_query):
+        self.results_by_query = results_by_query
+        self.calls = []
+    
+    async def __call__(self, db, queries):
+        self.calls.append(list(queries))
+        return [self.results_by_query[query] for query in queries]
+
+
+def test_passing_reports_are_served_from_the_report_cache(validator):
+    """A second run of the same queries needs no database round trip."""
+    handler = BulkHandler({
+        "cheapest onions": [_result(1, 40.0), _result(2, 45.0)],
+        "cheapest tomatoes": [_result(3, 30.0)],
+    })
+    test_cases = [_test_case("t1", "cheapest onions"), _test_case("t2", "cheapest tomatoes")]
+    
+    first = asyncio.run(validator._run_regression_group(test_cases, handler, None))
+    second = asyncio.run(validator._run_regression_group(test_cases, handler, None))
+    
+    assert handler.calls == [["cheapest onions", "cheapest tomatoes"]]
+    assert [report.overall_status for report in first] == [ValidationResult.PASS, ValidationResult.PASS]
+    for cached, original in zip(second, first):
+        assert cached.test_case_id == original.test_case_id
+        assert cached.validation_results == original.validation_results
+        assert cached.timestamp >= original.timestamp
+
+
+def test_report_cache_key_ignores_case_and_surrounding_whitespace(validator):
+    """Spelling the same query differently still hits the cached report."""
+    handler = BulkHandler({"cheapest onions": [_result(1, 40.0)]})
+    
+    asyncio.run(validator._run_regression_group([_test_case("t1", "cheapest onions")], handler, None))
+    reports = asyncio.run(validator._run_regression_group([_test_case("t1", "  Cheapest Onions ")], handler, None))
+    
+    assert len(handler.calls) == 1
+    assert reports[0].overall_status == ValidationResult.PASS
+
+
+def test_failed_reports_are_never_cached(validator):
+    """Only the failing test case is re-run; the passing one comes from the cache."""
+    handler = BulkHandler({
+        "cheapest onions": [_result(1, 40.0)],
+        "cheapest zepto onions": [_result(2, 45.0, platform="Zepto")],
+    })
+    test_cases = [_test_case("t1", "cheapest onions"), _test_case("t2", "cheapest zepto onions")]
+    
+    first = asyncio.run(validator._run_regression_group(test_cases, handler, None))
+    second = asyncio.run(validator._run_regression_group(test_cases, handler, None))
+    
+    assert [report.overall_status for report in first] == [ValidationResult.PASS, ValidationResult.FAIL]
+    assert [report.overall_status for report in second] == [ValidationResult.PASS, ValidationResult.FAIL]
+    assert handler.calls == [["cheapest onions", "cheapest zepto onions"], ["cheapest zepto onions"]]
+
+
+def test_bulk_execution_errors_fail_every_pending_case_uncached(validator):
+    """A failed round trip fails the whole group and is retried on the next run."""
+    class FailingHandler:
+        calls = 0
+        
+        async def __call__(self, db, queries):
+            self.calls += 1
+            raise RuntimeError("database unavailable")
+    
+    handler = FailingHandler()
+    test_cases = [_test_case("t1", "cheapest onions"), _test_case("t2", "cheapest tomatoes")]
+    
+    for _ in range(2):
+        reports = asyncio.run(validator._run_regression_group(test_cases, handler, None))
+        assert [report.overall_status for report in reports] == [ValidationResult.FAIL, ValidationResult.FAIL]
+        assert reports[0].issues_found == ["Test execution failed: database unavailable"]
+    
+    assert handler.calls == 2
+
+
+def test_validation_error_fails_only_its_own_test_case(validator, monkeypatch):
+    """One test case whose validation raises gets a FAIL report; the rest of the group still runs."""
+    handler = BulkHandler({
+        "cheapest onions": [_result(1, 40.0)],
+        "broken query": [_result(2, 45.0)],
+        "cheapest tomatoes": [_result(3, 30.0)],
+    })
+    validate_results = validator._validate_results
+    
+    async def flaky_validate_results(query, *args, **kwargs):
+        if query == "broken query":
+            raise ValueError("bad result row")
+        return await validate_results(query, *args, **kwargs)
+    
+    monkeypatch.setattr(validator, "_validate_results", flaky_validate_results)
+    test_cases = [
+        _test_case("t1", "cheapest onions"),
+        _test_case("t2", "broken query"),
+        _test_case("t3", "cheapest tomatoes"),
+    ]
+    
+    reports = asyncio.run(validator._run_regression_group(test_cases, handler, None))
+    
+    assert [report.overall_status for report in reports] == [
+        ValidationResult.PASS, ValidationResult.FAIL, ValidationResult.PASS
+    ]
+    assert reports[1].test_case_id == "t2"
+    assert reports[1].issues_found == ["Test execution failed: bad result row"]
+    assert ("cheapest_product", "broken query") not in validator._report_cache
+
+class FakeHandlers:
+    """Bulk handlers whose per-type behaviour is supplied by the test."""
+    
+    def __init__(self, **handlers):
+        self.handle_cheapest_product_queries_bulk = handlers.get('cheapest_product')
+        self.handle_discount_queries_bulk = handlers.get('discount_search')
+        self.handle_price_comparison_queries_bulk = handlers.get('price_comparison')
+        self.handle_budget_optimization_queries_bulk = handlers.get('budget_optimization')
+
+
+def test_regression_reports_are_yielded_in_declaration_order(validator, monkeypatch):
+    """A slow query type does not let a faster one jump ahead of it."""
+    finished = []
+    
+    async def slow_cheapest(db, queries):
+        await asyncio.sleep(0.01)
+        finished.append('cheapest_product')
+        return [[_result(1, 40.0)] for _ in queries]
+    
+    async def fast_discount(db, queries):
+        finished.append('discount_search')
+        return [[_result(2, 45.0)] for _ in queries]
+    
+    monkeypatch.setattr(
+        query_accuracy_validator, "get_sample_query_handlers",
+        lambda: FakeHandlers(cheapest_product=slow_cheapest, discount_search=fast_discount)
+    )
+    validator.test_cases = [
+        _test_case("t1", "cheapest onions"),
+        _test_case("t2", "onion discounts", query_type="discount_search"),
+        _test_case("t3", "unsupported", query_type="unknown"),
+        _test_case("t4", "cheapest tomatoes"),
+    ]
+    
+    reports = asyncio.run(validator.run_regression_tests_list(None))
+    
+    assert finished == ['discount_search', 'cheapest_product']
+    assert [report.query for report in reports] == ["cheapest onions", "onion discounts", "cheapest tomatoes"]
+
+
+def test_closing_regression_run_early_cancels_pending_groups(validator, monkeypatch):
+    """Groups still running when the caller stops iterating are cancelled, not leaked."""
+    cancelled = []
+    
+    async def cheapest(db, queries):
+        return [[_result(1, 40.0)] for _ in queries]
+    
+    async def blocked_discount(db, queries):
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            cancelled.append(list(queries))
+            raise
+    
+    monkeypatch.setattr(
+        query_accuracy_validator, "get_sample_query_handlers",
+        lambda: FakeHandlers(cheapest_product=cheapest, discount_search=blocked_discount)
+    )
+    validator.test_cases = [
+        _test_case("t1", "cheapest onions"),
+        _test_case("t2", "onion discounts", query_type="discount_search"),
+    ]
+    
+    async def first_report_only():
+        reports = validator.run_regression_tests(None)
+        first = await reports.__anext__()
+        await reports.aclose()
+        # Let the cancelled group task observe its cancellation before asyncio.run tears the loop down
+        await asyncio.sleep(0)
+        return first, list(cancelled)
+    
+    first, cancelled_before_shutdown = asyncio.run(first_report_only())
+    
+    assert first.query == "cheapest onions"
+    assert cancelled_before_shutdown == [["onion discounts"]]
@@ -0,0 +1,158 @@
+"""
+Behavioural tests for query accuracy rule scheduling.
+Covers capability-based rule skipping and the per-rule result cache.
+"""
+
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.schemas.query import QueryResult
+from app.services.query_accuracy_validator import (
+    NormalizedResults,
+    QueryAccuracyValidator,
+    ValidationResult
+)
+
+
+QUERY = "Which app has cheapest onions right now?"
+
+
+@pytest.fixture
+def validator():
+    """Fresh validator so rule and report caches start empty."""
+    return QueryAccuracyValidator()
+
+
+def _result(product_id, price, platform="Blinkit", original_price=None, discount=None, age_hours=1):
+    return QueryResult(
+        product_id=product_id,
+        product_name=f"Red Onion {product_id}",
+        platform_name=platform,
+        current_price=price,
+        original_price=original_price,
+        discount_percentage=discount,
+        is_available=True,
+        last_updated=datetime.utcnow() - timedelta(hours=age_hours)
+    )
+
+
+def _count_calls(validator, rule_id):
+    """Wrap a rule's validation function and record each call."""
+    calls = []
+    original = validator._validator_fns[rule_id]
+    
+    async def counting(*args):
+        calls.append(args)
+        return await original(*args)
+    
+    validator._validator_fns[rule_id] = counting
+    return calls
+
+
+def _run_rule(validator, rule_id, results, db_context):
+    rule = validator.validation_rules[rule_id]
+    signature = validator._results_signature(QUERY, "cheapest_product", results)
+    return asyncio.run(validator._run_single_rule(
+        rule, QUERY, results, "cheapest_product", db_context,
+        NormalizedResults.from_results(results), signature
+    ))
+
+
+def test_empty_results_skip_every_rule_without_running_it(validator):
+    """No rule function or database lookup runs when there is nothing to validate."""
+    async def unexpected(*args):
+        raise AssertionError("rule should have been skipped")
+    
+    for rule_id in validator._validator_fns:
+        validator._validator_fns[rule_id] = unexpected
+    
+    report = asyncio.run(validator._validate_results(QUERY, [], "cheapest_product", 0.1, db=None))
+    
+    assert report.validation_results
+    for rule_output in report.validation_results:
+        assert rule_output.status == ValidationResult.SKIP
+        if rule_output.rule_id == "result_ordering":
+            assert rule_output.message == "Not enough results to validate ordering"
+        else:
+            assert rule_output.message == "No results to validate"
+
+
+def test_single_result_skips_only_ordering(validator):
+    """One row is enough for most rules, but not for an ordering check."""
+    db_context = {"active_platforms": frozenset({"blinkit"}), "now": datetime.utcnow()}
+    ordering_calls = _count_calls(validator, "result_ordering")
+    
+    report = asyncio.run(validator._validate_results(
+        QUERY, [_result(1, 40.0)], "cheapest_product", 0.1, db_context=db_context
+    ))
+    
+    outputs = {rule_output.rule_id: rule_output for rule_output in report.validation_results}
+    assert outputs["result_ordering"].status == ValidationResult.SKIP
+    assert outputs["result_ordering"].message == "Not enough results to validate ordering"
+    assert ordering_calls == []
+    assert outputs["price_consistency"].status == ValidationResult.PASS
+
+
+def test_discount_rule_needs_discount_pairs(validator):
+    """Discount accuracy is skipped when no row carries both a discount and an original price."""
+    rule = validator.validation_rules["discount_accuracy"]
+    without_pairs = NormalizedResults.from_results([_result(1, 40.0, discount=10.0)])
+    with_pairs = NormalizedResults.from_results([_result(1, 36.0, original_price=40.0, discount=10.0)])
+    
+    skipped = validator._capability_skip(rule, without_pairs.caps)
+    
+    assert skipped.status == ValidationResult.SKIP
+    assert skipped.message == "No discounted products with original prices to validate"
+    assert validator._capability_skip(rule, with_pairs.caps) is None
+
+
+def test_rule_results_are_cached_per_result_set(validator):
+    """Identical results reuse the rule output; changed results run the rule again."""
+    db_context = {"active_platforms": frozenset({"blinkit"}), "now": datetime.utcnow()}
+    calls = _count_calls(validator, "price_consistency")
+    results = [_result(1, 40.0), _result(2, 45.0)]
+    
+    first = _run_rule(validator, "price_consistency", results, db_context)
+    second = _run_rule(validator, "price_consistency", list(results), db_context)
+    assert len(calls) == 1
+    assert second == first
+    
+    _run_rule(validator, "price_consistency", [_result(1, 40.0), _result(2, 50.0)], db_context)
+    assert len(calls) == 2
+
+
+def test_platform_rule_cache_tracks_active_platforms(validator):
+    """A platform toggled off invalidates the cached availability verdict."""
+    calls = _count_calls(validator, "platform_availability")
+    results = [_result(1, 40.0, platform="Blinkit"), _result(2, 45.0, platform="Zepto")]
+    both_active = {"active_platforms": frozenset({"blinkit", "zepto"}), "now": datetime.utcnow()}
+    zepto_inactive = {"active_platforms": frozenset({"blinkit"}), "now": datetime.utcnow()}
+    
+    assert _run_rule(validator, "platform_availability", results, both_active).status == ValidationResult.PASS
+    assert _run_rule(validator, "platform_availability", results, both_active).status == ValidationResult.PASS
+    assert len(calls) == 1
+    
+    assert _run_rule(validator, "platform_availability", results, zepto_inactive).status == ValidationResult.FAIL
+    assert len(calls) == 2
+
+
+def test_freshness_rule_is_never_cached(validator):
+    """Freshness depends on the current time, so it is evaluated on every run."""
+    calls = _count_calls(validator, "data_freshness")
+    results = [_result(1, 40.0, age_hours=20)]
+    now = datetime.utcnow()
+    
+    fresh = _run_rule(validator, "data_freshness", results, {"active_platforms": None, "now": now})
+    stale = _run_rule(
+        validator, "data_freshness", results, {"active_platforms": None, "now": now + timedelta(hours=10)}
+    )
+    
+    assert len(calls) == 2
+    assert fresh.status != stale.status
@@ -0,0 +1,274 @@
+"""
+Behavioural tests for query planner join ordering.
+Compares the subset DP and heap-frontier join orders with the original greedy walk,
+and covers the opt-in approximate COUNT(*) rewrite.
+"""
+
+import os
+import sys
+from itertools import permutations
+from types import SimpleNamespace
+from typing import Dict, List
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.pool import StaticPool
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app.services.query_planner as query_planner
+from app.services.query_planner import (
+    APPROXIMATE_COUNT_MIN_ROWS,
+    JoinPath,
+    JoinType,
+    QueryComplexity,
+    QueryExecutionPlan,
+    QueryPlanner
+)
+
+
+SCHEMA = (
+    "CREATE TABLE platforms (id INTEGER PRIMARY KEY, name TEXT)",
+    "CREATE TABLE product_categories (id INTEGER PRIMARY KEY, name TEXT)",
+    "CREATE TABLE products (id INTEGER PRIMARY KEY, name TEXT, "
+    "category_id INTEGER REFERENCES product_categories(id))",
+    "CREATE TABLE current_prices (id INTEGER PRIMARY KEY, price REAL, "
+    "product_id INTEGER REFERENCES products(id), platform_id INTEGER REFERENCES platforms(id))",
+    "CREATE TABLE audit_log (id INTEGER PRIMARY KEY, note TEXT)",
+)
+
+TABLE_ROWS = {
+    'platforms': 5,
+    'product_categories': 30,
+    'products': 200,
+    'current_prices': 800,
+    'audit_log': 10,
+}
+
+
+@pytest.fixture
+def planner(monkeypatch):
+    """Planner over a small in-memory schema with known row counts."""
+    engine = create_engine(
+        "sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False}
+    )
+    with engine.begin() as conn:
+        for statement in SCHEMA:
+            conn.execute(text(statement))
+        for table_name, rows in TABLE_ROWS.items():
+            conn.execute(text(
+                f"WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < {rows}) "
+                f"INSERT INTO {table_name} (id) SELECT n FROM seq"
+            ))
+    
+    monkeypatch.setattr(query_planner, "engine", engine)
+    monkeypatch.setattr(query_planner, "get_semantic_indexer", lambda: None)
+    return QueryPlanner()
+
+
+def _greedy_join_order(table_sizes: Dict[str, int], tables: List[str], join_paths: List[JoinPath]) -> List[str]:
+    """The planner's original quadratic greedy walk, kept as the reference order."""
+    if len(tables) <= 2:
+        return tables
+    
+    sized_tables = sorted(((table, table_sizes.get(table, 1000)) for table in tables), key=lambda x: x[1])
+    ordered_tables = [sized_tables[0][0]]
+    remaining_tables = set(tables) - {ordered_tables[0]}
+    
+    while remaining_tables:
+        best_table = None
+        best_cost = float('inf')
+        for table in remaining_tables:
+            min_cost = float('inf')
+            for ordered_table in ordered_tables:
+                for join_path in join_paths:
+                    if ((join_path.from_table == table and join_path.to_table == ordered_table) or
+                            (join_path.from_table == ordered_table and join_path.to_table == table)):
+                        min_cost = min(min_cost, join_path.cost_estimate)
+            if min_cost < best_cost:
+                best_cost = min_cost
+                best_table = table
+        
+        if best_table:
+            ordered_tables.append(best_table)
+            remaining_tables.remove(best_table)
+        else:
+            ordered_tables.extend(sorted(remaining_tables, key=lambda t: table_sizes.get(t, 1000)))
+            break
+    
+    return ordered_tables
+
+
+def _join(from_table: str, to_table: str, cost: float) -> JoinPath:
+    return JoinPath(
+        from_table=from_table,
+        to_table=to_table,
+        join_type=JoinType.INNER,
+        condition=f"{from_table}.id = {to_table}.id",
+        cost_estimate=cost,
+        confidence=0.9,
+        from_column='id',
+        to_column='id'
+    )
+
+
+def _left_deep_cost(planner: QueryPlanner, order: List[str]) -> float:
+    """Sum of intermediate result sizes for joining tables in the given order."""
+    sizes = planner.table_sizes
+    foreign_keys = [
+        (table_name, fk['referred_table'])
+        for table_name, metadata in planner.schema_metadata.items()
+        for fk in metadata['foreign_keys']
+    ]
+    
+    total = 0.0
+    for length in range(2, len(order) + 1):
+        prefix = set(order[:length])
+        cardinality = 1.0
+        for table in prefix:
+            cardinality *= sizes[table]
+        for src, dst in foreign_keys:
+            if src in prefix and dst in prefix:
+                cardinality /= sizes[dst]
+        total += cardinality
+    return total
+
+
+def test_table_sizes_come_from_row_counts(planner):
+    """Sizes used for ordering are the actual row counts."""
+    assert {table: planner.table_sizes[table] for table in TABLE_ROWS} == TABLE_ROWS
+
+
+def test_join_graph_costs_use_estimated_sizes(planner):
+    """Edge costs on the graph and in the spanning-tree arrays come from the real row counts."""
+    for src, dst, fk, cost in zip(planner._edge_src, planner._edge_dst, planner._edge_fk, planner._edge_cost):
+        table_name, referenced_table = planner._table_names[src], planner._table_names[dst]
+        expected = planner._compute_join_cost(table_name, referenced_table, fk)
+        assert cost == pytest.approx(expected)
+        assert planner.join_graph[table_name][referenced_table]['join_cost'] == pytest.approx(expected)
+    
+    assert list(planner._edge_order) == sorted(
+        range(len(planner._edge_cost)), key=lambda edge: planner._edge_cost[edge]
+    )
+
+def test_dp_join_order_is_cheapest_left_deep_order(planner):
+    """The subset DP finds the cheapest order, never worse than the greedy walk."""
+    tables = ['current_prices', 'products', 'platforms', 'product_categories']
+    
+    dp_order = planner._optimize_join_order(tables, planner._find_optimal_join_paths(tables))
+    assert sorted(dp_order) == sorted(tables)
+    
+    best_cost = min(_left_deep_cost(planner, list(order)) for order in permutations(tables))
+    assert _left_deep_cost(planner, dp_order) == pytest.approx(best_cost)
+    
+    greedy_order = _greedy_join_order(planner.table_sizes, tables, planner._find_optimal_join_paths(tables))
+    assert _left_deep_cost(planner, dp_order) <= _left_deep_cost(planner, greedy_order)
+
+
+def test_heap_join_order_matches_greedy_walk(planner, monkeypatch):
+    """Above the DP limit the heap frontier reproduces the original greedy order."""
+    monkeypatch.setattr(query_planner, "DP_JOIN_ORDER_MAX_TABLES", 2)
+    tables = ['current_prices', 'products', 'platforms', 'product_categories']
+    join_paths = [
+        _join('current_prices', 'products', 4.0),
+        _join('current_prices', 'platforms', 1.5),
+        _join('products', 'product_categories', 0.5),
+        _join('products', 'platforms', 3.0),
+    ]
+    
+    heap_order = planner._optimize_join_order(tables, join_paths)
+    
+    assert heap_order == _greedy_join_order(planner.table_sizes, tables, join_paths)
+    assert heap_order == ['platforms', 'current_prices', 'products', 'product_categories']
+
+
+def test_heap_join_order_appends_disconnected_tables_by_size(planner, monkeypatch):
+    """Tables with no join into the ordered set are appended smallest first, as before."""
+    monkeypatch.setattr(query_planner, "DP_JOIN_ORDER_MAX_TABLES", 2)
+    tables = ['products', 'current_prices', 'audit_log', 'product_categories']
+    join_paths = [_join('current_prices', 'products', 2.0)]
+    
+    heap_order = planner._optimize_join_order(tables, join_paths)
+    
+    assert heap_order == _greedy_join_order(planner.table_sizes, tables, join_paths)
+    assert heap_order == ['audit_log', 'product_categories', 'products', 'current_prices']
+
+
+def _single_table_plan(table: str) -> QueryExecutionPlan:
+    return QueryExecutionPlan(
+        tables=[table],
+        join_order=[table],
+        join_paths=[],
+        estimated_cost=1.0,
+        complexity=QueryComplexity.SIMPLE,
+        optimization_suggestions=[],
+        index_recommendations=[],
+        execution_time_estimate=0.1
+    )
+
+
+@pytest.fixture
+def postgres_planner(planner):
+    """Planner that believes it is on PostgreSQL, with approximate counts enabled and a huge products table."""
+    planner.engine = SimpleNamespace(dialect=postgresql.dialect())
+    planner.use_approximate_count = True
+    planner.table_sizes['products'] = APPROXIMATE_COUNT_MIN_ROWS
+    return planner
+
+
+def test_approximate_count_rewrites_bare_count(postgres_planner):
+    """A whole-table COUNT(*) on a large table reads the planner statistics instead."""
+    rewritten = postgres_planner._approximate_count_query(
+        'SELECT COUNT(*) AS "total" FROM products;', _single_table_plan('products')
+    )
+    
+    assert rewritten == "SELECT reltuples::bigint AS total FROM pg_class WHERE oid = 'products'::regclass"
+
+
+def test_approximate_count_defaults_alias_to_count(postgres_planner):
+    rewritten = postgres_planner._approximate_count_query(
+        "select count( * ) from products", _single_table_plan('products')
+    )
+    
+    assert rewritten == "SELECT reltuples::bigint AS count FROM pg_class WHERE oid = 'products'::regclass"
+
+
+@pytest.mark.parametrize("sql_query", [
+    "SELECT COUNT(*) FROM products WHERE name ILIKE '%onion%'",
+    "SELECT COUNT(id) FROM products",
+    "SELECT COUNT(*) FROM products p JOIN current_prices cp ON p.id = cp.product_id",
+    "SELECT name FROM products",
+])
+def test_approximate_count_leaves_other_queries_alone(postgres_planner, sql_query):
+    """Filtered, column, joined and non-count queries still need an exact answer."""
+    assert postgres_planner._approximate_count_query(sql_query, _single_table_plan('products')) is None
+
+
+def test_approximate_count_needs_single_matching_table(postgres_planner):
+    plan = _single_table_plan('products')
+    plan.tables.append('current_prices')
+    
+    assert postgres_planner._approximate_count_query("SELECT COUNT(*) FROM products", plan) is None
+    assert postgres_planner._approximate_count_query(
+        "SELECT COUNT(*) FROM products", _single_table_plan('platforms')
+    ) is None
+
+
+def test_approximate_count_respects_size_threshold_opt_in_and_dialect(postgres_planner):
+    """Small tables, the default setting and other databases all keep the exact count."""
+    sql_query = "SELECT COUNT(*) FROM products"
+    plan = _single_table_plan('products')
+    assert postgres_planner._approximate_count_query(sql_query, plan) is not None
+    
+    postgres_planner.table_sizes['products'] = APPROXIMATE_COUNT_MIN_ROWS - 1
+    assert postgres_planner._approximate_count_query(sql_query, plan) is None
+    
+    postgres_planner.table_sizes['products'] = APPROXIMATE_COUNT_MIN_ROWS
+    postgres_planner.use_approximate_count = False
+    assert postgres_planner._approximate_count_query(sql_query, plan) is None
+    
+    postgres_planner.use_approximate_count = True
+    postgres_planner.engine = SimpleNamespace(dialect=SimpleNamespace(name='sqlite'))
+    assert postgres_planner._approximate_count_query(sql_query, plan) is None
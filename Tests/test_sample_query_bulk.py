@@ -0,0 +1,109 @@
+"""
+Behavioural tests for bulk sample query execution.
+Checks that one UNION ALL round trip is split back into per-query result sets.
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+from sqlalchemy import Column, Float, Integer, MetaData, String, Table, create_engine, select
+from sqlalchemy.orm import Session
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.sample_query_handlers import PreparedSampleQuery, SampleQueryHandlers
+
+
+metadata = MetaData()
+items = Table(
+    "items", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("name", String),
+    Column("price", Float)
+)
+
+ITEMS = [
+    (1, "Red Onion", 40.0),
+    (2, "White Onion", 35.0),
+    (3, "Spring Onion", 55.0),
+    (4, "Tomato", 30.0),
+    (5, "Cherry Tomato", 90.0),
+    (6, "Potato", 25.0),
+]
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(items.insert(), [{"id": i, "name": n, "price": p} for i, n, p in ITEMS])
+    with Session(engine) as session:
+        yield session
+
+
+def _prepared(term, order_by, limit):
+    """Prepared query returning (name, price) pairs for items matching a term."""
+    return PreparedSampleQuery(
+        statement=select(items.c.name, items.c.price).where(items.c.name.like(f"%{term}%")),
+        order_by=order_by,
+        limit=limit,
+        finish=lambda rows: [(row.name, row.price) for row in rows]
+    )
+
+
+def test_execute_bulk_splits_rows_per_query(db):
+    """Each query gets only its own rows, in its own order, up to its own limit."""
+    handlers = SampleQueryHandlers()
+    prepared_queries = [
+        _prepared("Onion", (items.c.price.asc(),), 2),
+        _prepared("Tomato", (items.c.price.desc(),), 5),
+        _prepared("Potato", (items.c.price.asc(),), 1),
+    ]
+    
+    result_sets = handlers._execute_bulk(db, prepared_queries)
+    
+    assert result_sets == [
+        [("White Onion", 35.0), ("Red Onion", 40.0)],
+        [("Cherry Tomato", 90.0), ("Tomato", 30.0)],
+        [("Potato", 25.0)],
+    ]
+
+
+def test_execute_bulk_keeps_positions_for_unprepared_and_empty_queries(db):
+    """Queries that could not be prepared or matched nothing still get an empty slot."""
+    handlers = SampleQueryHandlers()
+    prepared_queries = [
+        None,
+        _prepared("Mango", (items.c.price.asc(),), 3),
+        _prepared("Tomato", (items.c.price.asc(),), 1),
+    ]
+    
+    result_sets = handlers._execute_bulk(db, prepared_queries)
+    
+    assert result_sets == [[], [], [("Tomato", 30.0)]]
+
+
+def test_execute_bulk_without_prepared_queries_skips_the_database():
+    """Nothing is executed when no query could be prepared."""
+    class NoDatabase:
+        def execute(self, *args, **kwargs):
+            raise AssertionError("no statement expected")
+    
+    assert SampleQueryHandlers()._execute_bulk(NoDatabase(), [None, None]) == [[], []]
+
+
+def test_handle_bulk_reraises_database_errors():
+    """A failed round trip surfaces as an error, not as empty results."""
+    class FailingDatabase:
+        def execute(self, *args, **kwargs):
+            raise RuntimeError("database unavailable")
+    
+    handlers = SampleQueryHandlers()
+    prepare = lambda query: _prepared(query, (items.c.price.asc(),), 1)
+    
+    with pytest.raises(RuntimeError, match="database unavailable"):
+        asyncio.run(handlers._handle_bulk(FailingDatabase(), ["Onion", "Tomato"], prepare, "test"))
@@ -5,7 +5,7 @@ import os
 import json
 import hashlib
 import logging
-from typing import Optional, Dict, Any, Union
+from typing import Optional, Dict, Any, List, Union
 from datetime import datetime, timedelta
 from abc import ABC, abstractmethod
 from enum import Enum
@@ -284,6 +284,38 @@ class CacheManager:
             logger.error(f"Schema cache set error: {e}")
             return False
     
+    async def get_execution_plan(self, plan_hash: str) -> Optional[Dict[str, Any]]:
+        """Get cached query execution plan"""
+        if not self.enabled or not self.backend:
+            return None
+        
+        cache_key = f"execution_plan:{plan_hash}"
+        
+        try:
+            cached_value = await self.backend.get(cache_key)
+            if cached_value:
+                return json.loads(cached_value)
+        except Exception as e:
+            logger.error(f"Execution plan cache get error: {e}")
+        
+        return None
+    
+    async def cache_execution_plan(self, plan_hash: str, plan_data: Dict[str, Any],
+                                   tables_used: Optional[List[str]] = None, ttl: int = 3600) -> bool:
+        """Cache query execution plan"""
+        if not self.enabled or not self.backend:
+            return False
+        
+        cache_key = f"execution_plan:{plan_hash}"
+        
+        try:
+            # Keep the tables alongside the plan so cached entries can be inspected per table
+            cached_value = json.dumps({**plan_data, "tables_used": tables_used or []}, default=str)
+            return await self.backend.set(cache_key, cached_value, ttl)
+        except Exception as e:
+            logger.error(f"Execution plan cache set error: {e}")
+            return False
+    
     async def clear_cache(self, pattern: Optional[str] = None) -> bool:
         """Clear cache (simplified implementation)"""
         if not self.enabled or not self.backend:
@@ -10,7 +10,7 @@ from typing import Dict, Any, Optional, List, Generator
 from dataclasses import dataclass, field
 from collections import defaultdict, deque
 
-from sqlalchemy import create_engine, event, text
+from sqlalchemy import create_engine, event, text, make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import QueuePool, Pool
@@ -445,6 +445,69 @@ engine = MonitoredEngine(base_engine, db_monitor)
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=base_engine)
 
+
+def _to_async_url(url: str) -> str:
+    """Map a sync database URL onto its asyncio driver equivalent."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend == "sqlite":
+        parsed = parsed.set(drivername="sqlite+aiosqlite")
+    elif backend == "postgresql":
+        parsed = parsed.set(drivername="postgresql+asyncpg")
+    else:
+        raise ValueError(
+            f"No asyncio driver configured for database backend '{backend}'; "
+            "async sessions support sqlite and postgresql"
+        )
+    return parsed.render_as_string(hide_password=False)
+
+
+# Async engine for non-blocking queries issued from coroutines; created on first use so a
+# backend without an asyncio driver (or a missing greenlet) only fails on the async path
+_async_sessionmaker = None
+_async_engine_lock = threading.Lock()
+
+
+def get_async_sessionmaker():
+    """Get the async session factory, creating the async engine on first use."""
+    global _async_sessionmaker
+    if _async_sessionmaker is None:
+        with _async_engine_lock:
+            if _async_sessionmaker is None:
+                # Imported here: sqlalchemy.ext.asyncio needs greenlet, which only the async path requires
+                from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+                
+                if database_url.startswith('sqlite'):
+                    async_engine = create_async_engine(
+                        _to_async_url(database_url),
+                        pool_pre_ping=True,
+                        echo=False
+                    )
+                else:
+                    async_engine = create_async_engine(
+                        _to_async_url(database_url),
+                        pool_size=settings.DB_POOL_SIZE,
+                        max_overflow=settings.DB_MAX_OVERFLOW,
+                        pool_pre_ping=True,
+                        pool_recycle=3600,
+                        pool_timeout=30,
+                        echo=False,
+                        connect_args={
+                            "timeout": 10,
+                            "server_settings": {"application_name": "quick_commerce_deals"}
+                        }
+                    )
+                _async_sessionmaker = async_sessionmaker(
+                    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+                )
+    return _async_sessionmaker
+
+
+def AsyncSessionLocal():
+    """Open an async session; kept callable like the sync SessionLocal factory."""
+    return get_async_sessionmaker()()
+
+
 # Create base class for models
 Base = declarative_base()
 
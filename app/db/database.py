@@ -7,6 +7,7 @@ This module provides backward compatibility by importing from the new core.datab
 from app.core.database import (
     base_engine as engine,
     SessionLocal,
+    AsyncSessionLocal,
     Base,
     get_db,
     get_monitored_db_session,
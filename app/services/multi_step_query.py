@@ -3,24 +3,155 @@ Multi-step Query Generation and Validation for Quick Commerce Deals platform.
 Breaks complex queries into logical validation steps with error recovery.
 """
 
+import functools
+import hashlib
 import logging
+import re
+import threading
 import time
-import json
-from typing import Dict, List, Optional, Any, Tuple, Union
-from dataclasses import dataclass, asdict
+from collections import OrderedDict
+from itertools import chain, islice
+from typing import Dict, Iterable, Iterator, List, Optional, Any, Sequence, Tuple, Union
+from dataclasses import dataclass, fields, is_dataclass, replace
 from enum import Enum
-from datetime import datetime
+from datetime import date, datetime
+from decimal import Decimal
 import asyncio
+from contextlib import asynccontextmanager
 from sqlalchemy import text
+from sqlalchemy.sql.elements import TextClause
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 
-from app.core.database import SessionLocal
+from app.core.database import AsyncSessionLocal
 from app.services.semantic_indexer import get_semantic_indexer
 from app.services.query_planner import QueryPlanner
 
 logger = logging.getLogger(__name__)
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - fall back to the stdlib encoder
+    orjson = None
+    import json
+
+
+def _json_default(obj: Any) -> Any:
+    """Encode values the JSON encoder does not handle natively."""
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if is_dataclass(obj):
+        # Shallow mapping; the encoder recurses into nested values itself
+        return {f.name: getattr(obj, f.name) for f in fields(obj)}
+    return str(obj)
+
+
+# Row cap applied to the final result formatting query
+RESULT_ROW_LIMIT = 50
+
+# In-process cache of recent query results keyed by SQL text
+RESULT_CACHE_MAXSIZE = 512
+RESULT_CACHE_TTL_SECONDS = 30
+
+
+@functools.lru_cache(maxsize=256)
+def _limited_sql(sql_fragment: str) -> str:
+    """Wrap a SELECT so its row cap is a bound ``:row_limit`` parameter.
+
+    Wrapping as a subquery keeps fragments that already carry their own
+    LIMIT/ORDER BY valid and gives the database a stable statement text.
+    """
+    body = sql_fragment.strip().rstrip(";")
+    return f"SELECT * FROM ({body}) AS limited_rows LIMIT :row_limit"
+
+
+@functools.lru_cache(maxsize=256)
+def _compiled_text(sql: str, yield_per: Optional[int] = None) -> TextClause:
+    """Return a reusable ``text()`` construct for a SQL string.
+
+    Reusing the same construct lets SQLAlchemy hit its compiled-statement
+    cache instead of rebuilding the clause on every execution. Together
+    with bound parameters (e.g. ``:row_limit``) the statement text stays
+    stable, so the driver's prepared statements and the server's plan
+    cache are reused as well.
+    """
+    statement = text(sql)
+    if yield_per is not None:
+        statement = statement.execution_options(stream_results=True, yield_per=yield_per)
+    return statement
+
+
+# Bare/INNER JOIN keywords; qualified joins are captured so they can be left alone
+_JOIN_KEYWORD_RE = re.compile(
+    r"\b((?:LEFT|RIGHT|FULL|CROSS|NATURAL)\s+(?:OUTER\s+)?)?(?:INNER\s+)?JOIN\b",
+    re.IGNORECASE
+)
+
+# ILIKE predicates with a '%term%' pattern
+_ILIKE_PATTERN_RE = re.compile(r"(ILIKE\s+)'%([^%']+)%'", re.IGNORECASE)
+
+
+# Leading "SELECT COUNT(*) FROM" of a counting fragment
+_COUNT_PREFIX_RE = re.compile(r"^\s*SELECT\s+COUNT\(\*\)\s+FROM\s+", re.IGNORECASE)
+
+
+@functools.lru_cache(maxsize=256)
+def _exists_sql(sql: str) -> str:
+    """Turn a counting/row query into an EXISTS probe that stops at the first match."""
+    body = sql.strip().rstrip(";")
+    if _COUNT_PREFIX_RE.match(body):
+        return f"SELECT EXISTS (SELECT 1 FROM {_COUNT_PREFIX_RE.sub('', body, count=1)})"
+    return f"SELECT EXISTS (SELECT 1 FROM ({body}) AS exists_check)"
+
+
+@functools.lru_cache(maxsize=256)
+def _to_left_joins(sql: str) -> str:
+    """Rewrite bare and INNER JOINs as LEFT JOINs, keeping other join kinds intact."""
+    return _JOIN_KEYWORD_RE.sub(
+        lambda match: match.group(0) if match.group(1) else "LEFT JOIN", sql
+    )
+
+
+def _broaden_term(term: str) -> str:
+    """Reduce a search term to a looser pattern (singular stem, wildcard between words)."""
+    words = []
+    for word in term.split():
+        if len(word) > 4 and word.endswith("es"):
+            word = word[:-2]
+        elif len(word) > 3 and word.endswith("s"):
+            word = word[:-1]
+        words.append(word)
+    return "%".join(words) or term
+
+
+@functools.lru_cache(maxsize=256)
+def _broaden_ilike_patterns(sql: str) -> str:
+    """Relax ILIKE '%term%' predicates so near-miss product names still match."""
+    return _ILIKE_PATTERN_RE.sub(
+        lambda match: f"{match.group(1)}'%{_broaden_term(match.group(2))}%'", sql
+    )
+
+
+def _unique(items: Iterable[str]) -> Iterator[str]:
+    """Yield items in order, skipping ones already seen."""
+    seen = set()
+    for item in items:
+        if item not in seen:
+            seen.add(item)
+            yield item
+
+
+def _dumps(obj: Any) -> bytes:
+    """Serialize a plan/result tree to JSON bytes in a single pass."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_json_default)
+    return json.dumps(obj, default=_json_default).encode()
+
 
 class QueryStepType(Enum):
     """Types of query steps"""
@@ -41,14 +172,36 @@ class StepStatus(Enum):
     SKIPPED = "skipped"
 
 
+# Consecutive step sequences that can share a single SQL round-trip
+MERGEABLE_STEP_SEQUENCES = (
+    (QueryStepType.DATA_VALIDATION, QueryStepType.JOIN_VALIDATION, QueryStepType.RESULT_FORMATTING),
+    (QueryStepType.DATA_VALIDATION, QueryStepType.RESULT_FORMATTING),
+)
+
+# Column each validation step's COUNT(*) is exposed as in a merged query
+MERGED_COUNT_COLUMNS = {
+    QueryStepType.DATA_VALIDATION: "validation_count",
+    QueryStepType.JOIN_VALIDATION: "join_count",
+}
+
+# A merged step takes the first of these types it contains, so it keeps the
+# recovery strategies and critical-failure handling of its strictest step
+MERGED_STEP_TYPE_PRIORITY = (
+    QueryStepType.DATA_VALIDATION,
+    QueryStepType.JOIN_VALIDATION,
+    QueryStepType.RESULT_FORMATTING,
+)
+
+
 @dataclass
 class QueryStep:
     """Represents a single step in multi-step query execution"""
     step_id: str
+    idx: int  # Position in the plan; used for dependency lookups
     step_type: QueryStepType
     description: str
     sql_fragment: str
-    dependencies: List[str]  # IDs of steps this depends on
+    dependencies: Tuple[int, ...]  # Indices of steps this depends on
     validation_query: Optional[str] = None
     expected_result_type: str = "rows"  # "rows", "count", "exists"
     timeout_seconds: int = 30
@@ -59,6 +212,7 @@ class QueryStep:
     error_message: Optional[str] = None
     execution_time: Optional[float] = None
     created_at: datetime = None
+    merged_step_types: Tuple[QueryStepType, ...] = ()  # Set when several SQL steps were fused
     
     def __post_init__(self):
         if self.created_at is None:
@@ -82,17 +236,22 @@ class QueryExecutionPlan:
             self.created_at = datetime.utcnow()
         if self.total_steps == 0:
             self.total_steps = len(self.steps)
+    
+    def to_json(self) -> bytes:
+        """Serialize the plan to JSON bytes."""
+        return _dumps(self)
 
 
 @dataclass
 class StepExecutionResult:
     """Result of executing a single query step"""
     step_id: str
+    step_idx: int
     success: bool
     result: Any
     execution_time: float
     error_message: Optional[str] = None
-    suggestions: List[str] = None
+    suggestions: Sequence[str] = None
     
     def __post_init__(self):
         if self.suggestions is None:
@@ -116,6 +275,10 @@ class MultiStepQueryResult:
     def __post_init__(self):
         if self.suggestions is None:
             self.suggestions = []
+    
+    def to_json(self) -> bytes:
+        """Serialize the result, including step results, to JSON bytes."""
+        return _dumps(self)
 
 
 class MultiStepQueryProcessor:
@@ -130,6 +293,9 @@ class MultiStepQueryProcessor:
         self.query_planner = QueryPlanner()
         self.active_executions: Dict[str, QueryExecutionPlan] = {}
         
+        # Recent query results: key -> (expires_at, value), in LRU order
+        self._result_cache: "OrderedDict[bytes, Tuple[float, Any]]" = OrderedDict()
+        
         # Step templates for common query patterns
         self.step_templates = self._initialize_step_templates()
         
@@ -207,39 +373,40 @@ class MultiStepQueryProcessor:
             ]
         }
     
-    def _initialize_recovery_strategies(self) -> Dict[QueryStepType, List[str]]:
+    def _initialize_recovery_strategies(self) -> Dict[QueryStepType, Tuple[str, ...]]:
         """Initialize error recovery strategies for different step types."""
+        # Tuples: iterated on every failure and shared as suggestions without copying
         return {
-            QueryStepType.TABLE_SELECTION: [
+            QueryStepType.TABLE_SELECTION: (
                 "Retry with alternative table names",
                 "Use semantic similarity to find related tables",
                 "Fall back to core tables (products, current_prices, platforms)"
-            ],
-            QueryStepType.DATA_VALIDATION: [
+            ),
+            QueryStepType.DATA_VALIDATION: (
                 "Broaden search criteria",
                 "Try alternative product name variations",
                 "Check for typos in product names"
-            ],
-            QueryStepType.JOIN_VALIDATION: [
+            ),
+            QueryStepType.JOIN_VALIDATION: (
                 "Use LEFT JOIN instead of INNER JOIN",
                 "Verify foreign key relationships",
                 "Try alternative join paths"
-            ],
-            QueryStepType.FILTER_APPLICATION: [
+            ),
+            QueryStepType.FILTER_APPLICATION: (
                 "Relax filter criteria",
                 "Remove optional filters",
                 "Use broader date ranges"
-            ],
-            QueryStepType.AGGREGATION: [
+            ),
+            QueryStepType.AGGREGATION: (
                 "Use simpler aggregation functions",
                 "Remove complex grouping",
                 "Apply LIMIT to reduce result set"
-            ],
-            QueryStepType.RESULT_FORMATTING: [
+            ),
+            QueryStepType.RESULT_FORMATTING: (
                 "Use basic column selection",
                 "Remove complex formatting",
                 "Return raw data if formatting fails"
-            ]
+            )
         }
     
     async def create_execution_plan(
@@ -361,19 +528,19 @@ class MultiStepQueryProcessor:
         context: Optional[Dict] = None
     ) -> List[QueryStep]:
         """Generate ordered query steps based on pattern and complexity."""
-        steps = []
-        
         # Get base template
         template_steps = self.step_templates.get(pattern, self.step_templates["product_search"])
         
+        # Template length is known up front, so fill a pre-sized list
+        steps: List[QueryStep] = [None] * len(template_steps)
+        timeout_seconds = min(30 + complexity_score * 5, 120)  # Scale timeout with complexity
+        
         # Generate steps from template
         for i, template in enumerate(template_steps):
             step_id = f"step_{i+1}_{template['step_type'].value}"
             
             # Determine dependencies
-            dependencies = []
-            if i > 0:
-                dependencies.append(f"step_{i}_{template_steps[i-1]['step_type'].value}")
+            dependencies = (i - 1,) if i > 0 else ()
             
             # Create SQL fragment based on step type and query
             sql_fragment = await self._generate_sql_fragment(
@@ -389,26 +556,31 @@ class MultiStepQueryProcessor:
             
             step = QueryStep(
                 step_id=step_id,
+                idx=i,
                 step_type=template['step_type'],
                 description=template['description'],
                 sql_fragment=sql_fragment,
                 dependencies=dependencies,
                 validation_query=validation_query,
                 expected_result_type=template.get('expected_result_type', 'rows'),
-                timeout_seconds=min(30 + complexity_score * 5, 120)  # Scale timeout with complexity
+                timeout_seconds=timeout_seconds
             )
             
-            steps.append(step)
+            steps[i] = step
+        
+        # Fuse validation + formatting steps that can run as one query
+        steps = self._merge_sequential_sql_steps(steps)
         
         # Add complexity-specific steps
         if complexity_score >= 7:
             # Add result sampling step for complex queries
             sampling_step = QueryStep(
                 step_id=f"step_{len(steps)+1}_sampling",
+                idx=len(steps),
                 step_type=QueryStepType.RESULT_FORMATTING,
                 description="Apply statistical sampling for large result sets",
                 sql_fragment="-- Statistical sampling will be applied",
-                dependencies=[steps[-1].step_id] if steps else [],
+                dependencies=(steps[-1].idx,) if steps else (),
                 expected_result_type="rows",
                 timeout_seconds=15
             )
@@ -478,6 +650,69 @@ class MultiStepQueryProcessor:
         
         return "-- SQL fragment placeholder"
     
+    def _merge_sequential_sql_steps(self, steps: List[QueryStep]) -> List[QueryStep]:
+        """Fuse consecutive validation/formatting steps into a single CTE step."""
+        merged_steps = []
+        i = 0
+        
+        while i < len(steps):
+            for sequence in MERGEABLE_STEP_SEQUENCES:
+                run = steps[i:i + len(sequence)]
+                if (tuple(step.step_type for step in run) == sequence and
+                        all(step.sql_fragment.lstrip().upper().startswith("SELECT") for step in run)):
+                    merged_steps.append(self._build_merged_step(run))
+                    i += len(run)
+                    break
+            else:
+                merged_steps.append(steps[i])
+                i += 1
+        
+        if len(merged_steps) == len(steps):
+            return steps
+        
+        # Renumber so ids and dependencies stay sequential
+        for idx, step in enumerate(merged_steps):
+            step.idx = idx
+            step.step_id = f"step_{idx+1}_{step.step_type.value}"
+            step.dependencies = (idx - 1,) if idx > 0 else ()
+        
+        return merged_steps
+    
+    def _build_merged_step(self, run: List[QueryStep]) -> QueryStep:
+        """Build one step whose SQL returns the formatted rows and the validation counts."""
+        count_columns = [MERGED_COUNT_COLUMNS[step.step_type] for step in run[:-1]]
+        
+        ctes = [
+            f"{column}_check({column}) AS ({step.sql_fragment.strip().rstrip(';')})"
+            for column, step in zip(count_columns, run)
+        ]
+        ctes.append(f"formatted AS ({run[-1].sql_fragment.strip().rstrip(';')})")
+        
+        select_columns = ", ".join(f"{column}_check.{column}" for column in count_columns)
+        from_clause = " CROSS JOIN ".join(f"{column}_check" for column in count_columns)
+        
+        sql_fragment = (
+            f"WITH {', '.join(ctes)} "
+            f"SELECT {select_columns}, formatted.* "
+            f"FROM {from_clause} LEFT JOIN formatted ON 1 = 1 "
+            f"LIMIT :row_limit"
+        )
+        
+        run_types = tuple(step.step_type for step in run)
+        
+        return QueryStep(
+            step_id=run[-1].step_id,
+            idx=run[0].idx,
+            step_type=next(step_type for step_type in MERGED_STEP_TYPE_PRIORITY if step_type in run_types),
+            description=f"{run[-1].description} (merged with {len(run) - 1} validation steps)",
+            sql_fragment=sql_fragment,
+            dependencies=run[0].dependencies,
+            validation_query=run[0].validation_query,
+            expected_result_type="rows",
+            timeout_seconds=max(step.timeout_seconds for step in run),
+            merged_step_types=run_types
+        )
+    
     def _extract_product_name(self, query: str) -> str:
         """Extract product name from query (simplified version)."""
         query_lower = query.lower()
@@ -561,33 +796,34 @@ class MultiStepQueryProcessor:
         final_result = None
         
         try:
-            # Execute steps in dependency order
-            for step in execution_plan.steps:
-                # Check if dependencies are satisfied
-                if not await self._check_step_dependencies(step, step_results):
-                    logger.warning(f"Skipping step {step.step_id} - dependencies not satisfied")
-                    step.status = StepStatus.SKIPPED
-                    continue
-                
-                # Execute step with validation
-                step_result = await self._execute_step_with_validation(step)
-                step_results.append(step_result)
-                steps_executed += 1
-                
-                if not step_result.success:
-                    steps_failed += 1
+            # Execute steps in dependency order on one shared session
+            async with AsyncSessionLocal() as session:
+                for step in execution_plan.steps:
+                    # Check if dependencies are satisfied
+                    if not await self._check_step_dependencies(step, step_results):
+                        logger.warning(f"Skipping step {step.step_id} - dependencies not satisfied")
+                        step.status = StepStatus.SKIPPED
+                        continue
                     
-                    # Apply error recovery if possible
-                    recovery_result = await self._apply_error_recovery(step, step_result)
-                    if recovery_result.success:
-                        error_recovery_applied = True
-                        step_results[-1] = recovery_result  # Replace failed result
-                        logger.info(f"Error recovery successful for step {step.step_id}")
-                    else:
-                        logger.error(f"Step {step.step_id} failed and recovery unsuccessful")
-                        # Continue with remaining steps if not critical
-                        if step.step_type in [QueryStepType.TABLE_SELECTION, QueryStepType.DATA_VALIDATION]:
-                            break  # Critical failure
+                    # Execute step with validation
+                    step_result = await self._execute_step_with_validation(step, session)
+                    step_results.append(step_result)
+                    steps_executed += 1
+                    
+                    if not step_result.success:
+                        steps_failed += 1
+                        
+                        # Apply error recovery if possible
+                        recovery_result = await self._apply_error_recovery(step, step_result, session)
+                        if recovery_result.success:
+                            error_recovery_applied = True
+                            step_results[-1] = recovery_result  # Replace failed result
+                            logger.info(f"Error recovery successful for step {step.step_id}")
+                        else:
+                            logger.error(f"Step {step.step_id} failed and recovery unsuccessful")
+                            # Continue with remaining steps if not critical
+                            if step.step_type in [QueryStepType.TABLE_SELECTION, QueryStepType.DATA_VALIDATION]:
+                                break  # Critical failure
             
             # Aggregate results from all successful steps
             final_result = await self._aggregate_step_results(step_results, execution_plan)
@@ -645,10 +881,14 @@ class MultiStepQueryProcessor:
         if not step.dependencies:
             return True
         
-        completed_step_ids = {result.step_id for result in completed_results if result.success}
-        return all(dep_id in completed_step_ids for dep_id in step.dependencies)
+        completed_step_idxs = {result.step_idx for result in completed_results if result.success}
+        return all(dep_idx in completed_step_idxs for dep_idx in step.dependencies)
     
-    async def _execute_step_with_validation(self, step: QueryStep) -> StepExecutionResult:
+    async def _execute_step_with_validation(
+        self,
+        step: QueryStep,
+        session: Optional[AsyncSession] = None
+    ) -> StepExecutionResult:
         """Execute a single step with validation."""
         logger.debug(f"Executing step {step.step_id}: {step.description}")
         
@@ -658,20 +898,21 @@ class MultiStepQueryProcessor:
         try:
             # Run validation query first if provided
             if step.validation_query:
-                validation_success = await self._run_validation_query(step.validation_query)
+                validation_success = await self._run_validation_query(step.validation_query, session)
                 if not validation_success:
                     step.status = StepStatus.FAILED
                     return StepExecutionResult(
                         step_id=step.step_id,
+                        step_idx=step.idx,
                         success=False,
                         result=None,
                         execution_time=time.time() - start_time,
                         error_message="Validation query failed",
-                        suggestions=self.recovery_strategies.get(step.step_type, [])
+                        suggestions=self.recovery_strategies.get(step.step_type, ())
                     )
             
             # Execute main step logic
-            result = await self._execute_step_logic(step)
+            result = await self._execute_step_logic(step, session)
             
             step.status = StepStatus.COMPLETED
             step.result = result
@@ -679,12 +920,17 @@ class MultiStepQueryProcessor:
             
             return StepExecutionResult(
                 step_id=step.step_id,
+                step_idx=step.idx,
                 success=True,
                 result=result,
                 execution_time=step.execution_time
             )
             
         except Exception as e:
+            # Keep a shared session usable for the remaining steps
+            if session is not None:
+                await session.rollback()
+            
             step.status = StepStatus.FAILED
             step.error_message = str(e)
             step.execution_time = time.time() - start_time
@@ -693,52 +939,65 @@ class MultiStepQueryProcessor:
             
             return StepExecutionResult(
                 step_id=step.step_id,
+                step_idx=step.idx,
                 success=False,
                 result=None,
                 execution_time=step.execution_time,
                 error_message=str(e),
-                suggestions=self.recovery_strategies.get(step.step_type, [])
+                suggestions=self.recovery_strategies.get(step.step_type, ())
             )
     
-    async def _run_validation_query(self, validation_query: str) -> bool:
+    async def _run_validation_query(
+        self,
+        validation_query: str,
+        session: Optional[AsyncSession] = None
+    ) -> bool:
         """Run a validation query and return success status."""
         try:
-            with SessionLocal() as db:
-                result = db.execute(text(validation_query))
-                
+            query_upper = validation_query.upper()
+            async with self._session_scope(session) as db:
                 # For COUNT queries, check if count > 0
-                if "COUNT(*)" in validation_query.upper():
-                    count = result.scalar()
+                if "COUNT(*)" in query_upper:
+                    result = await db.execute(_compiled_text(validation_query))
+                    count = result.scalar_one_or_none() or 0
                     return count > 0
-                
-                # For existence queries, check if any rows returned
-                rows = result.fetchall()
-                return len(rows) > 0
-                
+
+                # For existence queries only the first row matters
+                if "LIMIT" not in query_upper:
+                    validation_query = f"{validation_query.rstrip().rstrip(';')} LIMIT 1"
+
+                result = await db.stream(_compiled_text(validation_query, yield_per=1))
+                return await result.first() is not None
+
         except Exception as e:
             logger.warning(f"Validation query failed: {str(e)}")
+            if session is not None:
+                await session.rollback()
             return False
     
-    async def _execute_step_logic(self, step: QueryStep) -> Any:
+    async def _execute_step_logic(
+        self,
+        step: QueryStep,
+        session: Optional[AsyncSession] = None
+    ) -> Any:
         """Execute the main logic for a query step."""
         
+        if step.merged_step_types:
+            return await self._execute_merged_step(step, session)
+        
         if step.step_type == QueryStepType.TABLE_SELECTION:
             # Return list of selected tables
             return {"selected_tables": step.sql_fragment.replace("-- Using tables: ", "").split(", ")}
         
         elif step.step_type == QueryStepType.DATA_VALIDATION:
             # Execute validation and return count
-            with SessionLocal() as db:
-                result = db.execute(text(step.sql_fragment))
-                count = result.scalar()
-                return {"validation_count": count, "valid": count > 0}
+            count = await self._fetch_scalar(step.sql_fragment, session)
+            return {"validation_count": count, "valid": count > 0}
         
         elif step.step_type == QueryStepType.JOIN_VALIDATION:
             # Test join and return success
-            with SessionLocal() as db:
-                result = db.execute(text(step.sql_fragment))
-                count = result.scalar()
-                return {"join_valid": count > 0}
+            count = await self._fetch_scalar(step.sql_fragment, session)
+            return {"join_valid": count > 0}
         
         elif step.step_type == QueryStepType.FILTER_APPLICATION:
             # Return filter information
@@ -750,78 +1009,233 @@ class MultiStepQueryProcessor:
         
         elif step.step_type == QueryStepType.RESULT_FORMATTING:
             # Execute final query and return formatted results
-            with SessionLocal() as db:
-                result = db.execute(text(step.sql_fragment + " LIMIT 50"))  # Limit for safety
-                rows = result.fetchall()
-                
-                # Convert to list of dictionaries
-                columns = result.keys()
-                formatted_results = []
-                for row in rows:
-                    row_dict = dict(zip(columns, row))
-                    formatted_results.append(row_dict)
-                
-                return {"formatted_results": formatted_results, "count": len(formatted_results)}
+            formatted_results = await self._fetch_rows(
+                _limited_sql(step.sql_fragment), {"row_limit": RESULT_ROW_LIMIT}, session  # Limit for safety
+            )
+            
+            return {"formatted_results": formatted_results, "count": len(formatted_results)}
         
         return {"step_completed": True}
     
+    async def _execute_merged_step(
+        self,
+        step: QueryStep,
+        session: Optional[AsyncSession] = None
+    ) -> Dict[str, Any]:
+        """Run a fused validation + formatting step in one round-trip."""
+        rows = await self._fetch_rows(step.sql_fragment, {"row_limit": RESULT_ROW_LIMIT}, session)
+        
+        count_columns = [MERGED_COUNT_COLUMNS[step_type] for step_type in step.merged_step_types[:-1]]
+        counts = {column: (rows[0][column] if rows else 0) or 0 for column in count_columns}
+        
+        # The LEFT JOIN yields a single all-NULL row when formatting matched nothing
+        formatted_results = []
+        for row in rows:
+            for column in count_columns:
+                del row[column]
+            if any(value is not None for value in row.values()):
+                formatted_results.append(row)
+        
+        output = {"formatted_results": formatted_results, "count": len(formatted_results)}
+        if "validation_count" in counts:
+            output["validation_count"] = counts["validation_count"]
+            output["valid"] = counts["validation_count"] > 0
+        if "join_count" in counts:
+            output["join_valid"] = counts["join_count"] > 0
+        
+        return output
+    
+    def _result_cache_key(
+        self,
+        kind: str,
+        sql: str,
+        params: Optional[Dict[str, Any]] = None
+    ) -> bytes:
+        """Build a compact cache key from the fetch kind, SQL text and bound parameters."""
+        # The kind keeps row lists and wrapped scalars for the same SQL apart
+        raw = f"{kind}\x00{sql}\x00{sorted(params.items()) if params else ''}"
+        return hashlib.blake2b(raw.encode(), digest_size=16).digest()
+    
+    def _get_cached_result(self, key: bytes) -> Optional[Any]:
+        """Return a cached query result if present and not expired."""
+        entry = self._result_cache.get(key)
+        if entry is None:
+            return None
+        
+        expires_at, value = entry
+        if time.monotonic() > expires_at:
+            del self._result_cache[key]
+            return None
+        
+        self._result_cache.move_to_end(key)
+        return value
+    
+    def _set_cached_result(self, key: bytes, value: Any):
+        """Store a query result, evicting the least recently used entry when full."""
+        self._result_cache[key] = (time.monotonic() + RESULT_CACHE_TTL_SECONDS, value)
+        self._result_cache.move_to_end(key)
+        if len(self._result_cache) > RESULT_CACHE_MAXSIZE:
+            self._result_cache.popitem(last=False)
+    
+    @asynccontextmanager
+    async def _session_scope(self, session: Optional[AsyncSession] = None):
+        """Yield the caller's shared session, or a short-lived one when none is given."""
+        if session is not None:
+            yield session
+        else:
+            async with AsyncSessionLocal() as db:
+                yield db
+    
+    async def _fetch_rows(
+        self,
+        sql: str,
+        params: Optional[Dict[str, Any]] = None,
+        session: Optional[AsyncSession] = None
+    ) -> List[Dict[str, Any]]:
+        """Stream rows for a query as dicts, serving repeats from the result cache."""
+        key = self._result_cache_key("rows", sql, params)
+        rows = self._get_cached_result(key)
+        
+        if rows is None:
+            async with self._session_scope(session) as db:
+                # Server-side cursor: rows are streamed rather than buffered up front
+                result = await db.stream(
+                    _compiled_text(sql, yield_per=RESULT_ROW_LIMIT), params or {}
+                )
+                rows = [dict(row) async for row in result.mappings()]
+            self._set_cached_result(key, rows)
+        
+        # Hand out copies so callers cannot mutate cached rows
+        return [dict(row) for row in rows]
+    
+    async def _fetch_scalar(self, sql: str, session: Optional[AsyncSession] = None) -> Any:
+        """Execute a scalar query, serving repeats from the result cache."""
+        key = self._result_cache_key("scalar", sql)
+        entry = self._get_cached_result(key)
+        if entry is not None:
+            return entry[0]
+        
+        async with self._session_scope(session) as db:
+            result = await db.execute(_compiled_text(sql))
+            value = result.scalar()
+        
+        # Wrapped in a tuple so a cached None is distinguishable from a miss
+        self._set_cached_result(key, (value,))
+        return value
+    
     async def _apply_error_recovery(
         self, 
         failed_step: QueryStep, 
-        failed_result: StepExecutionResult
+        failed_result: StepExecutionResult,
+        session: Optional[AsyncSession] = None
     ) -> StepExecutionResult:
         """Apply error recovery strategies for a failed step."""
         logger.info(f"Applying error recovery for step {failed_step.step_id}")
         
-        recovery_strategies = self.recovery_strategies.get(failed_step.step_type, [])
+        recovery_strategies = self.recovery_strategies.get(failed_step.step_type, ())
+        if not recovery_strategies:
+            return failed_result
         
-        for strategy in recovery_strategies:
-            try:
-                # Apply recovery strategy based on step type
-                if failed_step.step_type == QueryStepType.DATA_VALIDATION:
-                    # Try broader search criteria
-                    modified_query = failed_step.sql_fragment.replace("ILIKE '%", "ILIKE '%")
-                    modified_query = modified_query.replace("%'", "%'")  # Keep as is for now
-                    
-                    with SessionLocal() as db:
-                        result = db.execute(text(modified_query))
-                        count = result.scalar()
-                        
-                        if count > 0:
-                            return StepExecutionResult(
-                                step_id=failed_step.step_id,
-                                success=True,
-                                result={"validation_count": count, "valid": True, "recovery_applied": strategy},
-                                execution_time=failed_result.execution_time,
-                                suggestions=[]
-                            )
-                
-                elif failed_step.step_type == QueryStepType.JOIN_VALIDATION:
-                    # Try LEFT JOIN instead of INNER JOIN
-                    modified_query = failed_step.sql_fragment.replace("JOIN", "LEFT JOIN")
-                    
-                    with SessionLocal() as db:
-                        result = db.execute(text(modified_query))
-                        count = result.scalar()
-                        
-                        if count > 0:
-                            return StepExecutionResult(
-                                step_id=failed_step.step_id,
-                                success=True,
-                                result={"join_valid": True, "recovery_applied": strategy},
-                                execution_time=failed_result.execution_time,
-                                suggestions=[]
-                            )
-                
-                # Add more recovery strategies as needed
-                
-            except Exception as e:
-                logger.warning(f"Recovery strategy '{strategy}' failed: {str(e)}")
-                continue
+        # Every strategy for a step type issues the same recovery SQL, so run it
+        # once and report it under the first strategy
+        recovery_result = await self._try_recovery_strategy(
+            failed_step, failed_result, recovery_strategies[0], session
+        )
+        if recovery_result is not None:
+            return recovery_result
         
         # If all recovery strategies fail, return the original failed result
         return failed_result
     
+    def _build_recovery_query(self, failed_step: QueryStep) -> Optional[str]:
+        """Rewrite a failed step's SQL into its recovery variant, if one exists."""
+        if failed_step.merged_step_types:
+            # Apply the rewrite of every validation step fused into the query
+            modified_query = failed_step.sql_fragment
+            if QueryStepType.DATA_VALIDATION in failed_step.merged_step_types:
+                modified_query = _broaden_ilike_patterns(modified_query)
+            if QueryStepType.JOIN_VALIDATION in failed_step.merged_step_types:
+                modified_query = _to_left_joins(modified_query)
+            return modified_query
+        
+        if failed_step.step_type == QueryStepType.DATA_VALIDATION:
+            # Try broader search criteria
+            return _broaden_ilike_patterns(failed_step.sql_fragment)
+        
+        if failed_step.step_type == QueryStepType.JOIN_VALIDATION:
+            # Try LEFT JOIN instead of INNER JOIN
+            return _to_left_joins(failed_step.sql_fragment)
+        
+        # Add more recovery strategies as needed
+        return None
+    
+    async def _build_recovered_result(
+        self,
+        failed_step: QueryStep,
+        failed_result: StepExecutionResult,
+        modified_query: str,
+        strategy: str,
+        session: Optional[AsyncSession] = None
+    ) -> StepExecutionResult:
+        """Build the successful result for a step whose recovery query matched."""
+        if failed_step.step_type == QueryStepType.DATA_VALIDATION:
+            # Only count once existence is known
+            count = await self._fetch_scalar(modified_query, session)
+            result = {"validation_count": count, "valid": True, "recovery_applied": strategy}
+        else:
+            result = {"join_valid": True, "recovery_applied": strategy}
+        
+        return StepExecutionResult(
+            step_id=failed_step.step_id,
+            step_idx=failed_step.idx,
+            success=True,
+            result=result,
+            execution_time=failed_result.execution_time,
+            suggestions=[]
+        )
+    
+    async def _try_recovery_strategy(
+        self,
+        failed_step: QueryStep,
+        failed_result: StepExecutionResult,
+        strategy: str,
+        session: Optional[AsyncSession] = None
+    ) -> Optional[StepExecutionResult]:
+        """Run a single recovery strategy, returning a result only on success."""
+        try:
+            modified_query = self._build_recovery_query(failed_step)
+            
+            if modified_query is not None and failed_step.merged_step_types:
+                # A merged query always yields a row, so rerun it and check its counts instead
+                result = await self._execute_merged_step(
+                    replace(failed_step, sql_fragment=modified_query), session
+                )
+                if not result.get("valid", True) or not result.get("join_valid", True):
+                    return None
+                
+                result["recovery_applied"] = strategy
+                return StepExecutionResult(
+                    step_id=failed_step.step_id,
+                    step_idx=failed_step.idx,
+                    success=True,
+                    result=result,
+                    execution_time=failed_result.execution_time,
+                    suggestions=[]
+                )
+            
+            # Cheap existence probe first; only count when there is something to count
+            if modified_query is not None and await self._fetch_scalar(_exists_sql(modified_query), session):
+                return await self._build_recovered_result(
+                    failed_step, failed_result, modified_query, strategy, session
+                )
+            
+        except Exception as e:
+            logger.warning(f"Recovery strategy '{strategy}' failed: {str(e)}")
+            if session is not None:
+                await session.rollback()
+        
+        return None
+    
     async def _aggregate_step_results(
         self, 
         step_results: List[StepExecutionResult], 
@@ -829,22 +1243,28 @@ class MultiStepQueryProcessor:
     ) -> Any:
         """Aggregate results from all successful steps into final result."""
         
-        # Find the final result formatting step
+        # Walk backwards so the latest formatted output wins and ends the scan early;
+        # the validation count seen last is the earliest one in plan order
         final_result = None
-        for result in reversed(step_results):
-            if result.success and isinstance(result.result, dict):
-                if "formatted_results" in result.result:
-                    final_result = result.result["formatted_results"]
-                    break
+        validation_count = None
+        for i in range(len(step_results) - 1, -1, -1):
+            result = step_results[i]
+            step_output = result.result
+            if not result.success or not isinstance(step_output, dict):
+                continue
+            
+            formatted_results = step_output.get("formatted_results")
+            if formatted_results is not None:
+                final_result = formatted_results
+                break
+            
+            count = step_output.get("validation_count")
+            if count is not None:
+                validation_count = count
         
         # If no formatted results, try to construct from available data
-        if final_result is None:
-            # Look for any successful step with useful data
-            for result in step_results:
-                if result.success and result.result:
-                    if isinstance(result.result, dict) and "validation_count" in result.result:
-                        final_result = {"message": f"Found {result.result['validation_count']} matching items"}
-                        break
+        if final_result is None and validation_count is not None:
+            final_result = {"message": f"Found {validation_count} matching items"}
         
         # Default fallback
         if final_result is None:
@@ -858,33 +1278,37 @@ class MultiStepQueryProcessor:
         execution_plan: QueryExecutionPlan
     ) -> List[str]:
         """Generate suggestions based on step execution results."""
-        suggestions = []
-        
         failed_steps = [r for r in step_results if not r.success]
         
+        base_suggestions = []
         if failed_steps:
-            suggestions.append("Some query steps failed - try simplifying your query")
-            
-            # Add specific suggestions based on failed step types
-            for failed_step in failed_steps:
-                if failed_step.suggestions:
-                    suggestions.extend(failed_step.suggestions[:2])  # Limit suggestions
+            base_suggestions.append("Some query steps failed - try simplifying your query")
         
+        complexity_suggestions = []
         if execution_plan.complexity_score >= 8:
-            suggestions.append("This was a complex query - consider breaking it into smaller parts")
+            complexity_suggestions.append("This was a complex query - consider breaking it into smaller parts")
         
         if len(step_results) > 5:
-            suggestions.append("Query required many steps - simpler queries will be faster")
+            complexity_suggestions.append("Query required many steps - simpler queries will be faster")
         
-        return suggestions[:5]  # Limit to top 5 suggestions
+        # Lazily chain candidates (at most 2 per failed step) and stop after 5 distinct ones
+        candidates = chain(
+            base_suggestions,
+            chain.from_iterable(islice(failed_step.suggestions, 2) for failed_step in failed_steps),
+            complexity_suggestions
+        )
+        return list(islice(_unique(candidates), 5))  # Limit to top 5 suggestions
 
 
 # Singleton instance for global use
 _multi_step_processor_instance = None
+_multi_step_processor_lock = threading.Lock()
 
 def get_multi_step_processor() -> MultiStepQueryProcessor:
     """Get singleton instance of MultiStepQueryProcessor."""
     global _multi_step_processor_instance
     if _multi_step_processor_instance is None:
-        _multi_step_processor_instance = MultiStepQueryProcessor()
+        with _multi_step_processor_lock:
+            if _multi_step_processor_instance is None:
+                _multi_step_processor_instance = MultiStepQueryProcessor()
     return _multi_step_processor_instance
\ No newline at end of file
@@ -4,22 +4,96 @@ Implements query result validation against known data patterns and accuracy test
 Task 8.2 implementation.
 """
 
+import asyncio
+import hashlib
 import logging
+import re
+import threading
 import time
-from typing import List, Dict, Optional, Tuple, Any
-from dataclasses import dataclass
+import numpy as np
+from collections import Counter, OrderedDict, defaultdict
+from types import MappingProxyType
+from typing import AsyncIterator, Awaitable, Callable, List, Dict, FrozenSet, Mapping, Optional, Sequence, Tuple, Any
+from dataclasses import dataclass, replace
 from enum import Enum
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
+from sqlalchemy import func, and_, or_, select
 
 from app.models.product import Product, ProductCategory
 from app.models.pricing import CurrentPrice
 from app.models.platform import Platform
 from app.schemas.query import QueryResult
+from app.services.sample_query_handlers import get_sample_query_handlers
 
 logger = logging.getLogger(__name__)
 
+# How long the active-platform set is reused before it is re-read from the database
+PLATFORM_CACHE_TTL_SECONDS = 60
+
+# Common product extraction patterns, matched in one scan by a precompiled alternation
+COMMON_PRODUCTS = ('onion', 'tomato', 'potato', 'apple', 'banana', 'milk', 'bread', 'rice', 'fruit')
+_COMMON_PRODUCTS_RE = re.compile('|'.join(map(re.escape, COMMON_PRODUCTS)))
+
+# Rule outputs are reused for identical (rule, query, results) inputs for a short time
+RULE_RESULT_CACHE_MAXSIZE = 256
+RULE_RESULT_CACHE_TTL_SECONDS = 60
+
+# db_context entries a rule reads besides the results; they are part of its cache key
+RULE_CONTEXT_KEYS: Dict[str, Tuple[str, ...]] = {
+    'platform_availability': ('active_platforms',),
+}
+
+# Rules that compare against the current time are never served from the rule cache
+UNCACHED_RULES = frozenset({'data_freshness'})
+
+# Passing regression reports are reused for repeated (query_type, query) runs
+REPORT_CACHE_MAXSIZE = 128
+REPORT_CACHE_TTL_SECONDS = 60
+
+# Severities whose failures fail the whole report rather than warn
+HIGH_SEVERITIES = frozenset({'critical', 'high'})
+
+# Capability bits describing which data a result set carries
+CAP_RESULTS = 1
+CAP_MULTIPLE_RESULTS = 2
+CAP_DISCOUNT_PAIRS = 4  # at least one row has both a discount and an original price
+
+# Skip message for each missing capability, lowest bit first
+CAPABILITY_SKIP_MESSAGES = (
+    (CAP_RESULTS, 'No results to validate'),
+    (CAP_MULTIPLE_RESULTS, 'Not enough results to validate ordering'),
+    (CAP_DISCOUNT_PAIRS, 'No discounted products with original prices to validate'),
+)
+
+# Capabilities a rule needs before it is worth scheduling
+REQUIRED_CAPS: Dict[str, int] = {
+    'price_consistency': CAP_RESULTS,
+    'platform_availability': CAP_RESULTS,
+    'product_relevance': CAP_RESULTS,
+    'discount_accuracy': CAP_RESULTS | CAP_DISCOUNT_PAIRS,
+    'result_ordering': CAP_MULTIPLE_RESULTS,
+    'data_freshness': CAP_RESULTS,
+    'availability_consistency': CAP_RESULTS,
+    'comparison_completeness': CAP_RESULTS,
+}
+
+
+def _is_monotonic(values: np.ndarray, descending: bool = False) -> bool:
+    """Check that values never step in the wrong direction."""
+    steps = np.diff(values)
+    return bool(np.all(steps <= 0)) if descending else bool(np.all(steps >= 0))
+
+
+def _score_prices(current: np.ndarray, original: np.ndarray) -> Tuple[int, int, int]:
+    """Count invalid prices, outliers and prices above their original price."""
+    invalid_count = np.count_nonzero(current <= 0)
+    # 10x the median: unlike the mean, a single extreme price cannot raise the bar enough to hide itself
+    outlier_count = np.count_nonzero(current > np.median(current) * 10)
+    # Comparisons against NaN are False, so missing original prices never match
+    discount_issue_count = np.count_nonzero(current > original)
+    return int(invalid_count), int(outlier_count), int(discount_issue_count)
+
 
 class ValidationResult(Enum):
     """Validation result types"""
@@ -29,7 +103,7 @@ class ValidationResult(Enum):
     SKIP = "skip"
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ValidationRule:
     """Represents a validation rule for query results"""
     rule_id: str
@@ -41,7 +115,7 @@ class ValidationRule:
     enabled: bool = True
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ValidationTestCase:
     """Test case for query accuracy validation"""
     test_id: str
@@ -49,26 +123,253 @@ class ValidationTestCase:
     query_type: str
     expected_result_count_min: int
     expected_result_count_max: int
-    expected_patterns: List[str]
-    validation_rules: List[str]
+    expected_patterns: Tuple[str, ...]
+    validation_rules: Tuple[str, ...]
     timeout_seconds: int = 30
     description: str = ""
 
 
 @dataclass
+class NormalizedResults:
+    """Column-wise view of query results, built once and shared by all rules"""
+    platform_lc: List[str]
+    product_lc: List[str]
+    current_price: np.ndarray
+    original_price: np.ndarray  # NaN where missing
+    discount_pct: np.ndarray  # NaN where missing
+    is_available: np.ndarray
+    last_updated: np.ndarray  # datetime64[us]
+    caps: int  # CAP_* bitmask
+    
+    @classmethod
+    def from_results(cls, results: List[QueryResult]) -> 'NormalizedResults':
+        """Lowercase names and extract numeric columns in a single pass over results."""
+        count = len(results)
+        original_price = np.fromiter(
+            (r.original_price if r.original_price else np.nan for r in results),
+            dtype=np.float64,
+            count=count
+        )
+        discount_pct = np.fromiter(
+            (r.discount_percentage if r.discount_percentage is not None else np.nan for r in results),
+            dtype=np.float64,
+            count=count
+        )
+        
+        caps = 0
+        if count:
+            caps |= CAP_RESULTS
+        if count >= 2:
+            caps |= CAP_MULTIPLE_RESULTS
+        if (~np.isnan(original_price) & ~np.isnan(discount_pct) & (discount_pct != 0)).any():
+            caps |= CAP_DISCOUNT_PAIRS
+        
+        return cls(
+            platform_lc=[r.platform_name.lower() for r in results],
+            product_lc=[r.product_name.lower() for r in results],
+            current_price=np.fromiter((r.current_price for r in results), dtype=np.float64, count=count),
+            original_price=original_price,
+            discount_pct=discount_pct,
+            is_available=np.fromiter((r.is_available for r in results), dtype=bool, count=count),
+            last_updated=np.fromiter((r.last_updated for r in results), dtype='datetime64[us]', count=count),
+            caps=caps
+        )
+
+
+@dataclass(slots=True, frozen=True)
+class RuleOutput:
+    """Outcome of a single validation rule within a report"""
+    rule_id: str
+    rule_name: str
+    status: ValidationResult
+    message: str
+    details: Dict[str, Any]
+    severity: str
+
+
+@dataclass(slots=True, frozen=True)
 class ValidationReport:
     """Report for validation test execution"""
     test_case_id: str
     query: str
     execution_time: float
     result_count: int
-    validation_results: List[Dict[str, Any]]
+    validation_results: List[RuleOutput]
     overall_status: ValidationResult
     issues_found: List[str]
     performance_metrics: Dict[str, Any]
     timestamp: datetime
 
 
+# Validation rules for different query types, shared by every validator instance
+VALIDATION_RULES: Mapping[str, ValidationRule] = MappingProxyType({
+    'price_consistency': ValidationRule(
+        rule_id='price_consistency',
+        rule_name='Price Consistency Check',
+        description='Verify that prices are within reasonable ranges and consistent',
+        validation_function='_validate_price_consistency',
+        expected_behavior='All prices should be positive and within market ranges',
+        severity='critical'
+    ),
+    'platform_availability': ValidationRule(
+        rule_id='platform_availability',
+        rule_name='Platform Availability Check',
+        description='Verify that only active platforms are included in results',
+        validation_function='_validate_platform_availability',
+        expected_behavior='Only active platforms should appear in results',
+        severity='high'
+    ),
+    'product_relevance': ValidationRule(
+        rule_id='product_relevance',
+        rule_name='Product Relevance Check',
+        description='Verify that returned products match the query intent',
+        validation_function='_validate_product_relevance',
+        expected_behavior='Products should be relevant to the search query',
+        severity='high'
+    ),
+    'discount_accuracy': ValidationRule(
+        rule_id='discount_accuracy',
+        rule_name='Discount Calculation Accuracy',
+        description='Verify that discount percentages are calculated correctly',
+        validation_function='_validate_discount_accuracy',
+        expected_behavior='Discount percentages should match price differences',
+        severity='critical'
+    ),
+    'result_ordering': ValidationRule(
+        rule_id='result_ordering',
+        rule_name='Result Ordering Check',
+        description='Verify that results are ordered according to query type',
+        validation_function='_validate_result_ordering',
+        expected_behavior='Results should be ordered appropriately (cheapest first, highest discount first, etc.)',
+        severity='medium'
+    ),
+    'data_freshness': ValidationRule(
+        rule_id='data_freshness',
+        rule_name='Data Freshness Check',
+        description='Verify that price data is recent and up-to-date',
+        validation_function='_validate_data_freshness',
+        expected_behavior='Price data should be updated within the last 24 hours',
+        severity='medium'
+    ),
+    'availability_consistency': ValidationRule(
+        rule_id='availability_consistency',
+        rule_name='Availability Consistency Check',
+        description='Verify that only available products are returned',
+        validation_function='_validate_availability_consistency',
+        expected_behavior='All returned products should be marked as available',
+        severity='high'
+    ),
+    'comparison_completeness': ValidationRule(
+        rule_id='comparison_completeness',
+        rule_name='Comparison Completeness Check',
+        description='Verify that comparison queries include multiple platforms',
+        validation_function='_validate_comparison_completeness',
+        expected_behavior='Comparison queries should include products from multiple platforms',
+        severity='medium'
+    )
+})
+
+# Default rules by query type, used when no test case supplies its own list
+DEFAULT_RULES: Mapping[str, Tuple[str, ...]] = MappingProxyType({
+    'cheapest_product': ('price_consistency', 'platform_availability', 'product_relevance', 'result_ordering', 'availability_consistency'),
+    'discount_search': ('discount_accuracy', 'platform_availability', 'result_ordering', 'availability_consistency'),
+    'price_comparison': ('price_consistency', 'platform_availability', 'product_relevance', 'comparison_completeness'),
+    'budget_optimization': ('price_consistency', 'platform_availability', 'discount_accuracy', 'availability_consistency')
+})
+FALLBACK_RULES: Tuple[str, ...] = ('price_consistency', 'platform_availability', 'availability_consistency')
+
+# Test cases for different query types
+TEST_CASES: Tuple[ValidationTestCase, ...] = (
+    # Cheapest product queries (Requirement 10.1)
+    ValidationTestCase(
+        test_id='cheapest_onions',
+        query='Which app has cheapest onions right now?',
+        query_type='cheapest_product',
+        expected_result_count_min=1,
+        expected_result_count_max=20,
+        expected_patterns=('onion',),
+        validation_rules=('price_consistency', 'platform_availability', 'product_relevance', 'result_ordering', 'availability_consistency'),
+        description='Test cheapest onions query'
+    ),
+    ValidationTestCase(
+        test_id='cheapest_tomatoes',
+        query='Which app has cheapest tomatoes right now?',
+        query_type='cheapest_product',
+        expected_result_count_min=1,
+        expected_result_count_max=20,
+        expected_patterns=('tomato',),
+        validation_rules=('price_consistency', 'platform_availability', 'product_relevance', 'result_ordering', 'availability_consistency'),
+        description='Test cheapest tomatoes query'
+    ),
+
+    # Discount queries (Requirement 10.2)
+    ValidationTestCase(
+        test_id='discount_30_percent_blinkit',
+        query='Show products with 30%+ discount on Blinkit',
+        query_type='discount_search',
+        expected_result_count_min=0,
+        expected_result_count_max=100,
+        expected_patterns=('blinkit',),
+        validation_rules=('discount_accuracy', 'platform_availability', 'result_ordering', 'availability_consistency'),
+        description='Test 30%+ discount on Blinkit query'
+    ),
+    ValidationTestCase(
+        test_id='discount_20_percent_any',
+        query='Show products with 20%+ discount',
+        query_type='discount_search',
+        expected_result_count_min=0,
+        expected_result_count_max=100,
+        expected_patterns=(),
+        validation_rules=('discount_accuracy', 'platform_availability', 'result_ordering', 'availability_consistency'),
+        description='Test 20%+ discount on any platform query'
+    ),
+
+    # Price comparison queries (Requirement 10.3)
+    ValidationTestCase(
+        test_id='compare_fruits_zepto_instamart',
+        query='Compare fruit prices between Zepto and Instamart',
+        query_type='price_comparison',
+        expected_result_count_min=0,
+        expected_result_count_max=50,
+        expected_patterns=('zepto', 'instamart', 'fruit'),
+        validation_rules=('price_consistency', 'platform_availability', 'product_relevance', 'comparison_completeness'),
+        description='Test fruit price comparison between Zepto and Instamart'
+    ),
+    ValidationTestCase(
+        test_id='compare_milk_all_platforms',
+        query='Compare milk prices between all platforms',
+        query_type='price_comparison',
+        expected_result_count_min=0,
+        expected_result_count_max=50,
+        expected_patterns=('milk',),
+        validation_rules=('price_consistency', 'platform_availability', 'product_relevance', 'comparison_completeness'),
+        description='Test milk price comparison across all platforms'
+    ),
+
+    # Budget optimization queries (Requirement 10.4)
+    ValidationTestCase(
+        test_id='budget_1000_grocery',
+        query='Find best deals for ₹1000 grocery list',
+        query_type='budget_optimization',
+        expected_result_count_min=5,
+        expected_result_count_max=30,
+        expected_patterns=('1000',),
+        validation_rules=('price_consistency', 'platform_availability', 'discount_accuracy', 'availability_consistency'),
+        description='Test ₹1000 budget optimization query'
+    ),
+    ValidationTestCase(
+        test_id='budget_500_grocery',
+        query='Find best deals for ₹500 grocery list',
+        query_type='budget_optimization',
+        expected_result_count_min=3,
+        expected_result_count_max=20,
+        expected_patterns=('500',),
+        validation_rules=('price_consistency', 'platform_availability', 'discount_accuracy', 'availability_consistency'),
+        description='Test ₹500 budget optimization query'
+    ),
+)
+
+
 class QueryAccuracyValidator:
     """
     Validates query accuracy and performance against known data patterns.
@@ -77,174 +378,35 @@ class QueryAccuracyValidator:
     
     def __init__(self):
         """Initialize the query accuracy validator."""
-        self.validation_rules = self._initialize_validation_rules()
-        self.test_cases = self._initialize_test_cases()
+        self.validation_rules = VALIDATION_RULES
+        self.test_cases = TEST_CASES
+        # Bound validator methods resolved once instead of via getattr on every rule run
+        self._validator_fns = {
+            rule_id: getattr(self, rule.validation_function)
+            for rule_id, rule in self.validation_rules.items()
+        }
+        self._exact_index, self._pattern_index = self._build_test_case_indexes(self.test_cases)
+        # Enabled rules resolved once per query type and per test case, in execution order
+        self._query_type_plans = {
+            query_type: self._build_rule_plan(rule_ids)
+            for query_type, rule_ids in DEFAULT_RULES.items()
+        }
+        self._test_case_plans = {
+            test_case.test_id: self._build_rule_plan(test_case.validation_rules)
+            for test_case in self.test_cases
+            if test_case.validation_rules
+        }
+        self._fallback_plan = self._build_rule_plan(FALLBACK_RULES)
         self.performance_thresholds = {
             'max_execution_time': 5.0,  # seconds
             'min_result_relevance': 0.8,  # 80% relevance
             'max_price_variance': 0.1,  # 10% price variance tolerance
         }
-    
-    def _initialize_validation_rules(self) -> Dict[str, ValidationRule]:
-        """Initialize validation rules for different query types."""
-        return {
-            'price_consistency': ValidationRule(
-                rule_id='price_consistency',
-                rule_name='Price Consistency Check',
-                description='Verify that prices are within reasonable ranges and consistent',
-                validation_function='_validate_price_consistency',
-                expected_behavior='All prices should be positive and within market ranges',
-                severity='critical'
-            ),
-            'platform_availability': ValidationRule(
-                rule_id='platform_availability',
-                rule_name='Platform Availability Check',
-                description='Verify that only active platforms are included in results',
-                validation_function='_validate_platform_availability',
-                expected_behavior='Only active platforms should appear in results',
-                severity='high'
-            ),
-            'product_relevance': ValidationRule(
-                rule_id='product_relevance',
-                rule_name='Product Relevance Check',
-                description='Verify that returned products match the query intent',
-                validation_function='_validate_product_relevance',
-                expected_behavior='Products should be relevant to the search query',
-                severity='high'
-            ),
-            'discount_accuracy': ValidationRule(
-                rule_id='discount_accuracy',
-                rule_name='Discount Calculation Accuracy',
-                description='Verify that discount percentages are calculated correctly',
-                validation_function='_validate_discount_accuracy',
-                expected_behavior='Discount percentages should match price differences',
-                severity='critical'
-            ),
-            'result_ordering': ValidationRule(
-                rule_id='result_ordering',
-                rule_name='Result Ordering Check',
-                description='Verify that results are ordered according to query type',
-                validation_function='_validate_result_ordering',
-                expected_behavior='Results should be ordered appropriately (cheapest first, highest discount first, etc.)',
-                severity='medium'
-            ),
-            'data_freshness': ValidationRule(
-                rule_id='data_freshness',
-                rule_name='Data Freshness Check',
-                description='Verify that price data is recent and up-to-date',
-                validation_function='_validate_data_freshness',
-                expected_behavior='Price data should be updated within the last 24 hours',
-                severity='medium'
-            ),
-            'availability_consistency': ValidationRule(
-                rule_id='availability_consistency',
-                rule_name='Availability Consistency Check',
-                description='Verify that only available products are returned',
-                validation_function='_validate_availability_consistency',
-                expected_behavior='All returned products should be marked as available',
-                severity='high'
-            ),
-            'comparison_completeness': ValidationRule(
-                rule_id='comparison_completeness',
-                rule_name='Comparison Completeness Check',
-                description='Verify that comparison queries include multiple platforms',
-                validation_function='_validate_comparison_completeness',
-                expected_behavior='Comparison queries should include products from multiple platforms',
-                severity='medium'
-            )
-        }
-    
-    def _initialize_test_cases(self) -> List[ValidationTestCase]:
-        """Initialize test cases for different query types."""
-        return [
-            # Cheapest product queries (Requirement 10.1)
-            ValidationTestCase(
-                test_id='cheapest_onions',
-                query='Which app has cheapest onions right now?',
-                query_type='cheapest_product',
-                expected_result_count_min=1,
-                expected_result_count_max=20,
-                expected_patterns=['onion'],
-                validation_rules=['price_consistency', 'platform_availability', 'product_relevance', 'result_ordering', 'availability_consistency'],
-                description='Test cheapest onions query'
-            ),
-            ValidationTestCase(
-                test_id='cheapest_tomatoes',
-                query='Which app has cheapest tomatoes right now?',
-                query_type='cheapest_product',
-                expected_result_count_min=1,
-                expected_result_count_max=20,
-                expected_patterns=['tomato'],
-                validation_rules=['price_consistency', 'platform_availability', 'product_relevance', 'result_ordering', 'availability_consistency'],
-                description='Test cheapest tomatoes query'
-            ),
-            
-            # Discount queries (Requirement 10.2)
-            ValidationTestCase(
-                test_id='discount_30_percent_blinkit',
-                query='Show products with 30%+ discount on Blinkit',
-                query_type='discount_search',
-                expected_result_count_min=0,
-                expected_result_count_max=100,
-                expected_patterns=['blinkit'],
-                validation_rules=['discount_accuracy', 'platform_availability', 'result_ordering', 'availability_consistency'],
-                description='Test 30%+ discount on Blinkit query'
-            ),
-            ValidationTestCase(
-                test_id='discount_20_percent_any',
-                query='Show products with 20%+ discount',
-                query_type='discount_search',
-                expected_result_count_min=0,
-                expected_result_count_max=100,
-                expected_patterns=[],
-                validation_rules=['discount_accuracy', 'platform_availability', 'result_ordering', 'availability_consistency'],
-                description='Test 20%+ discount on any platform query'
-            ),
-            
-            # Price comparison queries (Requirement 10.3)
-            ValidationTestCase(
-                test_id='compare_fruits_zepto_instamart',
-                query='Compare fruit prices between Zepto and Instamart',
-                query_type='price_comparison',
-                expected_result_count_min=0,
-                expected_result_count_max=50,
-                expected_patterns=['zepto', 'instamart', 'fruit'],
-                validation_rules=['price_consistency', 'platform_availability', 'product_relevance', 'comparison_completeness'],
-                description='Test fruit price comparison between Zepto and Instamart'
-            ),
-            ValidationTestCase(
-                test_id='compare_milk_all_platforms',
-                query='Compare milk prices between all platforms',
-                query_type='price_comparison',
-                expected_result_count_min=0,
-                expected_result_count_max=50,
-                expected_patterns=['milk'],
-                validation_rules=['price_consistency', 'platform_availability', 'product_relevance', 'comparison_completeness'],
-                description='Test milk price comparison across all platforms'
-            ),
-            
-            # Budget optimization queries (Requirement 10.4)
-            ValidationTestCase(
-                test_id='budget_1000_grocery',
-                query='Find best deals for ₹1000 grocery list',
-                query_type='budget_optimization',
-                expected_result_count_min=5,
-                expected_result_count_max=30,
-                expected_patterns=['1000'],
-                validation_rules=['price_consistency', 'platform_availability', 'discount_accuracy', 'availability_consistency'],
-                description='Test ₹1000 budget optimization query'
-            ),
-            ValidationTestCase(
-                test_id='budget_500_grocery',
-                query='Find best deals for ₹500 grocery list',
-                query_type='budget_optimization',
-                expected_result_count_min=3,
-                expected_result_count_max=20,
-                expected_patterns=['500'],
-                validation_rules=['price_consistency', 'platform_availability', 'discount_accuracy', 'availability_consistency'],
-                description='Test ₹500 budget optimization query'
-            ),
-        ]
+        self._platform_cache: Optional[Tuple[float, FrozenSet[str]]] = None
+        self._rule_result_cache: "OrderedDict[Tuple[str, bytes], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._report_cache: "OrderedDict[Tuple[str, str], Tuple[float, ValidationReport]]" = OrderedDict()
+        # The singleton validator is shared by request handler threads
+        self._cache_lock = threading.Lock()
     
     async def validate_query_results(
         self, 
@@ -267,60 +429,54 @@ class QueryAccuracyValidator:
         Returns:
             ValidationReport with detailed validation results
         """
+        return await self._validate_results(query, results, query_type, execution_time, db=db)
+    
+    async def _validate_results(
+        self,
+        query: str,
+        results: List[QueryResult],
+        query_type: str,
+        execution_time: float,
+        db: Optional[Session] = None,
+        db_context: Optional[Dict[str, Any]] = None
+    ) -> ValidationReport:
+        """Validate results, reusing db_context when the caller already prefetched it."""
         logger.info(f"Validating query results for: '{query}' (type: {query_type})")
         
-        validation_results = []
         issues_found = []
         overall_status = ValidationResult.PASS
+        normalized = NormalizedResults.from_results(results)
+        results_signature = self._results_signature(query, query_type, results)
         
         # Find applicable test case
         test_case = self._find_matching_test_case(query, query_type)
         
         # Get validation rules for this query type
-        applicable_rules = self._get_applicable_rules(query_type, test_case)
+        rules = self._get_rule_plan(query_type, test_case)
         
-        # Run each validation rule
-        for rule_id in applicable_rules:
-            if rule_id not in self.validation_rules:
-                continue
-                
-            rule = self.validation_rules[rule_id]
-            if not rule.enabled:
-                continue
-            
-            try:
-                # Execute validation function
-                validation_func = getattr(self, rule.validation_function)
-                rule_result = await validation_func(query, results, query_type, db)
-                
-                validation_results.append({
-                    'rule_id': rule_id,
-                    'rule_name': rule.rule_name,
-                    'status': rule_result['status'],
-                    'message': rule_result['message'],
-                    'details': rule_result.get('details', {}),
-                    'severity': rule.severity
-                })
-                
-                # Update overall status
-                if rule_result['status'] == ValidationResult.FAIL:
-                    if rule.severity in ['critical', 'high']:
-                        overall_status = ValidationResult.FAIL
-                    elif overall_status == ValidationResult.PASS:
-                        overall_status = ValidationResult.WARNING
-                    
-                    issues_found.append(f"{rule.rule_name}: {rule_result['message']}")
+        # Run all enabled validation rules concurrently
+        # Rules whose required data is absent are skipped without being scheduled
+        validation_results = [self._capability_skip(rule, normalized.caps) for rule in rules]
+        pending = [i for i, rule_output in enumerate(validation_results) if rule_output is None]
+        # All database lookups the rules need are made once here, not per rule
+        if db_context is None:
+            db_context = await self._prefetch_db_context(db) if pending else {}
+        rule_outputs = await asyncio.gather(*[
+            self._run_single_rule(rules[i], query, results, query_type, db_context, normalized, results_signature)
+            for i in pending
+        ])
+        for i, rule_output in zip(pending, rule_outputs):
+            validation_results[i] = rule_output
+        
+        # Update overall status
+        for rule, rule_output in zip(rules, validation_results):
+            if rule_output.status is ValidationResult.FAIL:
+                if rule.severity in HIGH_SEVERITIES:
+                    overall_status = ValidationResult.FAIL
+                elif overall_status is ValidationResult.PASS:
+                    overall_status = ValidationResult.WARNING
                 
-            except Exception as e:
-                logger.error(f"Error executing validation rule {rule_id}: {str(e)}")
-                validation_results.append({
-                    'rule_id': rule_id,
-                    'rule_name': rule.rule_name,
-                    'status': ValidationResult.SKIP,
-                    'message': f"Validation error: {str(e)}",
-                    'details': {},
-                    'severity': rule.severity
-                })
+                issues_found.append(f"{rule.rule_name}: {rule_output.message}")
         
         # Performance metrics
         performance_metrics = {
@@ -346,77 +502,183 @@ class QueryAccuracyValidator:
         logger.info(f"Validation completed: {overall_status.value} ({len(issues_found)} issues found)")
         return report
     
+    @staticmethod
+    def _capability_skip(rule: ValidationRule, caps: int) -> Optional[RuleOutput]:
+        """Build a SKIP entry when the results lack data the rule requires, else None."""
+        missing = REQUIRED_CAPS.get(rule.rule_id, 0) & ~caps
+        if not missing:
+            return None
+        
+        message = next(text for cap, text in CAPABILITY_SKIP_MESSAGES if missing & cap)
+        return RuleOutput(
+            rule_id=rule.rule_id,
+            rule_name=rule.rule_name,
+            status=ValidationResult.SKIP,
+            message=message,
+            details={},
+            severity=rule.severity
+        )
+    
+    async def _run_single_rule(
+        self,
+        rule: ValidationRule,
+        query: str,
+        results: List[QueryResult],
+        query_type: str,
+        db_context: Dict[str, Any],
+        normalized: NormalizedResults,
+        results_signature: bytes
+    ) -> RuleOutput:
+        """Run one validation rule, serving it from the rule cache when possible."""
+        try:
+            rule_id = rule.rule_id
+            cacheable = rule_id not in UNCACHED_RULES
+            rule_result = None
+            if cacheable:
+                context_inputs = tuple(db_context[key] for key in RULE_CONTEXT_KEYS.get(rule_id, ()))
+                cache_key = (rule_id, results_signature, context_inputs)
+                rule_result = self._cache_get(self._rule_result_cache, cache_key)
+            
+            if rule_result is None:
+                # Execute validation function
+                rule_result = await self._validator_fns[rule_id](query, results, query_type, db_context, normalized)
+                if cacheable:
+                    self._cache_set(
+                        self._rule_result_cache, cache_key, rule_result,
+                        RULE_RESULT_CACHE_TTL_SECONDS, RULE_RESULT_CACHE_MAXSIZE
+                    )
+            
+            return RuleOutput(
+                rule_id=rule.rule_id,
+                rule_name=rule.rule_name,
+                status=rule_result['status'],
+                message=rule_result['message'],
+                details=rule_result.get('details', {}),
+                severity=rule.severity
+            )
+            
+        except Exception as e:
+            logger.error(f"Error executing validation rule {rule.rule_id}: {str(e)}")
+            return RuleOutput(
+                rule_id=rule.rule_id,
+                rule_name=rule.rule_name,
+                status=ValidationResult.SKIP,
+                message=f"Validation error: {str(e)}",
+                details={},
+                severity=rule.severity
+            )
+    
+    @staticmethod
+    def _results_signature(query: str, query_type: str, results: List[QueryResult]) -> bytes:
+        """Hash the query and every field the rules read from the results."""
+        rows = tuple(
+            (r.product_name, r.platform_name, r.current_price, r.original_price,
+             r.discount_percentage, r.is_available, r.last_updated)
+            for r in results
+        )
+        raw = f"{query}\x00{query_type}\x00{rows!r}"
+        return hashlib.blake2b(raw.encode(), digest_size=16).digest()
+    
+    def _cache_get(self, cache: OrderedDict, key: Any) -> Optional[Any]:
+        """Return a cached value if present and not expired."""
+        with self._cache_lock:
+            entry = cache.get(key)
+            if entry is None:
+                return None
+            
+            expires_at, value = entry
+            if time.monotonic() > expires_at:
+                del cache[key]
+                return None
+            
+            cache.move_to_end(key)
+            return value
+    
+    def _cache_set(self, cache: OrderedDict, key: Any, value: Any, ttl: int, maxsize: int):
+        """Store a value, evicting the least recently used entry when full."""
+        with self._cache_lock:
+            cache[key] = (time.monotonic() + ttl, value)
+            cache.move_to_end(key)
+            if len(cache) > maxsize:
+                cache.popitem(last=False)
+    
+    @staticmethod
+    def _build_test_case_indexes(
+        test_cases: Sequence[ValidationTestCase]
+    ) -> Tuple[Dict[str, ValidationTestCase], Dict[str, Dict[str, List[int]]]]:
+        """Index test cases by exact query and by query type -> pattern -> test case positions."""
+        exact_index: Dict[str, ValidationTestCase] = {}
+        pattern_index: Dict[str, Dict[str, List[int]]] = defaultdict(lambda: defaultdict(list))
+        
+        for position, test_case in enumerate(test_cases):
+            exact_index.setdefault(test_case.query.lower(), test_case)
+            for pattern in test_case.expected_patterns:
+                pattern_index[test_case.query_type][pattern.lower()].append(position)
+        
+        return exact_index, pattern_index
+    
     def _find_matching_test_case(self, query: str, query_type: str) -> Optional[ValidationTestCase]:
         """Find the most matching test case for the query."""
         query_lower = query.lower()
         
         # Find exact matches first
-        for test_case in self.test_cases:
-            if test_case.query.lower() == query_lower:
-                return test_case
+        test_case = self._exact_index.get(query_lower)
+        if test_case is not None:
+            return test_case
         
-        # Find matches by query type and patterns
-        best_match = None
-        best_score = 0
+        # Score only the test cases whose patterns occur in the query
+        scores: Counter = Counter()
+        for pattern, positions in self._pattern_index.get(query_type, {}).items():
+            if pattern in query_lower:
+                scores.update(positions)
         
-        for test_case in self.test_cases:
-            if test_case.query_type != query_type:
-                continue
-            
-            score = 0
-            for pattern in test_case.expected_patterns:
-                if pattern.lower() in query_lower:
-                    score += 1
-            
-            if score > best_score:
-                best_score = score
-                best_match = test_case
+        if not scores:
+            return None
         
-        return best_match
+        # Highest score wins; ties go to the earliest declared test case
+        best_position = min(scores, key=lambda position: (-scores[position], position))
+        return self.test_cases[best_position]
     
-    def _get_applicable_rules(self, query_type: str, test_case: Optional[ValidationTestCase]) -> List[str]:
-        """Get applicable validation rules for a query type."""
+    def _build_rule_plan(self, rule_ids: Sequence[str]) -> Tuple[ValidationRule, ...]:
+        """Resolve rule ids to the existing, enabled rules in execution order."""
+        return tuple(
+            self.validation_rules[rule_id]
+            for rule_id in rule_ids
+            if rule_id in self.validation_rules and self.validation_rules[rule_id].enabled
+        )
+    
+    def _get_rule_plan(self, query_type: str, test_case: Optional[ValidationTestCase]) -> Tuple[ValidationRule, ...]:
+        """Get the precomputed validation rules for a query type."""
         if test_case and test_case.validation_rules:
-            return test_case.validation_rules
-        
-        # Default rules by query type
-        default_rules = {
-            'cheapest_product': ['price_consistency', 'platform_availability', 'product_relevance', 'result_ordering', 'availability_consistency'],
-            'discount_search': ['discount_accuracy', 'platform_availability', 'result_ordering', 'availability_consistency'],
-            'price_comparison': ['price_consistency', 'platform_availability', 'product_relevance', 'comparison_completeness'],
-            'budget_optimization': ['price_consistency', 'platform_availability', 'discount_accuracy', 'availability_consistency']
-        }
+            plan = self._test_case_plans.get(test_case.test_id)
+            if plan is not None:
+                return plan
+            return self._build_rule_plan(test_case.validation_rules)
         
-        return default_rules.get(query_type, ['price_consistency', 'platform_availability', 'availability_consistency'])
+        return self._query_type_plans.get(query_type, self._fallback_plan)
     
-    async def _validate_price_consistency(self, query: str, results: List[QueryResult], query_type: str, db: Session) -> Dict[str, Any]:
+    async def _validate_price_consistency(self, query: str, results: List[QueryResult], query_type: str, db_context: Dict[str, Any], normalized: NormalizedResults) -> Dict[str, Any]:
         """Validate that prices are consistent and reasonable."""
         if not results:
             return {'status': ValidationResult.SKIP, 'message': 'No results to validate'}
         
         issues = []
         
+        invalid_count, outlier_count, discount_issue_count = _score_prices(
+            normalized.current_price, normalized.original_price
+        )
+        
         # Check for negative or zero prices
-        invalid_prices = [r for r in results if r.current_price <= 0]
-        if invalid_prices:
-            issues.append(f"Found {len(invalid_prices)} products with invalid prices (≤0)")
+        if invalid_count:
+            issues.append(f"Found {invalid_count} products with invalid prices (≤0)")
         
         # Check for extremely high prices (outliers)
-        prices = [r.current_price for r in results]
-        if prices:
-            avg_price = sum(prices) / len(prices)
-            outliers = [r for r in results if r.current_price > avg_price * 10]  # 10x average
-            if outliers:
-                issues.append(f"Found {len(outliers)} potential price outliers")
+        if outlier_count:
+            issues.append(f"Found {outlier_count} potential price outliers")
         
         # Check original price vs current price consistency
-        discount_issues = []
-        for result in results:
-            if result.original_price and result.current_price > result.original_price:
-                discount_issues.append(result.product_name)
-        
-        if discount_issues:
-            issues.append(f"Found {len(discount_issues)} products where current price > original price")
+        if discount_issue_count:
+            issues.append(f"Found {discount_issue_count} products where current price > original price")
         
         status = ValidationResult.FAIL if issues else ValidationResult.PASS
         message = '; '.join(issues) if issues else 'All prices are consistent'
@@ -426,23 +688,50 @@ class QueryAccuracyValidator:
             'message': message,
             'details': {
                 'total_products': len(results),
-                'invalid_prices': len(invalid_prices),
-                'price_outliers': len(outliers) if 'outliers' in locals() else 0,
-                'discount_issues': len(discount_issues)
+                'invalid_prices': invalid_count,
+                'price_outliers': outlier_count,
+                'discount_issues': discount_issue_count
             }
         }
     
-    async def _validate_platform_availability(self, query: str, results: List[QueryResult], query_type: str, db: Session) -> Dict[str, Any]:
+    async def _prefetch_db_context(self, db: Session) -> Dict[str, Any]:
+        """Collect the database state shared by all rules in one pass."""
+        try:
+            active_platforms = self._get_active_platforms(db)
+        except Exception as e:
+            logger.error(f"Error loading active platforms for validation: {str(e)}")
+            active_platforms = None
+        
+        return {
+            'active_platforms': active_platforms,
+            'now': datetime.utcnow()
+        }
+    
+    def _get_active_platforms(self, db: Session) -> FrozenSet[str]:
+        """Get lowercased active platform names, re-reading them at most once per TTL."""
+        now = time.monotonic()
+        if self._platform_cache is not None:
+            cached_at, platform_names = self._platform_cache
+            if now - cached_at < PLATFORM_CACHE_TTL_SECONDS:
+                return platform_names
+        
+        # Single-column Core fetch: plain tuples, no ORM entity or identity-map bookkeeping
+        rows = db.execute(select(Platform.name).where(Platform.is_active.is_(True))).all()
+        platform_names = frozenset(name.lower() for (name,) in rows)
+        self._platform_cache = (now, platform_names)
+        return platform_names
+    
+    async def _validate_platform_availability(self, query: str, results: List[QueryResult], query_type: str, db_context: Dict[str, Any], normalized: NormalizedResults) -> Dict[str, Any]:
         """Validate that only active platforms are included."""
         if not results:
             return {'status': ValidationResult.SKIP, 'message': 'No results to validate'}
         
-        # Get active platforms from database
-        active_platforms = db.query(Platform.name).filter(Platform.is_active == True).all()
-        active_platform_names = {p.name.lower() for p in active_platforms}
+        active_platform_names = db_context['active_platforms']
+        if active_platform_names is None:
+            return {'status': ValidationResult.SKIP, 'message': 'Active platforms could not be loaded'}
         
         # Check if all result platforms are active
-        result_platforms = {r.platform_name.lower() for r in results}
+        result_platforms = set(normalized.platform_lc)
         inactive_platforms = result_platforms - active_platform_names
         
         status = ValidationResult.FAIL if inactive_platforms else ValidationResult.PASS
@@ -458,30 +747,21 @@ class QueryAccuracyValidator:
             }
         }
     
-    async def _validate_product_relevance(self, query: str, results: List[QueryResult], query_type: str, db: Session) -> Dict[str, Any]:
+    async def _validate_product_relevance(self, query: str, results: List[QueryResult], query_type: str, db_context: Dict[str, Any], normalized: NormalizedResults) -> Dict[str, Any]:
         """Validate that products are relevant to the query."""
         if not results:
             return {'status': ValidationResult.SKIP, 'message': 'No results to validate'}
         
         # Extract expected product keywords from query
-        query_lower = query.lower()
-        product_keywords = []
-        
-        # Common product extraction patterns
-        common_products = ['onion', 'tomato', 'potato', 'apple', 'banana', 'milk', 'bread', 'rice', 'fruit']
-        for product in common_products:
-            if product in query_lower:
-                product_keywords.append(product)
+        found = set(_COMMON_PRODUCTS_RE.findall(query.lower()))
+        product_keywords = [product for product in COMMON_PRODUCTS if product in found]
         
         if not product_keywords:
             return {'status': ValidationResult.SKIP, 'message': 'No specific product keywords found in query'}
         
-        # Check relevance
-        relevant_count = 0
-        for result in results:
-            product_name_lower = result.product_name.lower()
-            if any(keyword in product_name_lower for keyword in product_keywords):
-                relevant_count += 1
+        # Check relevance with a single scan per product name
+        keyword_re = re.compile('|'.join(map(re.escape, product_keywords)))
+        relevant_count = sum(1 for product_name_lower in normalized.product_lc if keyword_re.search(product_name_lower))
         
         relevance_ratio = relevant_count / len(results) if results else 0
         threshold = self.performance_thresholds['min_result_relevance']
@@ -500,43 +780,51 @@ class QueryAccuracyValidator:
             }
         }
     
-    async def _validate_discount_accuracy(self, query: str, results: List[QueryResult], query_type: str, db: Session) -> Dict[str, Any]:
+    async def _validate_discount_accuracy(self, query: str, results: List[QueryResult], query_type: str, db_context: Dict[str, Any], normalized: NormalizedResults) -> Dict[str, Any]:
         """Validate discount calculation accuracy."""
         if not results:
             return {'status': ValidationResult.SKIP, 'message': 'No results to validate'}
         
-        discount_errors = []
+        orig = normalized.original_price
+        actual = normalized.discount_pct
+        discounted_mask = ~np.isnan(actual) & (actual != 0)
+        checkable_mask = discounted_mask & ~np.isnan(orig)
         
-        for result in results:
-            if result.original_price and result.discount_percentage:
-                # Calculate expected discount percentage
-                expected_discount = ((result.original_price - result.current_price) / result.original_price) * 100
-                actual_discount = result.discount_percentage
-                
-                # Allow small tolerance for rounding
-                tolerance = 1.0  # 1% tolerance
-                if abs(expected_discount - actual_discount) > tolerance:
-                    discount_errors.append({
-                        'product': result.product_name,
-                        'expected': expected_discount,
-                        'actual': actual_discount,
-                        'difference': abs(expected_discount - actual_discount)
-                    })
+        if not checkable_mask.any():
+            return {'status': ValidationResult.SKIP, 'message': 'No discounted products with original prices to validate'}
+        
+        # Calculate expected discount percentages; missing original prices are NaN and drop out
+        expected = (orig - normalized.current_price) / orig * 100
+        difference = np.abs(expected - actual)
+        
+        # Allow small tolerance for rounding
+        tolerance = 1.0  # 1% tolerance
+        error_indices = np.flatnonzero(checkable_mask & (difference > tolerance))
+        
+        discount_errors = [
+            {
+                'product': results[i].product_name,
+                'expected': float(expected[i]),
+                'actual': results[i].discount_percentage,
+                'difference': float(difference[i])
+            }
+            for i in error_indices[:5]  # Show first 5 errors
+        ]
         
         status = ValidationResult.FAIL if discount_errors else ValidationResult.PASS
-        message = f"Found {len(discount_errors)} discount calculation errors" if discount_errors else "All discount calculations are accurate"
+        message = f"Found {len(error_indices)} discount calculation errors" if discount_errors else "All discount calculations are accurate"
         
         return {
             'status': status,
             'message': message,
             'details': {
-                'total_discounted_products': len([r for r in results if r.discount_percentage]),
-                'calculation_errors': len(discount_errors),
-                'error_details': discount_errors[:5]  # Show first 5 errors
+                'total_discounted_products': int(discounted_mask.sum()),
+                'calculation_errors': len(error_indices),
+                'error_details': discount_errors
             }
         }
     
-    async def _validate_result_ordering(self, query: str, results: List[QueryResult], query_type: str, db: Session) -> Dict[str, Any]:
+    async def _validate_result_ordering(self, query: str, results: List[QueryResult], query_type: str, db_context: Dict[str, Any], normalized: NormalizedResults) -> Dict[str, Any]:
         """Validate that results are ordered correctly."""
         if len(results) < 2:
             return {'status': ValidationResult.SKIP, 'message': 'Not enough results to validate ordering'}
@@ -547,20 +835,15 @@ class QueryAccuracyValidator:
         if query_type == 'cheapest_product' or 'cheapest' in query.lower():
             # Should be ordered by price ascending
             expected_order = "price ascending"
-            for i in range(len(results) - 1):
-                if results[i].current_price > results[i + 1].current_price:
-                    ordering_correct = False
-                    break
+            ordering_correct = _is_monotonic(normalized.current_price)
         
         elif query_type == 'discount_search' or 'discount' in query.lower():
             # Should be ordered by discount percentage descending
             expected_order = "discount descending"
-            for i in range(len(results) - 1):
-                discount1 = results[i].discount_percentage or 0
-                discount2 = results[i + 1].discount_percentage or 0
-                if discount1 < discount2:
-                    ordering_correct = False
-                    break
+            ordering_correct = _is_monotonic(
+                np.nan_to_num(normalized.discount_pct, nan=0.0),
+                descending=True
+            )
         
         else:
             return {'status': ValidationResult.SKIP, 'message': 'No specific ordering requirement for this query type'}
@@ -578,17 +861,13 @@ class QueryAccuracyValidator:
             }
         }
     
-    async def _validate_data_freshness(self, query: str, results: List[QueryResult], query_type: str, db: Session) -> Dict[str, Any]:
+    async def _validate_data_freshness(self, query: str, results: List[QueryResult], query_type: str, db_context: Dict[str, Any], normalized: NormalizedResults) -> Dict[str, Any]:
         """Validate that data is fresh and up-to-date."""
         if not results:
             return {'status': ValidationResult.SKIP, 'message': 'No results to validate'}
         
-        cutoff_time = datetime.utcnow() - timedelta(hours=24)
-        stale_count = 0
-        
-        for result in results:
-            if result.last_updated < cutoff_time:
-                stale_count += 1
+        cutoff_time = np.datetime64(db_context['now'] - timedelta(hours=24), 'us')
+        stale_count = int((normalized.last_updated < cutoff_time).sum())
         
         freshness_ratio = (len(results) - stale_count) / len(results) if results else 0
         
@@ -606,12 +885,12 @@ class QueryAccuracyValidator:
             }
         }
     
-    async def _validate_availability_consistency(self, query: str, results: List[QueryResult], query_type: str, db: Session) -> Dict[str, Any]:
+    async def _validate_availability_consistency(self, query: str, results: List[QueryResult], query_type: str, db_context: Dict[str, Any], normalized: NormalizedResults) -> Dict[str, Any]:
         """Validate that only available products are returned."""
         if not results:
             return {'status': ValidationResult.SKIP, 'message': 'No results to validate'}
         
-        unavailable_count = len([r for r in results if not r.is_available])
+        unavailable_count = int((~normalized.is_available).sum())
         
         status = ValidationResult.FAIL if unavailable_count > 0 else ValidationResult.PASS
         message = f"Found {unavailable_count} unavailable products" if unavailable_count > 0 else "All products are available"
@@ -626,12 +905,13 @@ class QueryAccuracyValidator:
             }
         }
     
-    async def _validate_comparison_completeness(self, query: str, results: List[QueryResult], query_type: str, db: Session) -> Dict[str, Any]:
+    async def _validate_comparison_completeness(self, query: str, results: List[QueryResult], query_type: str, db_context: Dict[str, Any], normalized: NormalizedResults) -> Dict[str, Any]:
         """Validate that comparison queries include multiple platforms."""
         if not results:
             return {'status': ValidationResult.SKIP, 'message': 'No results to validate'}
         
-        unique_platforms = len(set(r.platform_name for r in results))
+        platforms = {r.platform_name for r in results}
+        unique_platforms = len(platforms)
         
         status = ValidationResult.PASS if unique_platforms >= 2 else ValidationResult.WARNING
         message = f"Comparison includes {unique_platforms} platforms"
@@ -641,7 +921,7 @@ class QueryAccuracyValidator:
             'message': message,
             'details': {
                 'unique_platforms': unique_platforms,
-                'platforms': list(set(r.platform_name for r in results))
+                'platforms': list(platforms)
             }
         }
     
@@ -662,86 +942,177 @@ class QueryAccuracyValidator:
         
         return max(0, min(100, score))
     
-    async def run_regression_tests(self, db: Session) -> List[ValidationReport]:
+    async def run_regression_tests(self, db: Session) -> AsyncIterator[ValidationReport]:
         """
-        Run all test cases for regression testing.
+        Run all test cases for regression testing, yielding each report as soon as it is ready.
+        
+        Test cases sharing a query type are executed together through the
+        bulk handlers, so each type costs one database round trip. Reports are
+        still yielded in test case declaration order, so callers can process
+        or persist them incrementally instead of holding the full list.
         
         Args:
             db: Database session
             
-        Returns:
-            List of validation reports for all test cases
+        Yields:
+            Validation report for each test case
         """
         logger.info("Running regression tests for query accuracy validation")
         
-        reports = []
+        handlers = get_sample_query_handlers()
+        dispatch = {
+            'cheapest_product': handlers.handle_cheapest_product_queries_bulk,
+            'discount_search': handlers.handle_discount_queries_bulk,
+            'price_comparison': handlers.handle_price_comparison_queries_bulk,
+            'budget_optimization': handlers.handle_budget_optimization_queries_bulk
+        }
         
-        # Import here to avoid circular imports
-        from app.services.sample_query_handlers import get_sample_query_handlers
+        # Group by query type, remembering each test case's declaration position
+        groups: Dict[str, List[Tuple[int, ValidationTestCase]]] = defaultdict(list)
+        for index, test_case in enumerate(self.test_cases):
+            query_type = test_case.query_type
+            if query_type not in dispatch:
+                logger.warning("Unknown query type: %s", query_type)
+                continue
+            groups[query_type].append((index, test_case))
         
-        handlers = get_sample_query_handlers()
+        executed = 0
+        # Groups run as tasks on the caller's loop and share its session
+        group_futures = [
+            asyncio.ensure_future(
+                self._run_regression_group([test_case for _, test_case in members], dispatch[query_type], db)
+            )
+            for query_type, members in groups.items()
+        ]
         
-        for test_case in self.test_cases:
-            logger.info(f"Running test case: {test_case.test_id}")
-            
-            try:
-                start_time = time.time()
-                
-                # Execute query based on type
-                if test_case.query_type == 'cheapest_product':
-                    results = await handlers.handle_cheapest_product_query(db, test_case.query)
-                elif test_case.query_type == 'discount_search':
-                    results = await handlers.handle_discount_query(db, test_case.query)
-                elif test_case.query_type == 'price_comparison':
-                    results = await handlers.handle_price_comparison_query(db, test_case.query)
-                elif test_case.query_type == 'budget_optimization':
-                    results = await handlers.handle_budget_optimization_query(db, test_case.query)
-                else:
-                    logger.warning(f"Unknown query type: {test_case.query_type}")
-                    continue
-                
-                execution_time = time.time() - start_time
-                
-                # Validate results
-                report = await self.validate_query_results(
-                    test_case.query, 
-                    results, 
-                    test_case.query_type, 
-                    execution_time, 
-                    db
-                )
-                
-                reports.append(report)
-                
-                logger.info(f"Test case {test_case.test_id} completed: {report.overall_status.value}")
-                
-            except Exception as e:
-                logger.error(f"Error running test case {test_case.test_id}: {str(e)}")
-                
-                # Create error report
-                error_report = ValidationReport(
-                    test_case_id=test_case.test_id,
-                    query=test_case.query,
-                    execution_time=0.0,
-                    result_count=0,
-                    validation_results=[],
-                    overall_status=ValidationResult.FAIL,
-                    issues_found=[f"Test execution failed: {str(e)}"],
-                    performance_metrics={},
-                    timestamp=datetime.utcnow()
-                )
-                reports.append(error_report)
-        
-        logger.info(f"Regression testing completed: {len(reports)} test cases executed")
+        owners = {
+            index: (group_future, position)
+            for group_future, members in zip(group_futures, groups.values())
+            for position, (index, _) in enumerate(members)
+        }
+        try:
+            # Groups run concurrently; walking declaration order keeps the output ordered
+            for index in sorted(owners):
+                group_future, position = owners[index]
+                reports = await group_future
+                executed += 1
+                yield reports[position]
+        finally:
+            for group_future in group_futures:
+                group_future.cancel()
+        
+        logger.info("Regression testing completed: %d test cases executed", executed)
+    
+    async def run_regression_tests_list(self, db: Session) -> List[ValidationReport]:
+        """Run all regression test cases and collect the reports into a list."""
+        return [report async for report in self.run_regression_tests(db)]
+    
+    async def _run_regression_group(
+        self,
+        test_cases: Sequence[ValidationTestCase],
+        bulk_handler: Callable[..., Awaitable[List[List[QueryResult]]]],
+        db: Session
+    ) -> List[ValidationReport]:
+        """Execute same-type test cases with one bulk query and validate each result set."""
+        reports: List[Optional[ValidationReport]] = [None] * len(test_cases)
+        pending: List[int] = []
+        report_cache = self._report_cache
+        for position, test_case in enumerate(test_cases):
+            test_id = test_case.test_id
+            logger.info("Running test case: %s", test_id)
+            cache_key = (test_case.query_type, test_case.query.strip().lower())
+            cached_report = self._cache_get(report_cache, cache_key)
+            if cached_report is not None:
+                logger.info("Test case %s served from report cache", test_id)
+                reports[position] = replace(cached_report, timestamp=datetime.utcnow())
+            else:
+                pending.append(position)
+        
+        if not pending:
+            return reports
+        
+        queries = [test_cases[position].query for position in pending]
+        start_time = time.perf_counter()
+        try:
+            # Execute every uncached query of this type in one statement
+            result_sets = await bulk_handler(db, queries)
+        except Exception as e:
+            for position in pending:
+                reports[position] = self._regression_error_report(test_cases[position], e)
+            return reports
+        
+        # The round trip is shared, so each test case is charged an equal slice of it
+        execution_time = (time.perf_counter() - start_time) / len(pending)
+        
+        # Validation itself never touches the session; its database state is loaded once per group
+        db_context = await self._prefetch_db_context(db)
+        validated = await asyncio.gather(*[
+            self._validate_regression_test_case(test_cases[position], results, execution_time, db_context)
+            for position, results in zip(pending, result_sets)
+        ])
+        for position, report in zip(pending, validated):
+            reports[position] = report
         return reports
+    
+    async def _validate_regression_test_case(
+        self,
+        test_case: ValidationTestCase,
+        results: List[QueryResult],
+        execution_time: float,
+        db_context: Dict[str, Any]
+    ) -> ValidationReport:
+        """Validate one regression test case's results and cache the report unless it failed."""
+        query = test_case.query
+        query_type = test_case.query_type
+        try:
+            report = await self._validate_results(
+                query, 
+                results, 
+                query_type, 
+                execution_time, 
+                db_context=db_context
+            )
+        except Exception as e:
+            # Contained here so one bad case fails alone instead of the whole group
+            return self._regression_error_report(test_case, e)
+        
+        # Failures are never cached so they are re-run next time
+        overall_status = report.overall_status
+        if overall_status is not ValidationResult.FAIL:
+            cache_key = (query_type, query.strip().lower())
+            self._cache_set(self._report_cache, cache_key, report, REPORT_CACHE_TTL_SECONDS, REPORT_CACHE_MAXSIZE)
+        
+        logger.info("Test case %s completed: %s", test_case.test_id, overall_status.value)
+        return report
+    
+    def _regression_error_report(self, test_case: ValidationTestCase, error: Exception) -> ValidationReport:
+        """Build the failure report for a test case whose query could not be executed."""
+        # Only called from an except block, so the traceback is still available
+        logger.exception("Error running test case %s", test_case.test_id)
+        
+        # Create error report
+        return ValidationReport(
+            test_case_id=test_case.test_id,
+            query=test_case.query,
+            execution_time=0.0,
+            result_count=0,
+            validation_results=[],
+            overall_status=ValidationResult.FAIL,
+            issues_found=[f"Test execution failed: {str(error)}"],
+            performance_metrics={},
+            timestamp=datetime.utcnow()
+        )
 
 
 # Singleton instance
 _query_accuracy_validator = None
+_query_accuracy_validator_lock = threading.Lock()
 
 def get_query_accuracy_validator() -> QueryAccuracyValidator:
     """Get singleton instance of QueryAccuracyValidator."""
     global _query_accuracy_validator
     if _query_accuracy_validator is None:
-        _query_accuracy_validator = QueryAccuracyValidator()
+        with _query_accuracy_validator_lock:
+            if _query_accuracy_validator is None:
+                _query_accuracy_validator = QueryAccuracyValidator()
     return _query_accuracy_validator
\ No newline at end of file
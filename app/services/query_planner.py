@@ -3,12 +3,25 @@ Query Planner and Optimizer for Quick Commerce Deals platform.
 Provides intelligent query planning, join optimization, and execution plan generation.
 """
 
+import asyncio
+import functools
+import hashlib
+import heapq
+import json
 import logging
+import re
+import threading
 import time
-from typing import Dict, List, Optional, Tuple, Set, Any
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from math import inf
+from typing import Dict, FrozenSet, Iterator, List, Optional, Tuple, Set, Any
 from dataclasses import dataclass
 from enum import Enum
 import networkx as nx
+import numpy as np
 from sqlalchemy import text, inspect, MetaData
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.exc import SQLAlchemyError
@@ -19,6 +32,24 @@ from app.core.cache import cache_manager, CacheNamespace
 
 logger = logging.getLogger(__name__)
 
+# Concurrent schema inspection workers; stays within the default connection pool (10 + 20 overflow)
+SCHEMA_INSPECTION_WORKERS = 8
+
+# Tables counted per UNION ALL statement when catalog statistics are unavailable
+TABLE_COUNT_CHUNK_SIZE = 50
+
+# Spanning-tree join paths (LRU) and row sums (FIFO) kept per distinct table set
+JOIN_PATH_CACHE_MAXSIZE = 512
+
+# Largest table set ordered exhaustively; the subset DP does O(n * 2^n) work
+DP_JOIN_ORDER_MAX_TABLES = 10
+
+# Optimizer comment headers (LRU) kept per distinct plan shape
+COMMENT_HEADER_CACHE_MAXSIZE = 1024
+
+# Estimated rows above which a bare COUNT(*) is answered from PostgreSQL statistics
+APPROXIMATE_COUNT_MIN_ROWS = 10_000_000
+
 
 class JoinType(Enum):
     """Enumeration of SQL join types"""
@@ -36,7 +67,7 @@ class QueryComplexity(Enum):
     VERY_COMPLEX = "very_complex"
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class JoinPath:
     """Represents a join path between two tables"""
     from_table: str
@@ -45,9 +76,38 @@ class JoinPath:
     condition: str
     cost_estimate: float
     confidence: float
+    from_column: str
+    to_column: str
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize to a JSON-compatible dict."""
+        return {
+            'from_table': self.from_table,
+            'to_table': self.to_table,
+            'join_type': self.join_type.value,
+            'condition': self.condition,
+            'cost_estimate': self.cost_estimate,
+            'confidence': self.confidence,
+            'from_column': self.from_column,
+            'to_column': self.to_column
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "JoinPath":
+        """Rebuild a join path from to_dict() output."""
+        return cls(
+            from_table=data['from_table'],
+            to_table=data['to_table'],
+            join_type=_JOIN_TYPE_MAP[data['join_type']],
+            condition=data['condition'],
+            cost_estimate=data['cost_estimate'],
+            confidence=data['confidence'],
+            from_column=data.get('from_column', ''),
+            to_column=data.get('to_column', '')
+        )
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class QueryExecutionPlan:
     """Represents a complete query execution plan"""
     tables: List[str]
@@ -58,6 +118,90 @@ class QueryExecutionPlan:
     optimization_suggestions: List[str]
     index_recommendations: List[str]
     execution_time_estimate: float
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize to a JSON-compatible dict."""
+        return {
+            'tables': self.tables,
+            'join_order': self.join_order,
+            'join_paths': [join_path.to_dict() for join_path in self.join_paths],
+            'estimated_cost': self.estimated_cost,
+            'complexity': self.complexity.value,
+            'optimization_suggestions': self.optimization_suggestions,
+            'index_recommendations': self.index_recommendations,
+            'execution_time_estimate': self.execution_time_estimate
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "QueryExecutionPlan":
+        """Rebuild a plan from to_dict() output."""
+        return cls(
+            tables=data['tables'],
+            join_order=data['join_order'],
+            join_paths=[JoinPath.from_dict(join_path) for join_path in data['join_paths']],
+            estimated_cost=data['estimated_cost'],
+            complexity=QueryComplexity(data['complexity']),
+            optimization_suggestions=data['optimization_suggestions'],
+            index_recommendations=data['index_recommendations'],
+            execution_time_estimate=data['execution_time_estimate']
+        )
+
+
+# Upper bounds (inclusive) of each complexity factor's score bands
+_TABLE_COUNT_THRESHOLDS = (1, 2, 4, 6)
+_JOIN_COUNT_THRESHOLDS = (0, 2, 4, 6)
+_ROW_COUNT_THRESHOLDS = (10_000, 100_000, 1_000_000)
+_COMPLEXITY_SCORE_THRESHOLDS = (4, 7, 11)
+_COMPLEXITY_LEVELS = (
+    QueryComplexity.SIMPLE,
+    QueryComplexity.MODERATE,
+    QueryComplexity.COMPLEX,
+    QueryComplexity.VERY_COMPLEX
+)
+
+# Query keywords that trigger pattern suggestions; unanchored so "prices" or "discounted" still match
+_SUGGESTION_KEYWORDS_RE = re.compile(r"price|discount")
+
+# Keyword probes run over an ASCII-uppercased byte copy of the query (SQL keywords are ASCII);
+# only the multi-word constructs need a pattern, and their literal prefixes keep the search fast
+_ORDER_BY_RE = re.compile(rb"ORDER\s+BY")
+_COUNT_STAR_RE = re.compile(rb"COUNT\s*\(\s*\*\s*\)")
+
+# A whole-table row count with no filtering, the only COUNT(*) shape statistics can answer
+_BARE_COUNT_RE = re.compile(
+    r'\s*SELECT\s+COUNT\s*\(\s*\*\s*\)(?:\s+AS\s+"?(?P<alias>\w+)"?)?\s+FROM\s+"?(?P<table>\w+)"?\s*;?\s*',
+    re.IGNORECASE
+)
+
+
+def _sql_upper_bytes(sql_query: str) -> bytes:
+    """Uppercase ASCII bytes of a SQL string, for keyword probes that scan one byte per character."""
+    return sql_query.encode("ascii", "ignore").upper()
+
+
+@functools.lru_cache(maxsize=1024)
+def _sql_performance_features(sql_query: str) -> Tuple[bool, bool, bool]:
+    """Return whether a query joins, sorts without a LIMIT, and counts rows with COUNT(*)."""
+    sql_buffer = _sql_upper_bytes(sql_query)
+    return (
+        b"JOIN" in sql_buffer,
+        bool(_ORDER_BY_RE.search(sql_buffer)) and b"LIMIT" not in sql_buffer,
+        bool(_COUNT_STAR_RE.search(sql_buffer))
+    )
+
+
+# Execution time bands (seconds, exclusive upper bounds) for analyze_query_performance ratings
+_RATING_THRESHOLDS = (0.1, 0.5, 2.0, 5.0)
+_RATING_LABELS = ("excellent", "good", "acceptable", "slow", "very_slow")
+_SLOW_RATINGS = frozenset(("slow", "very_slow"))
+_SLOW_QUERY_RECOMMENDATIONS = (
+    "Consider adding appropriate indexes on join and filter columns",
+    "Use LIMIT clause to restrict result set size",
+    "Review WHERE clauses to filter data as early as possible"
+)
+
+# Cached plans store join types by value; resolve them with a dict lookup instead of an Enum call
+_JOIN_TYPE_MAP = {join_type.value: join_type for join_type in JoinType}
 
 
 class QueryPlanner:
@@ -66,28 +210,63 @@ class QueryPlanner:
     Uses graph analysis and cost-based optimization for multi-table queries.
     """
     
+    __slots__ = (
+        "engine", "Session",
+        "join_graph", "_dsu", "_component_sizes", "_edge_count",
+        "schema_metadata", "table_sizes", "index_info", "_table_column_sets",
+        "base_table_scan_cost", "join_cost_multiplier", "index_scan_cost_reduction", "use_approximate_count",
+        "_join_condition_cache", "_join_cost_cache", "_join_paths_cache", "_row_sum_cache",
+        "_pending_cache_writes", "_cond_intern", "_comment_header_cache",
+        "_table_names", "_table_idx",
+        "_edge_src", "_edge_dst", "_edge_fk", "_edge_cost", "_edge_order",
+        "semantic_indexer"
+    )
+    
     def __init__(self):
         """Initialize the query planner with database schema analysis."""
         self.engine = engine
         self.Session = sessionmaker(bind=self.engine)
         
-        # Graph for table relationships
+        # Graph for table relationships, with its statistics kept up to date as it is built:
+        # a union-find over tables (parent links and per-root sizes) plus a running edge count
         self.join_graph = nx.Graph()
+        self._dsu: Dict[str, str] = {}
+        self._component_sizes: Dict[str, int] = {}
+        self._edge_count = 0
         
         # Schema metadata
         self.schema_metadata = {}
-        self.table_sizes = {}
+        # Unknown tables are assumed to hold 1000 rows
+        self.table_sizes: Dict[str, int] = defaultdict(lambda: 1000)
         self.index_info = {}
+        self._table_column_sets: Dict[str, FrozenSet[str]] = {}
         
         # Cost estimation parameters
         self.base_table_scan_cost = 1.0
         self.join_cost_multiplier = 2.0
         self.index_scan_cost_reduction = 0.3
         
+        # Opt-in: answer bare COUNT(*) queries on very large tables from catalog
+        # statistics, trading exact counts for speed
+        self.use_approximate_count = False
+        
+        # Memoized join helpers, cleared whenever the schema or size estimates are reloaded
+        self._join_condition_cache: Dict[Tuple[str, str], Tuple[str, str, str]] = {}
+        self._join_cost_cache: Dict[Tuple[str, str, Tuple[str, ...], Tuple[str, ...]], float] = {}
+        self._join_paths_cache: "OrderedDict[FrozenSet[str], Tuple[JoinPath, ...]]" = OrderedDict()
+        self._row_sum_cache: "OrderedDict[Tuple[str, ...], int]" = OrderedDict()
+        # Strong references to in-flight plan cache writes so they are not garbage collected
+        self._pending_cache_writes: Set[asyncio.Task] = set()
+        # Join condition strings shared across plans instead of rebuilt per join
+        self._cond_intern: Dict[Tuple[str, str, str, str], str] = {}
+        # Optimizer comment headers keyed by the plan fields they are built from
+        self._comment_header_cache: "OrderedDict[Tuple[int, int, QueryComplexity, Tuple[str, ...]], str]" = OrderedDict()
+        
         # Initialize schema analysis
         self._analyze_database_schema()
-        self._build_join_graph()
+        # Sizes first: the join graph's edge costs are computed from them
         self._estimate_table_sizes()
+        self._build_join_graph()
         
         # Get semantic indexer for intelligent table selection
         try:
@@ -99,24 +278,25 @@ class QueryPlanner:
     def _analyze_database_schema(self):
         """Analyze database schema to understand table structures and relationships."""
         logger.info("Analyzing database schema for query planning...")
+        self._clear_join_caches()
         
         try:
-            inspector = inspect(self.engine)
-            table_names = inspector.get_table_names()
-            
-            for table_name in table_names:
-                # Get table metadata
-                columns = inspector.get_columns(table_name)
-                foreign_keys = inspector.get_foreign_keys(table_name)
-                indexes = inspector.get_indexes(table_name)
-                primary_keys = inspector.get_pk_constraint(table_name)
-                
+            table_names = inspect(self.engine).get_table_names()
+            
+            # Catalog lookups are latency-bound, so tables are inspected concurrently;
+            # map() keeps results in table order so planning stays deterministic
+            with ThreadPoolExecutor(max_workers=max(1, min(SCHEMA_INSPECTION_WORKERS, len(table_names)))) as executor:
+                inspected_tables = list(executor.map(self._inspect_table, table_names))
+            
+            for table_name, columns, foreign_keys, indexes, primary_keys in inspected_tables:
                 self.schema_metadata[table_name] = {
                     'columns': {col['name']: col for col in columns},
                     'foreign_keys': foreign_keys,
                     'indexes': indexes,
                     'primary_keys': primary_keys.get('constrained_columns', [])
                 }
+                # Built once so join-condition lookups can intersect them directly
+                self._table_column_sets[table_name] = frozenset(self.schema_metadata[table_name]['columns'])
                 
                 # Store index information for cost estimation
                 self.index_info[table_name] = {
@@ -140,53 +320,162 @@ class QueryPlanner:
             logger.error(f"Error analyzing database schema: {str(e)}")
             raise
     
+    def _inspect_table(self, table_name: str) -> Tuple[str, List[Dict], List[Dict], List[Dict], Dict]:
+        """Read one table's columns, foreign keys, indexes and primary key."""
+        # Inspector caches are not thread-safe, so each worker call gets its own
+        inspector = inspect(self.engine)
+        return (
+            table_name,
+            inspector.get_columns(table_name),
+            inspector.get_foreign_keys(table_name),
+            inspector.get_indexes(table_name),
+            inspector.get_pk_constraint(table_name)
+        )
+    
     def _build_join_graph(self):
         """Build a graph representing possible joins between tables."""
         logger.info("Building join graph for query optimization...")
         
         # Add all tables as nodes
         for table_name in self.schema_metadata.keys():
-            self.join_graph.add_node(table_name, table_info=self.schema_metadata[table_name])
+            self._add_table(table_name, table_info=self.schema_metadata[table_name])
         
-        # Add edges for foreign key relationships
+        self._table_names = list(self.schema_metadata.keys())
+        self._table_idx = {table_name: i for i, table_name in enumerate(self._table_names)}
+        
+        # Gather every foreign key edge with whether each side's join column is indexed,
+        # so the join costs below come out of one vectorized pass
+        fk_edges: List[Tuple[int, int, Dict]] = []
+        src_indexed: List[bool] = []
+        dst_indexed: List[bool] = []
         for table_name, metadata in self.schema_metadata.items():
             for fk in metadata['foreign_keys']:
                 referenced_table = fk['referred_table']
                 if referenced_table in self.schema_metadata:
-                    
-                    # Calculate join cost based on table characteristics
-                    join_cost = self._estimate_join_cost(table_name, referenced_table, fk)
-                    
-                    # Add edge with join information
-                    self.join_graph.add_edge(
-                        table_name,
-                        referenced_table,
-                        foreign_key=fk,
-                        join_cost=join_cost,
-                        join_type=JoinType.INNER
-                    )
+                    table_indexes = self.index_info.get(table_name, {}).get('indexed_columns', set())
+                    referenced_indexes = self.index_info.get(referenced_table, {}).get('indexed_columns', set())
+                    fk_edges.append((self._table_idx[table_name], self._table_idx[referenced_table], fk))
+                    src_indexed.append(any(col in table_indexes for col in fk.get('constrained_columns', [])))
+                    dst_indexed.append(any(col in referenced_indexes for col in fk.get('referred_columns', [])))
+        
+        # Calculate join costs based on table characteristics, as _compute_join_cost does per pair
+        sizes = self.table_sizes
+        size_arr = np.array([sizes[table_name] for table_name in self._table_names], dtype=np.int64)
+        fk_src = np.array([edge[0] for edge in fk_edges], dtype=np.int32)
+        fk_dst = np.array([edge[1] for edge in fk_edges], dtype=np.int32)
+        reduction = self.index_scan_cost_reduction
+        fk_costs = (size_arr[fk_src] * size_arr[fk_dst]) / 1000000 * (
+            np.where(np.array(src_indexed, dtype=bool), reduction, 1.0)
+            * np.where(np.array(dst_indexed, dtype=bool), reduction, 1.0)
+        )
+        
+        # One flat edge per table pair for the spanning-tree search; later foreign keys
+        # replace earlier ones for the same pair, as they do on the graph
+        flat_edges: Dict[FrozenSet[str], Tuple[int, int, Dict, float]] = {}
+        
+        # Add edges for foreign key relationships
+        for (src, dst, fk), join_cost in zip(fk_edges, fk_costs.tolist()):
+            table_name, referenced_table = self._table_names[src], self._table_names[dst]
+            
+            # Add edge with join information
+            self._add_rel(
+                table_name,
+                referenced_table,
+                foreign_key=fk,
+                join_cost=join_cost,
+                join_type=JoinType.INNER
+            )
+            flat_edges[frozenset((table_name, referenced_table))] = (src, dst, fk, join_cost)
+        
+        # Edges point from the table owning the foreign key to the table it references
+        edges = list(flat_edges.values())
+        self._edge_src = np.array([edge[0] for edge in edges], dtype=np.int32)
+        self._edge_dst = np.array([edge[1] for edge in edges], dtype=np.int32)
+        self._edge_fk = [edge[2] for edge in edges]
+        self._edge_cost = np.array([edge[3] for edge in edges], dtype=np.float64)
+        # Stable sort keeps declaration order among equal-cost edges
+        self._edge_order = np.argsort(self._edge_cost, kind='stable')
         
         logger.info(f"Built join graph with {self.join_graph.number_of_nodes()} nodes and {self.join_graph.number_of_edges()} edges")
     
+    def _add_table(self, table_name: str, **attrs):
+        """Add a table node to the join graph, registering it as its own component."""
+        if table_name not in self._dsu:
+            self._dsu[table_name] = table_name
+            self._component_sizes[table_name] = 1
+        self.join_graph.add_node(table_name, **attrs)
+    
+    def _add_rel(self, table1: str, table2: str, **attrs):
+        """Add a relationship edge to the join graph, merging the two tables' components."""
+        for table_name in (table1, table2):
+            if table_name not in self._dsu:
+                self._add_table(table_name)
+        
+        # Repeated keys between the same pair only update the existing edge's attributes
+        if not self.join_graph.has_edge(table1, table2):
+            self._edge_count += 1
+        self.join_graph.add_edge(table1, table2, **attrs)
+        
+        root1, root2 = self._find_component(table1), self._find_component(table2)
+        if root1 != root2:
+            if self._component_sizes[root1] < self._component_sizes[root2]:
+                root1, root2 = root2, root1
+            self._dsu[root2] = root1
+            self._component_sizes[root1] += self._component_sizes.pop(root2)
+    
+    def _find_component(self, table_name: str) -> str:
+        """Return the union-find root of a table's component, halving paths on the way."""
+        parent = self._dsu
+        while parent[table_name] != table_name:
+            parent[table_name] = parent[parent[table_name]]
+            table_name = parent[table_name]
+        return table_name
+    
     def _estimate_table_sizes(self):
         """Estimate table sizes for cost-based optimization."""
         logger.info("Estimating table sizes for cost calculation...")
+        # Missing-key lookups fill in defaults, which must not survive a re-estimate
+        self.table_sizes.clear()
         
         try:
             with self.Session() as session:
-                for table_name in self.schema_metadata.keys():
+                if self.engine.dialect.name == 'postgresql':
+                    # Optimizer statistics from the catalog: one lookup instead of a full scan per table
+                    rows = session.execute(
+                        text(
+                            "SELECT relname, reltuples FROM pg_class "
+                            "WHERE relkind = 'r' AND pg_table_is_visible(oid) AND relname = ANY(:names)"
+                        ),
+                        {'names': list(self.schema_metadata.keys())}
+                    ).all()
+                    for relname, reltuples in rows:
+                        # reltuples is negative until the table has been vacuumed or analyzed
+                        if reltuples >= 0:
+                            self.table_sizes[relname] = int(reltuples)
+                
+                # Exact counts only for tables the catalog could not answer for, batched into
+                # UNION ALL statements so the fallback costs one round trip per chunk
+                missing_tables = iter([t for t in self.schema_metadata.keys() if t not in self.table_sizes])
+                preparer = self.engine.dialect.identifier_preparer
+                while chunk := list(islice(missing_tables, TABLE_COUNT_CHUNK_SIZE)):
+                    count_sql = " UNION ALL ".join(
+                        f"SELECT :table_{i} AS table_name, COUNT(*) AS row_count FROM {preparer.quote(table_name)}"
+                        for i, table_name in enumerate(chunk)
+                    )
                     try:
-                        # Get approximate row count
                         result = session.execute(
-                            text(f"SELECT COUNT(*) FROM {table_name}")
+                            text(count_sql),
+                            {f"table_{i}": table_name for i, table_name in enumerate(chunk)}
                         )
-                        row_count = result.scalar()
-                        self.table_sizes[table_name] = row_count
+                        for table_name, row_count in result.fetchall():
+                            self.table_sizes[table_name] = row_count
                         
                     except Exception as e:
-                        logger.warning(f"Could not get size for table {table_name}: {str(e)}")
+                        session.rollback()
+                        logger.warning(f"Could not get sizes for tables {', '.join(chunk)}: {str(e)}")
                         # Use default estimate
-                        self.table_sizes[table_name] = 1000
+                        for table_name in chunk:
+                            self.table_sizes[table_name] = 1000
             
             logger.info(f"Estimated sizes for {len(self.table_sizes)} tables")
             
@@ -195,12 +484,46 @@ class QueryPlanner:
             # Use default sizes
             for table_name in self.schema_metadata.keys():
                 self.table_sizes[table_name] = 1000
+        
+        # Costs memoized before the sizes were known are stale now
+        self._clear_join_caches()
+    
+    def _clear_join_caches(self):
+        """Drop memoized join conditions, costs, join paths, row sums and condition strings after a schema or size reload."""
+        self._join_condition_cache.clear()
+        self._join_cost_cache.clear()
+        self._join_paths_cache.clear()
+        self._row_sum_cache.clear()
+        self._cond_intern.clear()
+    
+    def _intern_condition(self, table1: str, column1: str, table2: str, column2: str) -> str:
+        """Return the shared equality condition string for a pair of table columns."""
+        key = (table1, column1, table2, column2)
+        condition = self._cond_intern.get(key)
+        if condition is None:
+            condition = self._cond_intern.setdefault(key, f"{table1}.{column1} = {table2}.{column2}")
+        return condition
     
     def _estimate_join_cost(self, table1: str, table2: str, foreign_key: Dict) -> float:
+        """Estimate the cost of joining two tables, memoized per table pair and key columns."""
+        cache_key = (
+            table1,
+            table2,
+            tuple(foreign_key.get('constrained_columns', [])),
+            tuple(foreign_key.get('referred_columns', []))
+        )
+        cost = self._join_cost_cache.get(cache_key)
+        if cost is None:
+            cost = self._compute_join_cost(table1, table2, foreign_key)
+            self._join_cost_cache[cache_key] = cost
+        return cost
+    
+    def _compute_join_cost(self, table1: str, table2: str, foreign_key: Dict) -> float:
         """Estimate the cost of joining two tables."""
         # Base cost calculation
-        size1 = self.table_sizes.get(table1, 1000)
-        size2 = self.table_sizes.get(table2, 1000)
+        sizes = self.table_sizes
+        size1 = sizes[table1]
+        size2 = sizes[table2]
         
         # Cost is roughly proportional to the product of table sizes
         base_cost = (size1 * size2) / 1000000  # Normalize
@@ -243,108 +566,32 @@ class QueryPlanner:
         logger.info(f"Creating execution plan for {len(relevant_tables)} tables")
         
         try:
-            # Create cache key for this execution plan
-            import hashlib
-            plan_params = f"{query}_{sorted(relevant_tables)}_{query_context}"
-            plan_hash = hashlib.md5(plan_params.encode()).hexdigest()
-            
-            # Try to get cached execution plan
-            cached_plan_data = await cache_manager.get_execution_plan(plan_hash)
-            if cached_plan_data:
-                logger.debug(f"Retrieved execution plan from cache for query: '{query[:50]}...'")
-                # Reconstruct QueryExecutionPlan from cached data
-                return QueryExecutionPlan(
-                    tables=cached_plan_data['tables'],
-                    join_order=cached_plan_data['join_order'],
-                    join_paths=[
-                        JoinPath(
-                            from_table=jp['from_table'],
-                            to_table=jp['to_table'],
-                            join_type=JoinType(jp['join_type']),
-                            condition=jp['condition'],
-                            cost_estimate=jp['cost_estimate'],
-                            confidence=jp['confidence']
-                        ) for jp in cached_plan_data['join_paths']
-                    ],
-                    estimated_cost=cached_plan_data['estimated_cost'],
-                    complexity=QueryComplexity(cached_plan_data['complexity']),
-                    optimization_suggestions=cached_plan_data['optimization_suggestions'],
-                    index_recommendations=cached_plan_data['index_recommendations'],
-                    execution_time_estimate=cached_plan_data['execution_time_estimate']
-                )
-            
             # Validate tables exist in schema
             valid_tables = [t for t in relevant_tables if t in self.schema_metadata]
             if not valid_tables:
                 raise ValueError("No valid tables found in relevant_tables")
             
-            # Find optimal join paths
-            join_paths = self._find_optimal_join_paths(valid_tables)
-            
-            # Determine optimal join order
-            join_order = self._optimize_join_order(valid_tables, join_paths)
-            
-            # Calculate total cost estimate
-            total_cost = sum(path.cost_estimate for path in join_paths)
+            # One- and two-table plans are cheaper to build than a cache round trip
+            if len(valid_tables) <= 2:
+                return self._build_execution_plan(query, valid_tables)
             
-            # Determine query complexity
-            complexity = self._assess_query_complexity(valid_tables, join_paths)
-            
-            # Generate optimization suggestions
-            optimization_suggestions = self._generate_optimization_suggestions(
-                query, valid_tables, join_paths, complexity
-            )
-            
-            # Generate index recommendations
-            index_recommendations = self._generate_index_recommendations(
-                valid_tables, join_paths
-            )
+            # Create cache key for this execution plan
+            plan_hash = self._plan_cache_key(query, relevant_tables, query_context)
             
-            # Estimate execution time
-            execution_time_estimate = self._estimate_execution_time(
-                total_cost, complexity, len(valid_tables)
-            )
+            # Try to get cached execution plan
+            cached_plan_data = await cache_manager.get_execution_plan(plan_hash)
+            if cached_plan_data:
+                logger.debug(f"Retrieved execution plan from cache for query: '{query[:50]}...'")
+                return QueryExecutionPlan.from_dict(cached_plan_data)
             
-            execution_plan = QueryExecutionPlan(
-                tables=valid_tables,
-                join_order=join_order,
-                join_paths=join_paths,
-                estimated_cost=total_cost,
-                complexity=complexity,
-                optimization_suggestions=optimization_suggestions,
-                index_recommendations=index_recommendations,
-                execution_time_estimate=execution_time_estimate
-            )
+            execution_plan = self._build_execution_plan(query, valid_tables)
             
-            # Cache the execution plan
-            plan_data = {
-                'tables': execution_plan.tables,
-                'join_order': execution_plan.join_order,
-                'join_paths': [
-                    {
-                        'from_table': jp.from_table,
-                        'to_table': jp.to_table,
-                        'join_type': jp.join_type.value,
-                        'condition': jp.condition,
-                        'cost_estimate': jp.cost_estimate,
-                        'confidence': jp.confidence
-                    } for jp in execution_plan.join_paths
-                ],
-                'estimated_cost': execution_plan.estimated_cost,
-                'complexity': execution_plan.complexity.value,
-                'optimization_suggestions': execution_plan.optimization_suggestions,
-                'index_recommendations': execution_plan.index_recommendations,
-                'execution_time_estimate': execution_plan.execution_time_estimate
-            }
-            
-            await cache_manager.cache_execution_plan(
-                plan_hash, 
-                plan_data, 
-                tables_used=valid_tables
+            # Cache the execution plan in the background; the caller already has it
+            write_task = asyncio.create_task(
+                self._write_cached_plan(plan_hash, execution_plan.to_dict(), valid_tables)
             )
-            
-            logger.info(f"Created execution plan with {len(join_paths)} joins, "
-                       f"complexity: {complexity.value}, estimated cost: {total_cost:.2f}")
+            self._pending_cache_writes.add(write_task)
+            write_task.add_done_callback(self._pending_cache_writes.discard)
             
             return execution_plan
             
@@ -353,73 +600,150 @@ class QueryPlanner:
             # Return a basic plan as fallback
             return self._create_fallback_plan(relevant_tables)
     
+    def _build_execution_plan(self, query: str, valid_tables: List[str]) -> QueryExecutionPlan:
+        """Plan joins, cost and suggestions for tables already checked against the schema."""
+        # Find optimal join paths
+        join_paths = self._find_optimal_join_paths(valid_tables)
+        
+        # Determine optimal join order
+        join_order = self._optimize_join_order(valid_tables, join_paths)
+        
+        # Calculate total cost estimate
+        total_cost = sum(path.cost_estimate for path in join_paths)
+        
+        # Determine query complexity
+        complexity = self._assess_query_complexity(valid_tables, join_paths)
+        
+        # Generate optimization suggestions
+        optimization_suggestions = self._generate_optimization_suggestions(
+            query, valid_tables, join_paths, complexity
+        )
+        
+        # Generate index recommendations
+        index_recommendations = self._generate_index_recommendations(
+            valid_tables, join_paths
+        )
+        
+        # Estimate execution time
+        execution_time_estimate = self._estimate_execution_time(
+            total_cost, complexity, len(valid_tables)
+        )
+        
+        logger.info(f"Created execution plan with {len(join_paths)} joins, "
+                   f"complexity: {complexity.value}, estimated cost: {total_cost:.2f}")
+        
+        return QueryExecutionPlan(
+            tables=valid_tables,
+            join_order=join_order,
+            join_paths=join_paths,
+            estimated_cost=total_cost,
+            complexity=complexity,
+            optimization_suggestions=optimization_suggestions,
+            index_recommendations=index_recommendations,
+            execution_time_estimate=execution_time_estimate
+        )
+    
+    async def _write_cached_plan(self, plan_hash: str, plan_data: Dict[str, Any], tables_used: List[str]):
+        """Store an execution plan in the cache, logging rather than raising on failure."""
+        try:
+            await cache_manager.cache_execution_plan(plan_hash, plan_data, tables_used=tables_used)
+        except Exception as e:
+            logger.warning(f"Failed to cache execution plan: {str(e)}")
+    
+    @staticmethod
+    def _plan_cache_key(query: str, relevant_tables: List[str], query_context: Optional[Dict[str, Any]]) -> str:
+        """
+        Hash the plan inputs into a stable cache key.
+        
+        Case, whitespace, table order and context key order are normalised
+        away so equivalent requests share one cached plan.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(" ".join(query.lower().split()).encode())
+        digest.update(b'\x1f')
+        digest.update('\x1f'.join(sorted(relevant_tables)).encode())
+        digest.update(b'\x1f')
+        digest.update(json.dumps(query_context, sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+    
     def _find_optimal_join_paths(self, tables: List[str]) -> List[JoinPath]:
-        """Find optimal join paths between tables using graph algorithms."""
+        """Find optimal join paths between tables, reusing the result for a repeated table set."""
         if len(tables) <= 1:
             return []
         
-        join_paths = []
+        # The spanning tree depends only on which tables are involved, not their order
+        cache_key = frozenset(tables)
+        cached_paths = self._join_paths_cache.get(cache_key)
+        if cached_paths is not None:
+            self._join_paths_cache.move_to_end(cache_key)
+            return list(cached_paths)
         
         try:
-            # Create subgraph with only relevant tables
-            subgraph = self.join_graph.subgraph(tables)
-            
-            # If graph is not connected, find minimum spanning forest
-            if not nx.is_connected(subgraph):
-                # Find connected components
-                components = list(nx.connected_components(subgraph))
-                logger.warning(f"Tables form {len(components)} disconnected components")
-                
-                # For each component, find minimum spanning tree
-                for component in components:
-                    if len(component) > 1:
-                        component_subgraph = subgraph.subgraph(component)
-                        mst = nx.minimum_spanning_tree(component_subgraph, weight='join_cost')
-                        join_paths.extend(self._convert_edges_to_join_paths(mst.edges(data=True)))
-            else:
-                # Find minimum spanning tree for connected graph
-                mst = nx.minimum_spanning_tree(subgraph, weight='join_cost')
-                join_paths = self._convert_edges_to_join_paths(mst.edges(data=True))
-            
+            join_paths = list(self._iter_spanning_join_paths(tables))
         except Exception as e:
             logger.warning(f"Error finding optimal join paths: {str(e)}")
             # Fallback to simple sequential joins
-            join_paths = self._create_sequential_joins(tables)
+            return self._create_sequential_joins(tables)
         
+        self._join_paths_cache[cache_key] = tuple(join_paths)
+        if len(self._join_paths_cache) > JOIN_PATH_CACHE_MAXSIZE:
+            self._join_paths_cache.popitem(last=False)
         return join_paths
     
-    def _convert_edges_to_join_paths(self, edges) -> List[JoinPath]:
-        """Convert graph edges to JoinPath objects."""
-        join_paths = []
-        
-        for edge in edges:
-            table1, table2, edge_data = edge
-            fk_info = edge_data.get('foreign_key', {})
+    def _iter_spanning_join_paths(self, tables: List[str]) -> Iterator[JoinPath]:
+        """Yield the minimum spanning forest over the given tables as Kruskal accepts each edge."""
+        table_indices = {self._table_idx[table] for table in tables if table in self._table_idx}
+        selected = np.zeros(len(self._table_names), dtype=bool)
+        selected[list(table_indices)] = True
+        
+        # Edges with both ends among the tables, cheapest first
+        order = self._edge_order
+        order = order[selected[self._edge_src[order]] & selected[self._edge_dst[order]]]
+        
+        # Union-find with path halving; self-referencing edges never join two sets
+        parent = {index: index for index in table_indices}
+        
+        def find(index: int) -> int:
+            while parent[index] != index:
+                parent[index] = parent[parent[index]]
+                index = parent[index]
+            return index
+        
+        accepted_count = 0
+        for edge in order.tolist():
+            src, dst = int(self._edge_src[edge]), int(self._edge_dst[edge])
+            src_root, dst_root = find(src), find(dst)
+            if src_root == dst_root:
+                continue
+            parent[dst_root] = src_root
+            accepted_count += 1
             
-            # Determine join direction based on foreign key
-            if fk_info:
-                fk_columns = fk_info.get('constrained_columns', [])
-                ref_columns = fk_info.get('referred_columns', [])
-                
-                if fk_columns and ref_columns:
-                    condition = f"{table1}.{fk_columns[0]} = {table2}.{ref_columns[0]}"
-                else:
-                    condition = f"{table1}.id = {table2}.id"  # Fallback
+            table1, table2 = self._table_names[src], self._table_names[dst]
+            fk_info = self._edge_fk[edge]
+            fk_columns = fk_info.get('constrained_columns', [])
+            ref_columns = fk_info.get('referred_columns', [])
+            
+            # Edges point from the foreign key's table to the table it references
+            if fk_columns and ref_columns:
+                from_column, to_column = fk_columns[0], ref_columns[0]
             else:
-                condition = f"{table1}.id = {table2}.id"  # Fallback
+                from_column, to_column = 'id', 'id'  # Fallback
             
-            join_path = JoinPath(
+            yield JoinPath(
                 from_table=table1,
                 to_table=table2,
-                join_type=edge_data.get('join_type', JoinType.INNER),
-                condition=condition,
-                cost_estimate=edge_data.get('join_cost', 1.0),
-                confidence=0.9 if fk_info else 0.5
+                join_type=JoinType.INNER,
+                condition=self._intern_condition(table1, from_column, table2, to_column),
+                cost_estimate=float(self._edge_cost[edge]),
+                confidence=0.9 if fk_info else 0.5,
+                from_column=from_column,
+                to_column=to_column
             )
-            
-            join_paths.append(join_path)
         
-        return join_paths
+        # The same union-find yields the components, so no separate connectivity pass is needed
+        component_count = len(table_indices) - accepted_count
+        if component_count > 1:
+            logger.warning(f"Tables form {component_count} disconnected components")
     
     def _create_sequential_joins(self, tables: List[str]) -> List[JoinPath]:
         """Create simple sequential joins as fallback."""
@@ -429,7 +753,7 @@ class QueryPlanner:
             table1, table2 = tables[i], tables[i + 1]
             
             # Try to find a foreign key relationship
-            condition = self._find_join_condition(table1, table2)
+            condition, from_column, to_column = self._find_join(table1, table2)
             
             join_path = JoinPath(
                 from_table=table1,
@@ -437,7 +761,9 @@ class QueryPlanner:
                 join_type=JoinType.INNER,
                 condition=condition,
                 cost_estimate=self._estimate_join_cost(table1, table2, {}),
-                confidence=0.5
+                confidence=0.5,
+                from_column=from_column,
+                to_column=to_column
             )
             
             join_paths.append(join_path)
@@ -446,6 +772,19 @@ class QueryPlanner:
     
     def _find_join_condition(self, table1: str, table2: str) -> str:
         """Find appropriate join condition between two tables."""
+        return self._find_join(table1, table2)[0]
+    
+    def _find_join(self, table1: str, table2: str) -> Tuple[str, str, str]:
+        """Find the join condition and each table's join column, memoized per ordered pair."""
+        cache_key = (table1, table2)
+        join = self._join_condition_cache.get(cache_key)
+        if join is None:
+            join = self._compute_join(table1, table2)
+            self._join_condition_cache[cache_key] = join
+        return join
+    
+    def _compute_join(self, table1: str, table2: str) -> Tuple[str, str, str]:
+        """Find the join condition between two tables, with table1's and table2's join columns."""
         # Check for foreign key relationships
         table1_meta = self.schema_metadata.get(table1, {})
         table2_meta = self.schema_metadata.get(table2, {})
@@ -455,123 +794,175 @@ class QueryPlanner:
             if fk['referred_table'] == table2:
                 fk_col = fk['constrained_columns'][0]
                 ref_col = fk['referred_columns'][0]
-                return f"{table1}.{fk_col} = {table2}.{ref_col}"
+                return self._intern_condition(table1, fk_col, table2, ref_col), fk_col, ref_col
         
         # Check if table2 has FK to table1
         for fk in table2_meta.get('foreign_keys', []):
             if fk['referred_table'] == table1:
                 fk_col = fk['constrained_columns'][0]
                 ref_col = fk['referred_columns'][0]
-                return f"{table2}.{fk_col} = {table1}.{ref_col}"
+                return self._intern_condition(table2, fk_col, table1, ref_col), ref_col, fk_col
         
         # Fallback to common column names
-        table1_columns = set(table1_meta.get('columns', {}).keys())
-        table2_columns = set(table2_meta.get('columns', {}).keys())
-        
-        common_columns = table1_columns.intersection(table2_columns)
+        common_columns = (
+            self._table_column_sets.get(table1, frozenset()) & self._table_column_sets.get(table2, frozenset())
+        )
         if common_columns:
             common_col = next(iter(common_columns))
-            return f"{table1}.{common_col} = {table2}.{common_col}"
+            return self._intern_condition(table1, common_col, table2, common_col), common_col, common_col
         
         # Last resort - assume id columns
-        return f"{table1}.id = {table2}.id"
+        return self._intern_condition(table1, 'id', table2, 'id'), 'id', 'id'
     
     def _optimize_join_order(self, tables: List[str], join_paths: List[JoinPath]) -> List[str]:
         """Optimize the order of table joins for better performance."""
         if len(tables) <= 2:
             return tables
         
+        # Small table sets can afford an exhaustive search; the greedy walk below covers the rest
+        if len(tables) <= DP_JOIN_ORDER_MAX_TABLES:
+            return self._dp_join_order(tables)
+        
+        sizes = self.table_sizes
+        
         # Start with the smallest table
-        table_sizes = [(table, self.table_sizes.get(table, 1000)) for table in tables]
-        table_sizes.sort(key=lambda x: x[1])
+        size_heap = [(sizes[table], table) for table in tables]
+        heapq.heapify(size_heap)
+        current_table = heapq.heappop(size_heap)[1]
         
-        ordered_tables = [table_sizes[0][0]]  # Start with smallest table
-        remaining_tables = set(tables) - {ordered_tables[0]}
+        ordered_tables = [current_table]
+        remaining_tables = set(tables) - {current_table}
+        
+        # Index the cheapest join between each pair of tables once, in both directions
+        adjacency: Dict[str, Dict[str, float]] = defaultdict(dict)
+        for join_path in join_paths:
+            cost = join_path.cost_estimate
+            for table, neighbour in ((join_path.from_table, join_path.to_table),
+                                     (join_path.to_table, join_path.from_table)):
+                if cost < adjacency[table].get(neighbour, inf):
+                    adjacency[table][neighbour] = cost
+        
+        # Prim-style frontier: cheapest known join from each remaining table into the
+        # ordered set; entries superseded by a cheaper one are skipped when popped
+        best_cost_to_frontier: Dict[str, float] = {}
+        frontier: List[Tuple[float, str]] = []
         
         # Greedily add tables that have the lowest cost joins
         while remaining_tables:
-            best_table = None
-            best_cost = float('inf')
-            
-            for table in remaining_tables:
-                # Find minimum cost to join this table with already ordered tables
-                min_cost = float('inf')
-                for ordered_table in ordered_tables:
-                    for join_path in join_paths:
-                        if ((join_path.from_table == table and join_path.to_table == ordered_table) or
-                            (join_path.from_table == ordered_table and join_path.to_table == table)):
-                            min_cost = min(min_cost, join_path.cost_estimate)
-                
-                if min_cost < best_cost:
-                    best_cost = min_cost
-                    best_table = table
+            for neighbour, cost in adjacency.get(current_table, {}).items():
+                if neighbour in remaining_tables and cost < best_cost_to_frontier.get(neighbour, inf):
+                    best_cost_to_frontier[neighbour] = cost
+                    heapq.heappush(frontier, (cost, neighbour))
             
-            if best_table:
-                ordered_tables.append(best_table)
-                remaining_tables.remove(best_table)
+            while frontier and (frontier[0][1] not in remaining_tables
+                                or frontier[0][0] > best_cost_to_frontier[frontier[0][1]]):
+                heapq.heappop(frontier)
+            
+            if frontier:
+                current_table = heapq.heappop(frontier)[1]
+                ordered_tables.append(current_table)
+                remaining_tables.remove(current_table)
             else:
                 # If no connection found, add remaining tables in size order
-                remaining_sorted = sorted(remaining_tables, 
-                                        key=lambda t: self.table_sizes.get(t, 1000))
+                remaining_sorted = sorted(remaining_tables, key=lambda t: (sizes[t], t))
                 ordered_tables.extend(remaining_sorted)
                 break
         
         return ordered_tables
     
+    def _dp_join_order(self, tables: List[str]) -> List[str]:
+        """
+        Order joins by dynamic programming over table subsets.
+        
+        Each subset's cost is its estimated cardinality plus the cheapest
+        cost of building it from one table fewer, so a join's cost depends
+        on the intermediate result it extends rather than a static weight.
+        """
+        tables = list(dict.fromkeys(tables))
+        count = len(tables)
+        table_sizes = self.table_sizes
+        sizes = [max(table_sizes[table], 1) for table in tables]
+        position = {table: i for i, table in enumerate(tables)}
+        
+        # A foreign key join keeps roughly one row per referencing row: selectivity 1/|referenced|
+        selectivities: List[List[Tuple[int, float]]] = [[] for _ in tables]
+        for src, dst in zip(self._edge_src.tolist(), self._edge_dst.tolist()):
+            src_table, dst_table = self._table_names[src], self._table_names[dst]
+            if src_table in position and dst_table in position and src_table != dst_table:
+                i, j = position[src_table], position[dst_table]
+                selectivity = 1.0 / sizes[j]
+                selectivities[i].append((1 << j, selectivity))
+                selectivities[j].append((1 << i, selectivity))
+        
+        full = (1 << count) - 1
+        cardinality = [1.0] * (full + 1)
+        cost = [0.0] * (full + 1)
+        last_table = [0] * (full + 1)
+        
+        for subset in range(1, full + 1):
+            lowest = subset & -subset
+            rest = subset ^ lowest
+            i = lowest.bit_length() - 1
+            
+            # Add the lowest table to the cardinality of the rest, applying its joins into the rest
+            estimate = cardinality[rest] * sizes[i]
+            for other, selectivity in selectivities[i]:
+                if rest & other:
+                    estimate *= selectivity
+            cardinality[subset] = estimate
+            
+            if not rest:
+                last_table[subset] = i
+                continue
+            
+            # Cheapest table to join last; on ties the larger table goes last
+            best_key = None
+            remaining = subset
+            while remaining:
+                bit = remaining & -remaining
+                remaining ^= bit
+                j = bit.bit_length() - 1
+                key = (cost[subset ^ bit], -sizes[j])
+                if best_key is None or key < best_key:
+                    best_key = key
+                    last_table[subset] = j
+            cost[subset] = best_key[0] + estimate
+        
+        # Walk the recorded choices back from the full set
+        join_order = []
+        subset = full
+        while subset:
+            i = last_table[subset]
+            join_order.append(tables[i])
+            subset ^= 1 << i
+        join_order.reverse()
+        return join_order
+    
     def _assess_query_complexity(self, tables: List[str], join_paths: List[JoinPath]) -> QueryComplexity:
         """Assess the complexity of the query based on tables and joins."""
         num_tables = len(tables)
         num_joins = len(join_paths)
         
-        # Calculate total estimated rows
-        total_estimated_rows = sum(self.table_sizes.get(table, 1000) for table in tables)
-        
-        # Complexity scoring with more aggressive scaling
-        complexity_score = 0
-        
-        # Table count factor (more aggressive)
-        if num_tables <= 1:
-            complexity_score += 1
-        elif num_tables <= 2:
-            complexity_score += 2
-        elif num_tables <= 4:
-            complexity_score += 3
-        elif num_tables <= 6:
-            complexity_score += 4
-        else:
-            complexity_score += 5
-        
-        # Join complexity factor (more aggressive)
-        if num_joins == 0:
-            complexity_score += 1
-        elif num_joins <= 2:
-            complexity_score += 2
-        elif num_joins <= 4:
-            complexity_score += 3
-        elif num_joins <= 6:
-            complexity_score += 4
-        else:
-            complexity_score += 5
-        
-        # Data volume factor
-        if total_estimated_rows <= 10000:
-            complexity_score += 1
-        elif total_estimated_rows <= 100000:
-            complexity_score += 2
-        elif total_estimated_rows <= 1000000:
-            complexity_score += 3
-        else:
-            complexity_score += 4
+        # Calculate total estimated rows; sorted rather than a set so repeated tables still count
+        rows_key = tuple(sorted(tables))
+        total_estimated_rows = self._row_sum_cache.get(rows_key)
+        if total_estimated_rows is None:
+            sizes = self.table_sizes
+            total_estimated_rows = sum(sizes[table] for table in tables)
+            self._row_sum_cache[rows_key] = total_estimated_rows
+            if len(self._row_sum_cache) > JOIN_PATH_CACHE_MAXSIZE:
+                self._row_sum_cache.popitem(last=False)
+        
+        # Complexity scoring with more aggressive scaling: each factor scores 1 + the
+        # number of its "<=" thresholds the value exceeds
+        complexity_score = (
+            bisect_left(_TABLE_COUNT_THRESHOLDS, num_tables) + 1
+            + bisect_left(_JOIN_COUNT_THRESHOLDS, num_joins) + 1
+            + bisect_left(_ROW_COUNT_THRESHOLDS, total_estimated_rows) + 1
+        )
         
         # Map score to complexity level (adjusted thresholds)
-        if complexity_score <= 4:
-            return QueryComplexity.SIMPLE
-        elif complexity_score <= 7:
-            return QueryComplexity.MODERATE
-        elif complexity_score <= 11:
-            return QueryComplexity.COMPLEX
-        else:
-            return QueryComplexity.VERY_COMPLEX
+        return _COMPLEXITY_LEVELS[bisect_left(_COMPLEXITY_SCORE_THRESHOLDS, complexity_score)]
     
     def _generate_optimization_suggestions(
         self, 
@@ -602,16 +993,17 @@ class QueryPlanner:
             suggestions.append("Some joins may not be optimal - verify join conditions are correct")
         
         # Table-specific suggestions
-        large_tables = [t for t in tables if self.table_sizes.get(t, 0) > 100000]
+        sizes = self.table_sizes
+        large_tables = [t for t in tables if sizes[t] > 100000]
         if large_tables:
             suggestions.append(f"Large tables detected: {', '.join(large_tables)} - ensure proper indexing")
         
         # Query pattern suggestions
-        query_lower = query.lower()
-        if "price" in query_lower and "current_prices" in tables:
+        keyword_hits = set(_SUGGESTION_KEYWORDS_RE.findall(query.lower()))
+        if "price" in keyword_hits and "current_prices" in tables:
             suggestions.append("For price queries, consider filtering by date range to improve performance")
         
-        if "discount" in query_lower:
+        if "discount" in keyword_hits:
             suggestions.append("Filter for active discounts only (is_active = true) to reduce result set")
         
         if len(tables) > 5:
@@ -626,22 +1018,8 @@ class QueryPlanner:
         # Analyze join columns for index recommendations
         join_columns = {}
         for join_path in join_paths:
-            # Parse join condition to extract columns
-            condition = join_path.condition
-            if "=" in condition:
-                parts = condition.split("=")
-                if len(parts) == 2:
-                    left_col = parts[0].strip()
-                    right_col = parts[1].strip()
-                    
-                    # Extract table.column format
-                    if "." in left_col:
-                        table, col = left_col.split(".", 1)
-                        join_columns.setdefault(table, set()).add(col)
-                    
-                    if "." in right_col:
-                        table, col = right_col.split(".", 1)
-                        join_columns.setdefault(table, set()).add(col)
+            join_columns.setdefault(join_path.from_table, set()).add(join_path.from_column)
+            join_columns.setdefault(join_path.to_table, set()).add(join_path.to_column)
         
         # Check which columns need indexes
         for table, columns in join_columns.items():
@@ -712,25 +1090,23 @@ class QueryPlanner:
         optimized_query = sql_query
         
         try:
+            # Replace a full scan count with the planner's row estimate where it is large enough
+            approximate_query = self._approximate_count_query(optimized_query, execution_plan)
+            if approximate_query:
+                optimized_query = approximate_query
+            
             # Add query hints based on execution plan
             if execution_plan.complexity in [QueryComplexity.COMPLEX, QueryComplexity.VERY_COMPLEX]:
                 # Add LIMIT if not present and query is complex
-                if "LIMIT" not in optimized_query.upper():
+                if b"LIMIT" not in _sql_upper_bytes(optimized_query):
                     optimized_query += " LIMIT 1000"
             
-            # Add index hints in comments for reference
-            if execution_plan.index_recommendations:
-                hint_comment = "/* Recommended indexes:\n"
-                for rec in execution_plan.index_recommendations[:3]:
-                    hint_comment += f"   {rec}\n"
-                hint_comment += "*/"
-                optimized_query = hint_comment + "\n" + optimized_query
+            # A single-table plan with nothing to recommend has no useful comments to add
+            if not execution_plan.index_recommendations and len(execution_plan.tables) <= 1 and not execution_plan.join_paths:
+                return optimized_query
             
-            # Add execution plan comment
-            plan_comment = f"/* Execution Plan: {len(execution_plan.tables)} tables, " \
-                          f"{len(execution_plan.join_paths)} joins, " \
-                          f"complexity: {execution_plan.complexity.value} */"
-            optimized_query = plan_comment + "\n" + optimized_query
+            # Plans with the same shape share their comment header, so it is built once per shape
+            optimized_query = f"{self._comment_header(execution_plan)}\n{optimized_query}"
             
             logger.info("Applied query optimizations based on execution plan")
             
@@ -739,6 +1115,65 @@ class QueryPlanner:
         
         return optimized_query
     
+    def _comment_header(self, execution_plan: QueryExecutionPlan) -> str:
+        """Return the plan and index hint comments for a plan, memoized per plan shape."""
+        recommendations = tuple(execution_plan.index_recommendations[:3])
+        cache_key = (len(execution_plan.tables), len(execution_plan.join_paths), execution_plan.complexity, recommendations)
+        header = self._comment_header_cache.get(cache_key)
+        if header is not None:
+            self._comment_header_cache.move_to_end(cache_key)
+            return header
+        
+        # Add execution plan comment
+        comment_parts = [
+            f"/* Execution Plan: {len(execution_plan.tables)} tables, "
+            f"{len(execution_plan.join_paths)} joins, "
+            f"complexity: {execution_plan.complexity.value} */"
+        ]
+        
+        # Add index hints in comments for reference
+        if recommendations:
+            hint_lines = ["/* Recommended indexes:"]
+            hint_lines.extend(f"   {rec}" for rec in recommendations)
+            hint_lines.append("*/")
+            comment_parts.append("\n".join(hint_lines))
+        
+        header = "\n".join(comment_parts)
+        self._comment_header_cache[cache_key] = header
+        if len(self._comment_header_cache) > COMMENT_HEADER_CACHE_MAXSIZE:
+            self._comment_header_cache.popitem(last=False)
+        return header
+    
+    def _approximate_count_query(self, sql_query: str, execution_plan: QueryExecutionPlan) -> Optional[str]:
+        """
+        Rewrite a bare SELECT COUNT(*) FROM table into a pg_class.reltuples lookup.
+        
+        Only applies when use_approximate_count is enabled, on PostgreSQL,
+        for single-table plans whose table is estimated above
+        APPROXIMATE_COUNT_MIN_ROWS rows.
+        """
+        if not self.use_approximate_count or self.engine.dialect.name != 'postgresql':
+            return None
+        if len(execution_plan.tables) != 1 or not _COUNT_STAR_RE.search(_sql_upper_bytes(sql_query)):
+            return None
+        
+        match = _BARE_COUNT_RE.fullmatch(sql_query)
+        if not match:
+            return None
+        
+        table_name = match.group('table')
+        if table_name != execution_plan.tables[0] or table_name not in self.schema_metadata:
+            return None
+        if self.table_sizes[table_name] < APPROXIMATE_COUNT_MIN_ROWS:
+            return None
+        
+        # regclass resolves the name through the search path, as the original FROM clause did
+        preparer = self.engine.dialect.identifier_preparer
+        quoted_table = preparer.quote(table_name).replace("'", "''")
+        alias = preparer.quote(match.group('alias') or 'count')
+        logger.info(f"Using approximate row count for {table_name}")
+        return f"SELECT reltuples::bigint AS {alias} FROM pg_class WHERE oid = '{quoted_table}'::regclass"
+    
     def analyze_query_performance(self, sql_query: str, execution_time: float) -> Dict[str, Any]:
         """
         Analyze actual query performance and provide insights.
@@ -759,36 +1194,30 @@ class QueryPlanner:
         
         try:
             # Performance rating based on execution time
-            if execution_time < 0.1:
-                analysis["performance_rating"] = "excellent"
-            elif execution_time < 0.5:
-                analysis["performance_rating"] = "good"
-            elif execution_time < 2.0:
-                analysis["performance_rating"] = "acceptable"
-            elif execution_time < 5.0:
-                analysis["performance_rating"] = "slow"
+            analysis["performance_rating"] = _RATING_LABELS[bisect_right(_RATING_THRESHOLDS, execution_time)]
+            
+            # Every SQL-based finding is for queries slower than half a second, so fast ones skip the probes;
+            # the probes depend only on the text, so repeated queries reuse them
+            if execution_time > 0.5:
+                has_join, has_unbounded_sort, has_count_star = _sql_performance_features(sql_query)
             else:
-                analysis["performance_rating"] = "very_slow"
+                has_join = has_unbounded_sort = has_count_star = False
             
             # Identify potential bottlenecks
             if execution_time > 1.0:
                 analysis["bottlenecks"].append("Query execution time exceeds 1 second")
                 
-                if "JOIN" in sql_query.upper():
+                if has_join:
                     analysis["bottlenecks"].append("Multiple table joins may be causing slowdown")
                 
-                if "ORDER BY" in sql_query.upper() and "LIMIT" not in sql_query.upper():
+                if has_unbounded_sort:
                     analysis["bottlenecks"].append("Sorting without LIMIT may be inefficient")
             
             # Generate recommendations
-            if analysis["performance_rating"] in ["slow", "very_slow"]:
-                analysis["recommendations"].extend([
-                    "Consider adding appropriate indexes on join and filter columns",
-                    "Use LIMIT clause to restrict result set size",
-                    "Review WHERE clauses to filter data as early as possible"
-                ])
-            
-            if "COUNT(*)" in sql_query.upper():
+            if analysis["performance_rating"] in _SLOW_RATINGS:
+                analysis["recommendations"].extend(_SLOW_QUERY_RECOMMENDATIONS)
+            
+            if has_count_star:
                 analysis["recommendations"].append("Consider using approximate count for large tables")
             
         except Exception as e:
@@ -798,21 +1227,27 @@ class QueryPlanner:
     
     def get_join_graph_stats(self) -> Dict[str, Any]:
         """Get statistics about the join graph."""
+        # Maintained incrementally by _add_table/_add_rel, so no graph traversal is needed
+        num_nodes = self.join_graph.number_of_nodes()
         return {
-            "total_tables": self.join_graph.number_of_nodes(),
-            "total_relationships": self.join_graph.number_of_edges(),
-            "connected_components": nx.number_connected_components(self.join_graph),
-            "average_degree": sum(dict(self.join_graph.degree()).values()) / self.join_graph.number_of_nodes() if self.join_graph.number_of_nodes() > 0 else 0,
-            "largest_component_size": len(max(nx.connected_components(self.join_graph), key=len)) if self.join_graph.number_of_nodes() > 0 else 0
+            "total_tables": num_nodes,
+            "total_relationships": self._edge_count,
+            "connected_components": len(self._component_sizes),
+            # Degrees sum to twice the edge count (handshake lemma)
+            "average_degree": 2 * self._edge_count / num_nodes if num_nodes > 0 else 0,
+            "largest_component_size": max(self._component_sizes.values(), default=0)
         }
 
 
 # Singleton instance for global use
 _query_planner_instance = None
+_query_planner_lock = threading.Lock()
 
 def get_query_planner() -> QueryPlanner:
     """Get singleton instance of QueryPlanner."""
     global _query_planner_instance
     if _query_planner_instance is None:
-        _query_planner_instance = QueryPlanner()
+        with _query_planner_lock:
+            if _query_planner_instance is None:
+                _query_planner_instance = QueryPlanner()
     return _query_planner_instance
\ No newline at end of file
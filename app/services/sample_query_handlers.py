@@ -4,9 +4,11 @@ Implements specific sample queries as required in task 8.1.
 """
 
 import logging
-from typing import List, Dict, Optional, Tuple, Any
+import threading
+from dataclasses import dataclass
+from typing import List, Dict, Optional, Tuple, Any, Callable
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func, desc, asc
+from sqlalchemy import Select, and_, or_, func, desc, asc, literal, select, union_all
 from datetime import datetime, timedelta
 import re
 
@@ -18,6 +20,15 @@ from app.schemas.query import QueryResult
 logger = logging.getLogger(__name__)
 
 
+@dataclass(slots=True, frozen=True)
+class PreparedSampleQuery:
+    """Unordered statement plus the ordering, limit and post-processing of one handler."""
+    statement: Select
+    order_by: Tuple[Any, ...]
+    limit: int
+    finish: Callable[[list], List[QueryResult]]
+
+
 class SampleQueryHandlers:
     """
     Handlers for specific sample queries as defined in requirements 10.1-10.4.
@@ -45,6 +56,265 @@ class SampleQueryHandlers:
             'swiggy': ['swiggy', 'swiggy instamart']
         }
     
+    def _base_price_statement(self, *extra_columns) -> Select:
+        """Build the shared product/price/platform select used by every handler."""
+        return select(
+            Product.id,
+            Product.name,
+            Platform.name.label('platform_name'),
+            CurrentPrice.price,
+            CurrentPrice.original_price,
+            CurrentPrice.discount_percentage,
+            CurrentPrice.is_available,
+            CurrentPrice.last_updated,
+            *extra_columns
+        ).select_from(Product).join(
+            CurrentPrice, Product.id == CurrentPrice.product_id
+        ).join(
+            Platform, CurrentPrice.platform_id == Platform.id
+        )
+    
+    def _row_to_result(self, row) -> QueryResult:
+        """Convert a product price row to a QueryResult."""
+        return QueryResult(
+            product_id=row.id,
+            product_name=row.name,
+            platform_name=row.platform_name,
+            current_price=float(row.price),
+            original_price=float(row.original_price) if row.original_price else None,
+            discount_percentage=float(row.discount_percentage) if row.discount_percentage else None,
+            is_available=row.is_available,
+            last_updated=row.last_updated
+        )
+    
+    def _prepare_cheapest_product_query(self, query: str) -> Optional[PreparedSampleQuery]:
+        """Build the unordered statement for a cheapest product query."""
+        # Extract product name from query
+        product_name = self._extract_product_name(query)
+        if not product_name:
+            logger.warning("Could not extract product name from query")
+            return None
+        
+        logger.info(f"Searching for cheapest '{product_name}'")
+        
+        # Find products matching the name
+        product_variations = self._get_product_variations(product_name)
+        
+        # Query for cheapest prices across all platforms
+        statement = self._base_price_statement().where(
+            and_(
+                or_(*[Product.name.ilike(f'%{variation}%') for variation in product_variations]),
+                CurrentPrice.is_available == True,
+                Platform.is_active == True,
+                Product.is_active == True
+            )
+        )
+        
+        return PreparedSampleQuery(
+            statement=statement,
+            order_by=(CurrentPrice.price.asc(),),
+            limit=10,
+            finish=lambda rows: [self._row_to_result(row) for row in rows]
+        )
+    
+    def _prepare_discount_query(self, query: str) -> Optional[PreparedSampleQuery]:
+        """Build the unordered statement for a discount query."""
+        # Extract discount percentage and platform
+        min_discount = self._extract_discount_percentage(query)
+        platform_name = self._extract_platform_name(query)
+        
+        if min_discount == 0:
+            logger.warning("Could not extract discount percentage from query")
+            return None
+        
+        logger.info(f"Searching for products with {min_discount}%+ discount on {platform_name or 'all platforms'}")
+        
+        # Build query for discounted products
+        statement = self._base_price_statement().where(
+            and_(
+                CurrentPrice.discount_percentage >= min_discount,
+                CurrentPrice.is_available == True,
+                Platform.is_active == True,
+                Product.is_active == True,
+                CurrentPrice.original_price.isnot(None)  # Must have original price to calculate discount
+            )
+        )
+        
+        # Filter by platform if specified
+        if platform_name:
+            platform_variations = self._get_platform_variations(platform_name)
+            statement = statement.where(
+                or_(*[Platform.name.ilike(f'%{variation}%') for variation in platform_variations])
+            )
+        
+        # Order by discount percentage (highest first)
+        return PreparedSampleQuery(
+            statement=statement,
+            order_by=(desc(CurrentPrice.discount_percentage), asc(CurrentPrice.price)),
+            limit=50,
+            finish=lambda rows: [self._row_to_result(row) for row in rows]
+        )
+    
+    def _prepare_price_comparison_query(self, query: str) -> Optional[PreparedSampleQuery]:
+        """Build the unordered statement for a price comparison query."""
+        # Extract product/category and platforms
+        product_name = self._extract_product_name(query)
+        platforms = self._extract_platforms_for_comparison(query)
+        
+        if not product_name or len(platforms) < 2:
+            logger.warning("Could not extract sufficient information for comparison")
+            return None
+        
+        logger.info(f"Comparing '{product_name}' prices between {platforms}")
+        
+        # Get product variations
+        product_variations = self._get_product_variations(product_name)
+        platform_variations = []
+        for platform in platforms:
+            platform_variations.extend(self._get_platform_variations(platform))
+        
+        # Query for products on specified platforms
+        statement = self._base_price_statement().where(
+            and_(
+                or_(*[Product.name.ilike(f'%{variation}%') for variation in product_variations]),
+                or_(*[Platform.name.ilike(f'%{variation}%') for variation in platform_variations]),
+                CurrentPrice.is_available == True,
+                Platform.is_active == True,
+                Product.is_active == True
+            )
+        )
+        
+        return PreparedSampleQuery(
+            statement=statement,
+            order_by=(Product.name.asc(), CurrentPrice.price.asc()),
+            limit=100,
+            finish=self._group_comparison_results
+        )
+    
+    def _group_comparison_results(self, rows) -> List[QueryResult]:
+        """Group comparison rows by product, preferring multi-platform products."""
+        # Group results by product for better comparison
+        product_groups = {}
+        for row in rows:
+            product_key = row.name.lower()
+            if product_key not in product_groups:
+                product_groups[product_key] = []
+            
+            product_groups[product_key].append(self._row_to_result(row))
+        
+        # Flatten results, prioritizing products available on multiple platforms
+        results = []
+        for product_key, product_results in product_groups.items():
+            # Sort by platform count (products available on more platforms first)
+            platform_count = len(set(r.platform_name for r in product_results))
+            if platform_count >= 2:  # Available on at least 2 platforms
+                results.extend(sorted(product_results, key=lambda x: x.current_price))
+        
+        # If no multi-platform products, include all results
+        if not results:
+            for product_results in product_groups.values():
+                results.extend(sorted(product_results, key=lambda x: x.current_price))
+        
+        return results[:50]  # Limit to 50 results
+    
+    def _prepare_budget_optimization_query(self, query: str) -> Optional[PreparedSampleQuery]:
+        """Build the unordered statement for a budget optimization query."""
+        # Extract budget amount
+        budget = self._extract_budget_amount(query)
+        if budget <= 0:
+            logger.warning("Could not extract valid budget amount from query")
+            return None
+        
+        logger.info(f"Finding best deals within ₹{budget} budget")
+        
+        # Query for best deals across essential categories
+        statement = self._base_price_statement(
+            ProductCategory.name.label('category_name')
+        ).join(
+            ProductCategory, Product.category_id == ProductCategory.id
+        ).where(
+            and_(
+                CurrentPrice.is_available == True,
+                Platform.is_active == True,
+                Product.is_active == True,
+                CurrentPrice.price <= budget * 0.3,  # Individual items shouldn't exceed 30% of budget
+                or_(
+                    CurrentPrice.discount_percentage >= 10,  # At least 10% discount
+                    CurrentPrice.price <= 100  # Or very affordable items
+                )
+            )
+        )
+        
+        return PreparedSampleQuery(
+            statement=statement,
+            order_by=(desc(CurrentPrice.discount_percentage), asc(CurrentPrice.price)),
+            limit=100,
+            finish=lambda rows: [
+                self._row_to_result(row) for row in self._optimize_grocery_selection(rows, budget)
+            ]
+        )
+    
+    def _execute_prepared(self, db: Session, prepared: PreparedSampleQuery) -> list:
+        """Run a single prepared query with its own ordering and limit."""
+        return db.execute(
+            prepared.statement.order_by(*prepared.order_by).limit(prepared.limit)
+        ).all()
+    
+    def _execute_bulk(
+        self,
+        db: Session,
+        prepared_queries: List[Optional[PreparedSampleQuery]]
+    ) -> List[List[QueryResult]]:
+        """
+        Run several prepared queries as one UNION ALL statement.
+        
+        Each member keeps its own ordering and limit through a ROW_NUMBER()
+        window, and rows are split back out by their query index.
+        """
+        members = []
+        for index, prepared in enumerate(prepared_queries):
+            if prepared is None:
+                continue
+            ranked = prepared.statement.add_columns(
+                literal(index).label('query_index'),
+                func.row_number().over(order_by=prepared.order_by).label('query_rank')
+            ).subquery()
+            members.append(select(ranked).where(ranked.c.query_rank <= prepared.limit))
+        
+        grouped_rows = [[] for _ in prepared_queries]
+        if members:
+            combined = (union_all(*members) if len(members) > 1 else members[0]).subquery()
+            rows = db.execute(
+                select(combined).order_by(combined.c.query_index, combined.c.query_rank)
+            ).all()
+            for row in rows:
+                grouped_rows[row.query_index].append(row)
+        
+        return [
+            prepared.finish(rows) if prepared is not None and rows else []
+            for prepared, rows in zip(prepared_queries, grouped_rows)
+        ]
+    
+    async def _handle_bulk(
+        self,
+        db: Session,
+        queries: List[str],
+        prepare: Callable[[str], Optional[PreparedSampleQuery]],
+        label: str
+    ) -> List[List[QueryResult]]:
+        """Prepare and run a batch of same-type queries in one round trip.
+        
+        Errors are logged and re-raised: an empty result per query would be
+        indistinguishable from a genuine no-match answer.
+        """
+        logger.info(f"Processing {len(queries)} {label} queries in bulk")
+        
+        try:
+            return self._execute_bulk(db, [prepare(query) for query in queries])
+        except Exception as e:
+            logger.error(f"Error processing bulk {label} queries: {str(e)}")
+            raise
+    
     async def handle_cheapest_product_query(
         self, 
         db: Session, 
@@ -57,64 +327,19 @@ class SampleQueryHandlers:
         logger.info(f"Processing cheapest product query: {query}")
         
         try:
-            # Extract product name from query
-            product_name = self._extract_product_name(query)
-            if not product_name:
-                logger.warning("Could not extract product name from query")
+            prepared = self._prepare_cheapest_product_query(query)
+            if prepared is None:
                 return []
             
-            logger.info(f"Searching for cheapest '{product_name}'")
-            
-            # Find products matching the name
-            product_variations = self._get_product_variations(product_name)
-            
-            # Query for cheapest prices across all platforms
-            cheapest_query = db.query(
-                Product.id,
-                Product.name,
-                Platform.name.label('platform_name'),
-                CurrentPrice.price,
-                CurrentPrice.original_price,
-                CurrentPrice.discount_percentage,
-                CurrentPrice.is_available,
-                CurrentPrice.last_updated
-            ).join(
-                CurrentPrice, Product.id == CurrentPrice.product_id
-            ).join(
-                Platform, CurrentPrice.platform_id == Platform.id
-            ).filter(
-                and_(
-                    or_(*[Product.name.ilike(f'%{variation}%') for variation in product_variations]),
-                    CurrentPrice.is_available == True,
-                    Platform.is_active == True,
-                    Product.is_active == True
-                )
-            ).order_by(
-                CurrentPrice.price.asc()
-            ).limit(10)
-            
-            rows = cheapest_query.all()
+            rows = self._execute_prepared(db, prepared)
             
             if not rows:
-                logger.info(f"No results found for product: {product_name}")
+                logger.info(f"No results found for query: {query}")
                 return []
             
-            # Convert to QueryResult objects
-            results = []
-            for row in rows:
-                result = QueryResult(
-                    product_id=row.id,
-                    product_name=row.name,
-                    platform_name=row.platform_name,
-                    current_price=float(row.price),
-                    original_price=float(row.original_price) if row.original_price else None,
-                    discount_percentage=float(row.discount_percentage) if row.discount_percentage else None,
-                    is_available=row.is_available,
-                    last_updated=row.last_updated
-                )
-                results.append(result)
+            results = prepared.finish(rows)
             
-            logger.info(f"Found {len(results)} cheapest options for '{product_name}'")
+            logger.info(f"Found {len(results)} cheapest options")
             return results
             
         except Exception as e:
@@ -133,75 +358,19 @@ class SampleQueryHandlers:
         logger.info(f"Processing discount query: {query}")
         
         try:
-            # Extract discount percentage and platform
-            min_discount = self._extract_discount_percentage(query)
-            platform_name = self._extract_platform_name(query)
-            
-            if min_discount == 0:
-                logger.warning("Could not extract discount percentage from query")
+            prepared = self._prepare_discount_query(query)
+            if prepared is None:
                 return []
             
-            logger.info(f"Searching for products with {min_discount}%+ discount on {platform_name or 'all platforms'}")
-            
-            # Build query for discounted products
-            discount_query = db.query(
-                Product.id,
-                Product.name,
-                Platform.name.label('platform_name'),
-                CurrentPrice.price,
-                CurrentPrice.original_price,
-                CurrentPrice.discount_percentage,
-                CurrentPrice.is_available,
-                CurrentPrice.last_updated
-            ).join(
-                CurrentPrice, Product.id == CurrentPrice.product_id
-            ).join(
-                Platform, CurrentPrice.platform_id == Platform.id
-            ).filter(
-                and_(
-                    CurrentPrice.discount_percentage >= min_discount,
-                    CurrentPrice.is_available == True,
-                    Platform.is_active == True,
-                    Product.is_active == True,
-                    CurrentPrice.original_price.isnot(None)  # Must have original price to calculate discount
-                )
-            )
-            
-            # Filter by platform if specified
-            if platform_name:
-                platform_variations = self._get_platform_variations(platform_name)
-                discount_query = discount_query.filter(
-                    or_(*[Platform.name.ilike(f'%{variation}%') for variation in platform_variations])
-                )
-            
-            # Order by discount percentage (highest first)
-            discount_query = discount_query.order_by(
-                desc(CurrentPrice.discount_percentage),
-                asc(CurrentPrice.price)
-            ).limit(50)
-            
-            rows = discount_query.all()
+            rows = self._execute_prepared(db, prepared)
             
             if not rows:
-                logger.info(f"No products found with {min_discount}%+ discount")
+                logger.info(f"No discounted products found for query: {query}")
                 return []
             
-            # Convert to QueryResult objects
-            results = []
-            for row in rows:
-                result = QueryResult(
-                    product_id=row.id,
-                    product_name=row.name,
-                    platform_name=row.platform_name,
-                    current_price=float(row.price),
-                    original_price=float(row.original_price) if row.original_price else None,
-                    discount_percentage=float(row.discount_percentage) if row.discount_percentage else None,
-                    is_available=row.is_available,
-                    last_updated=row.last_updated
-                )
-                results.append(result)
+            results = prepared.finish(rows)
             
-            logger.info(f"Found {len(results)} products with {min_discount}%+ discount")
+            logger.info(f"Found {len(results)} discounted products")
             return results
             
         except Exception as e:
@@ -220,89 +389,20 @@ class SampleQueryHandlers:
         logger.info(f"Processing price comparison query: {query}")
         
         try:
-            # Extract product/category and platforms
-            product_name = self._extract_product_name(query)
-            platforms = self._extract_platforms_for_comparison(query)
-            
-            if not product_name or len(platforms) < 2:
-                logger.warning("Could not extract sufficient information for comparison")
+            prepared = self._prepare_price_comparison_query(query)
+            if prepared is None:
                 return []
             
-            logger.info(f"Comparing '{product_name}' prices between {platforms}")
-            
-            # Get product variations
-            product_variations = self._get_product_variations(product_name)
-            platform_variations = []
-            for platform in platforms:
-                platform_variations.extend(self._get_platform_variations(platform))
-            
-            # Query for products on specified platforms
-            comparison_query = db.query(
-                Product.id,
-                Product.name,
-                Platform.name.label('platform_name'),
-                CurrentPrice.price,
-                CurrentPrice.original_price,
-                CurrentPrice.discount_percentage,
-                CurrentPrice.is_available,
-                CurrentPrice.last_updated
-            ).join(
-                CurrentPrice, Product.id == CurrentPrice.product_id
-            ).join(
-                Platform, CurrentPrice.platform_id == Platform.id
-            ).filter(
-                and_(
-                    or_(*[Product.name.ilike(f'%{variation}%') for variation in product_variations]),
-                    or_(*[Platform.name.ilike(f'%{variation}%') for variation in platform_variations]),
-                    CurrentPrice.is_available == True,
-                    Platform.is_active == True,
-                    Product.is_active == True
-                )
-            ).order_by(
-                Product.name.asc(),
-                CurrentPrice.price.asc()
-            ).limit(100)
-            
-            rows = comparison_query.all()
+            rows = self._execute_prepared(db, prepared)
             
             if not rows:
-                logger.info(f"No products found for comparison between {platforms}")
+                logger.info(f"No products found for comparison query: {query}")
                 return []
             
-            # Group results by product for better comparison
-            product_groups = {}
-            for row in rows:
-                product_key = row.name.lower()
-                if product_key not in product_groups:
-                    product_groups[product_key] = []
-                
-                result = QueryResult(
-                    product_id=row.id,
-                    product_name=row.name,
-                    platform_name=row.platform_name,
-                    current_price=float(row.price),
-                    original_price=float(row.original_price) if row.original_price else None,
-                    discount_percentage=float(row.discount_percentage) if row.discount_percentage else None,
-                    is_available=row.is_available,
-                    last_updated=row.last_updated
-                )
-                product_groups[product_key].append(result)
-            
-            # Flatten results, prioritizing products available on multiple platforms
-            results = []
-            for product_key, product_results in product_groups.items():
-                # Sort by platform count (products available on more platforms first)
-                platform_count = len(set(r.platform_name for r in product_results))
-                if platform_count >= 2:  # Available on at least 2 platforms
-                    results.extend(sorted(product_results, key=lambda x: x.current_price))
-            
-            # If no multi-platform products, include all results
-            if not results:
-                for product_results in product_groups.values():
-                    results.extend(sorted(product_results, key=lambda x: x.current_price))
+            results = prepared.finish(rows)
             
             logger.info(f"Found {len(results)} products for price comparison")
-            return results[:50]  # Limit to 50 results
+            return results
             
         except Exception as e:
             logger.error(f"Error processing price comparison query: {str(e)}")
@@ -320,87 +420,58 @@ class SampleQueryHandlers:
         logger.info(f"Processing budget optimization query: {query}")
         
         try:
-            # Extract budget amount
-            budget = self._extract_budget_amount(query)
-            if budget <= 0:
-                logger.warning("Could not extract valid budget amount from query")
+            prepared = self._prepare_budget_optimization_query(query)
+            if prepared is None:
                 return []
             
-            logger.info(f"Finding best deals within ₹{budget} budget")
-            
-            # Get essential grocery categories
-            essential_categories = [
-                'vegetables', 'fruits', 'dairy', 'grains', 'pulses', 
-                'cooking oil', 'spices', 'bread', 'eggs'
-            ]
-            
-            # Query for best deals across essential categories
-            deals_query = db.query(
-                Product.id,
-                Product.name,
-                Platform.name.label('platform_name'),
-                CurrentPrice.price,
-                CurrentPrice.original_price,
-                CurrentPrice.discount_percentage,
-                CurrentPrice.is_available,
-                CurrentPrice.last_updated,
-                ProductCategory.name.label('category_name')
-            ).join(
-                CurrentPrice, Product.id == CurrentPrice.product_id
-            ).join(
-                Platform, CurrentPrice.platform_id == Platform.id
-            ).join(
-                ProductCategory, Product.category_id == ProductCategory.id
-            ).filter(
-                and_(
-                    CurrentPrice.is_available == True,
-                    Platform.is_active == True,
-                    Product.is_active == True,
-                    CurrentPrice.price <= budget * 0.3,  # Individual items shouldn't exceed 30% of budget
-                    or_(
-                        CurrentPrice.discount_percentage >= 10,  # At least 10% discount
-                        CurrentPrice.price <= 100  # Or very affordable items
-                    )
-                )
-            ).order_by(
-                desc(CurrentPrice.discount_percentage),
-                asc(CurrentPrice.price)
-            ).limit(100)
-            
-            rows = deals_query.all()
+            rows = self._execute_prepared(db, prepared)
             
             if not rows:
-                logger.info(f"No deals found within ₹{budget} budget")
+                logger.info(f"No deals found for query: {query}")
                 return []
             
-            # Optimize selection for budget
-            selected_items = self._optimize_grocery_selection(rows, budget)
-            
-            # Convert to QueryResult objects
-            results = []
-            total_cost = 0
+            results = prepared.finish(rows)
+            total_cost = sum(result.current_price for result in results)
             
-            for row in selected_items:
-                result = QueryResult(
-                    product_id=row.id,
-                    product_name=row.name,
-                    platform_name=row.platform_name,
-                    current_price=float(row.price),
-                    original_price=float(row.original_price) if row.original_price else None,
-                    discount_percentage=float(row.discount_percentage) if row.discount_percentage else None,
-                    is_available=row.is_available,
-                    last_updated=row.last_updated
-                )
-                results.append(result)
-                total_cost += float(row.price)
-            
-            logger.info(f"Optimized grocery list: {len(results)} items for ₹{total_cost:.2f} (budget: ₹{budget})")
+            logger.info(f"Optimized grocery list: {len(results)} items for ₹{total_cost:.2f}")
             return results
             
         except Exception as e:
             logger.error(f"Error processing budget optimization query: {str(e)}")
             return []
     
+    async def handle_cheapest_product_queries_bulk(
+        self,
+        db: Session,
+        queries: List[str]
+    ) -> List[List[QueryResult]]:
+        """Handle several cheapest product queries in one statement."""
+        return await self._handle_bulk(db, queries, self._prepare_cheapest_product_query, "cheapest product")
+    
+    async def handle_discount_queries_bulk(
+        self,
+        db: Session,
+        queries: List[str]
+    ) -> List[List[QueryResult]]:
+        """Handle several discount queries in one statement."""
+        return await self._handle_bulk(db, queries, self._prepare_discount_query, "discount")
+    
+    async def handle_price_comparison_queries_bulk(
+        self,
+        db: Session,
+        queries: List[str]
+    ) -> List[List[QueryResult]]:
+        """Handle several price comparison queries in one statement."""
+        return await self._handle_bulk(db, queries, self._prepare_price_comparison_query, "price comparison")
+    
+    async def handle_budget_optimization_queries_bulk(
+        self,
+        db: Session,
+        queries: List[str]
+    ) -> List[List[QueryResult]]:
+        """Handle several budget optimization queries in one statement."""
+        return await self._handle_bulk(db, queries, self._prepare_budget_optimization_query, "budget optimization")
+    
     def _extract_product_name(self, query: str) -> str:
         """Extract product name from query."""
         query_lower = query.lower()
@@ -559,12 +630,15 @@ class SampleQueryHandlers:
         return selected
 
 
-# Singleton instance
+# Singleton instance; handlers hold no session or loop state, so one instance is shared process-wide
 _sample_query_handlers = None
+_sample_query_handlers_lock = threading.Lock()
 
 def get_sample_query_handlers() -> SampleQueryHandlers:
     """Get singleton instance of SampleQueryHandlers."""
     global _sample_query_handlers
     if _sample_query_handlers is None:
-        _sample_query_handlers = SampleQueryHandlers()
+        with _sample_query_handlers_lock:
+            if _sample_query_handlers is None:
+                _sample_query_handlers = SampleQueryHandlers()
     return _sample_query_handlers
\ No newline at end of file